@@ -22,6 +22,7 @@ pip install -r requirements.txt
 
 echo "🗄️ Executando migrações..."
 python manage.py migrate --settings=grupoMaster.settings_production
+python manage.py createcachetable --settings=grupoMaster.settings_production
 
 echo "📁 Coletando arquivos estáticos..."
 python manage.py collectstatic --noinput --settings=grupoMaster.settings_production
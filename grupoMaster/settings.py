@@ -82,6 +82,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Transações de escrita pegam o lock logo no BEGIN: escritores concorrentes
+        # esperam o timeout em vez de falhar com "database is locked"
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+        # Banco de testes em arquivo para que testes com threads usem locks reais
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -133,4 +138,10 @@ LOGOUT_REDIRECT_URL = '/login/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-AUTH_USER_MODEL = 'raqs.Operador'
\ No newline at end of file
+AUTH_USER_MODEL = 'raqs.Operador'
+# Desenvolvimento: e-mails (aviso de vencimentos) saem no console
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'noreply@grupo-master.com'
+
+# Versão do código nas chaves de cache (raqs/versao.py); vazio = hash dos arquivos do app
+VERSAO_APP = os.environ.get('VERSAO_APP', '')
@@ -86,11 +86,17 @@ LOGGING = {
     },
 }
 
-# Cache configuration (optional - for better performance)
+# Cache compartilhado entre os workers do gunicorn e os containers, na tabela
+# do próprio banco (criada com "manage.py createcachetable"). As chaves dos dados
+# de cada empresa são versionadas e invalidadas por signals (raqs/cache_empresa.py).
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'raqs_cache',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
     }
 }
 
@@ -14,6 +14,16 @@ urlpatterns = [
         name="update-ensaio-choices",
     ),
     path("cadastro-soldador/", views.cadastro_soldador, name="cadastro-soldador"),
+    path(
+        "importar-solicitacoes/",
+        views.importar_solicitacoes,
+        name="importar-solicitacoes",
+    ),
+    path(
+        "importar-solicitacoes/<int:importacao_id>/",
+        views.importacao_solicitacoes,
+        name="importacao-solicitacoes",
+    ),
     path(
         "solicitacao-qualificacao-soldador/<int:soldador_id>/",
         views.solicitacao_qualificacao_soldador,
@@ -34,6 +44,11 @@ urlpatterns = [
         views.solicitacoes_soldador,
         name="solicitacoes-soldador",
     ),
+    path(
+        "solicitacoes-empresa/",
+        views.solicitacoes_empresa,
+        name="solicitacoes-empresa",
+    ),
     path(
         "apagar-solicitacao/<int:solicitacao_id>/",
         views.apagar_solicitacao,
@@ -44,6 +59,14 @@ urlpatterns = [
         views.update_consumivel_classificacao,
         name="update-consumivel-classificacao",
     ),
+    path(
+        "regras-formulario/<str:versao>.json",
+        views.regras_formulario,
+        name="regras-formulario",
+    ),
+    path("busca/", views.busca_global, name="busca-global"),
+    path("exportar-cqs/", views.exportar_cqs, name="exportar-cqs"),
+    path("cqs-a-vencer/", views.cqs_a_vencer_view, name="cqs-a-vencer"),
     path("master-dashboard/", views.master_dashboard, name="master_dashboard"),
     path("raqs/criar/<int:empresa_id>/", views.criar_raqs, name="criar_raqs"),
     path(
@@ -52,7 +75,14 @@ urlpatterns = [
         name="adicionar_solicitacao_raqs",
     ),
     path("raqs/<int:raqs_id>/fechar/", views.fechar_raqs, name="fechar_raqs"),
+    path("raqs/<int:raqs_id>/relatorio/", views.relatorio_raqs, name="relatorio_raqs"),
     path("raqs/<int:raqs_id>/", views.raqs_detail, name="raqs_detail"),
+    path(
+        "raqs/<int:raqs_id>/certificados.pdf",
+        views.certificados_raqs,
+        name="certificados_raqs",
+    ),
+    path("cqs/<int:cqs_id>/certificado.pdf", views.certificado_cqs, name="certificado_cqs"),
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -11,4 +11,8 @@ admin.site.register(EnsaioUltrassom)
 admin.site.register(TesteVisual)
 admin.site.register(Raqs)
 admin.site.register(CQS)
+admin.site.register(SequenciaCQS)
+admin.site.register(Tarefa)
+admin.site.register(Importacao)
+admin.site.register(EstatisticaEmpresa)
 admin.site.register(Operador, AdminEmpresaAdmin)
@@ -0,0 +1,220 @@
+"""
+Busca global (typeahead) por soldador, solicitação, RAQS e CQS.
+
+- Soldador: nome e CPF (prefixo do CPF normalizado)
+- Solicitação: sinete e EPS
+- RAQS: ``n_master``
+- CQS: ``numero``
+
+Em produção (PostgreSQL) o ``icontains`` é atendido pelos índices GIN trigram da
+migração 0031. No SQLite de desenvolvimento os candidatos vêm da tabela FTS5
+``raqs_busca`` (tokenizador trigram), mantida por triggers. Nos dois casos o escopo
+por empresa e o ranking (igual > começa com > contém) ficam no ORM.
+"""
+
+from django.db import connection
+from django.db.models import Case, Exists, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+
+from raqs.models import CQS, Raqs, Soldador, SolicitacaoCadastroSoldador, normalizar_cpf
+
+TABELA_FTS = "raqs_busca"
+RESULTADOS_POR_TIPO = 5
+TAMANHO_MINIMO = 2
+# O tokenizador trigram só encontra trechos com 3 caracteres ou mais
+TAMANHO_MINIMO_FTS = 3
+
+# tipo: (código no rowid da FTS, model, campos pesquisados)
+FONTES = {
+    "soldador": (1, Soldador, ("nome",)),
+    "solicitacao": (2, SolicitacaoCadastroSoldador, ("sinete", "eps")),
+    "raqs": (3, Raqs, ("n_master",)),
+    "cqs": (4, CQS, ("numero",)),
+}
+
+
+def sincronizar_indice_sqlite(conexao=connection):
+    """
+    (Re)cria a tabela FTS5 e os triggers que a mantêm. O rowid é
+    ``id * 10 + código do tipo``, para que os triggers atualizem pela chave.
+    Roda após cada ``migrate``: o SQLite reconstrói tabelas em várias alterações
+    de schema e os triggers se perdem junto.
+    """
+    sql = [
+        f"DROP TABLE IF EXISTS {TABELA_FTS}",
+        f"CREATE VIRTUAL TABLE {TABELA_FTS} USING fts5(texto, tokenize='trigram')",
+    ]
+    for tipo, (codigo, model, campos) in FONTES.items():
+        tabela = model._meta.db_table
+        colunas = [model._meta.get_field(campo).column for campo in campos]
+
+        def texto(linha):
+            return " || ' ' || ".join(f"COALESCE({linha}.{coluna}, '')" for coluna in colunas)
+
+        sql += [
+            f"INSERT INTO {TABELA_FTS}(rowid, texto) "
+            f"SELECT id * 10 + {codigo}, {texto(tabela)} FROM {tabela}",
+            f"DROP TRIGGER IF EXISTS {TABELA_FTS}_{tipo}_ai",
+            f"CREATE TRIGGER {TABELA_FTS}_{tipo}_ai AFTER INSERT ON {tabela} BEGIN "
+            f"INSERT INTO {TABELA_FTS}(rowid, texto) "
+            f"VALUES (NEW.id * 10 + {codigo}, {texto('NEW')}); END",
+            f"DROP TRIGGER IF EXISTS {TABELA_FTS}_{tipo}_ad",
+            f"CREATE TRIGGER {TABELA_FTS}_{tipo}_ad AFTER DELETE ON {tabela} BEGIN "
+            f"DELETE FROM {TABELA_FTS} WHERE rowid = OLD.id * 10 + {codigo}; END",
+            f"DROP TRIGGER IF EXISTS {TABELA_FTS}_{tipo}_au",
+        ]
+        if tipo != "raqs":  # n_master é gerado a partir do id e nunca muda
+            sql.append(
+                f"CREATE TRIGGER {TABELA_FTS}_{tipo}_au AFTER UPDATE OF {', '.join(colunas)} "
+                f"ON {tabela} BEGIN UPDATE {TABELA_FTS} SET texto = {texto('NEW')} "
+                f"WHERE rowid = NEW.id * 10 + {codigo}; END"
+            )
+    with conexao.cursor() as cursor:
+        for comando in sql:
+            cursor.execute(comando)
+
+
+def _frase_fts(termo):
+    return '"{}"'.format(termo.replace('"', '""'))
+
+
+def _filtro_texto(tipo, termo):
+    codigo, _, campos = FONTES[tipo]
+    if connection.vendor == "sqlite" and len(termo) >= TAMANHO_MINIMO_FTS:
+        return Q(
+            id__in=RawSQL(
+                f"SELECT rowid / 10 FROM {TABELA_FTS} "
+                f"WHERE texto MATCH %s AND rowid %% 10 = %s",
+                (_frase_fts(termo), codigo),
+            )
+        )
+    filtro = Q()
+    for campo in campos:
+        filtro |= Q(**{f"{campo}__icontains": termo})
+    return filtro
+
+
+def _relevancia(campos, termo):
+    exato, prefixo = Q(), Q()
+    for campo in campos:
+        exato |= Q(**{f"{campo}__iexact": termo})
+        prefixo |= Q(**{f"{campo}__istartswith": termo})
+    return Case(
+        When(exato, then=Value(3)),
+        When(prefixo, then=Value(2)),
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+
+
+def _raqs_da_solicitacao(campo):
+    return Subquery(
+        Raqs.objects.filter(solicitacoes=OuterRef(campo)).order_by("-id").values("id")[:1]
+    )
+
+
+def _pesquisar(tipo, queryset, termo, filtro=None):
+    _, _, campos = FONTES[tipo]
+    filtro = _filtro_texto(tipo, termo) | (filtro or Q())
+    return (
+        queryset.filter(filtro)
+        .annotate(relevancia=_relevancia(campos, termo))
+        .order_by("-relevancia", *campos, "id")
+    )
+
+
+def buscar(termo, empresa=None):
+    """
+    Resultados ranqueados para ``termo``, no máximo ``RESULTADOS_POR_TIPO`` por tipo
+    (uma query por tipo). Com ``empresa`` a busca fica restrita aos dados dela;
+    ``None`` busca em todas (Grupo Master).
+    """
+    termo = termo.strip()
+    if len(termo) < TAMANHO_MINIMO:
+        return []
+
+    soldadores = Soldador.objects.all()
+    solicitacoes = SolicitacaoCadastroSoldador.objects.all()
+    raqs = Raqs.objects.all()
+    cqs = CQS.objects.all()
+    if empresa is not None:
+        soldadores = soldadores.filter(
+            Exists(
+                SolicitacaoCadastroSoldador.objects.filter(
+                    soldador=OuterRef("pk"), empresa=empresa
+                )
+            )
+        )
+        solicitacoes = solicitacoes.filter(empresa=empresa)
+        raqs = raqs.filter(empresa=empresa)
+        cqs = cqs.filter(solicitacao__empresa=empresa)
+
+    cpf = normalizar_cpf(termo)
+    filtro_cpf = (
+        Q(cpf_normalizado__startswith=cpf)
+        if cpf and len(cpf) >= TAMANHO_MINIMO_FTS and not any(c.isalpha() for c in termo)
+        else None
+    )
+
+    resultados = []
+    for linha in _pesquisar("soldador", soldadores, termo, filtro_cpf).values(
+        "id", "nome", "cpf", "relevancia"
+    )[:RESULTADOS_POR_TIPO]:
+        resultados.append(
+            {
+                "tipo": "Soldador",
+                "titulo": linha["nome"],
+                "detalhe": f"CPF: {linha['cpf']}",
+                "url": reverse("solicitacao-qualificacao-soldador", args=[linha["id"]]),
+                "relevancia": linha["relevancia"],
+            }
+        )
+    for linha in (
+        _pesquisar("solicitacao", solicitacoes, termo)
+        .annotate(raqs_id=_raqs_da_solicitacao("pk"))
+        .values("sinete", "eps", "soldador__nome", "raqs_id", "relevancia")[
+            :RESULTADOS_POR_TIPO
+        ]
+    ):
+        resultados.append(
+            {
+                "tipo": "Solicitação",
+                "titulo": f"Sinete {linha['sinete']} - EPS {linha['eps']}",
+                "detalhe": linha["soldador__nome"],
+                "url": linha["raqs_id"] and reverse("raqs_detail", args=[linha["raqs_id"]]),
+                "relevancia": linha["relevancia"],
+            }
+        )
+    for linha in _pesquisar("raqs", raqs, termo).values(
+        "id", "n_master", "empresa__nome", "relevancia"
+    )[:RESULTADOS_POR_TIPO]:
+        resultados.append(
+            {
+                "tipo": "RAQS",
+                "titulo": linha["n_master"],
+                "detalhe": linha["empresa__nome"],
+                "url": reverse("raqs_detail", args=[linha["id"]]),
+                "relevancia": linha["relevancia"],
+            }
+        )
+    for linha in (
+        _pesquisar("cqs", cqs, termo)
+        .annotate(raqs_id=_raqs_da_solicitacao("solicitacao_id"))
+        .values("numero", "solicitacao__soldador__nome", "raqs_id", "relevancia")[
+            :RESULTADOS_POR_TIPO
+        ]
+    ):
+        resultados.append(
+            {
+                "tipo": "CQS",
+                "titulo": linha["numero"],
+                "detalhe": linha["solicitacao__soldador__nome"],
+                "url": linha["raqs_id"] and reverse("raqs_detail", args=[linha["raqs_id"]]),
+                "relevancia": linha["relevancia"],
+            }
+        )
+
+    # Ordenação estável: mantém a ordem por tipo dentro da mesma relevância
+    resultados.sort(key=lambda resultado: -resultado["relevancia"])
+    return resultados
@@ -0,0 +1,62 @@
+"""
+Cache compartilhado com chaves versionadas por empresa.
+
+Em produção o backend é a tabela de cache do banco (``DatabaseCache``): todos os
+workers do gunicorn e os containers leem as mesmas entradas. Nada é apagado: cada
+gravação troca a versão da empresa (signals em raqs/models.py) e as entradas da
+versão anterior deixam de ser lidas até expirarem.
+
+A versão nova é um valor aleatório gravado depois do commit, e não um contador:
+duas trocas simultâneas não se anulam, e ninguém lê a versão nova antes de os
+dados estarem visíveis.
+
+As entradas guardam instâncias de modelo serializadas; a chave leva a versão do
+código (raqs/versao.py) para que um deploy com modelos diferentes não leia
+objetos gravados pela versão anterior.
+"""
+
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from raqs.versao import versao_app
+
+VERSAO_GERAL = "empresa:versao"
+TIMEOUT = 60 * 60 * 24  # 1 dia; versões antigas somem sozinhas
+
+
+def _chave_versao(empresa_id):
+    return f"empresa:{empresa_id}:versao"
+
+
+def chave_empresa(empresa_id, *partes):
+    """
+    Chave de cache de ``partes`` para a empresa, válida até a próxima gravação
+    nos dados dela, uma invalidação geral ou um deploy. Uma leitura no cache.
+    """
+    chaves = [VERSAO_GERAL, _chave_versao(empresa_id)]
+    versoes = cache.get_many(chaves)
+    novas = {chave: uuid.uuid4().hex for chave in chaves if chave not in versoes}
+    if novas:
+        cache.set_many(novas, None)
+        versoes.update(novas)
+    return ":".join(
+        ["empresa", versao_app(), str(empresa_id), versoes[VERSAO_GERAL], versoes[_chave_versao(empresa_id)]]
+        + [str(parte) for parte in partes]
+    )
+
+
+def invalidar_cache_empresas(empresa_ids=None):
+    """
+    Troca a versão das empresas (de todas, sem ``empresa_ids``) quando a transação
+    atual for confirmada; fora de transação, na hora.
+    """
+    if empresa_ids is None:
+        chaves = [VERSAO_GERAL]
+    else:
+        chaves = [_chave_versao(empresa_id) for empresa_id in set(empresa_ids) if empresa_id]
+    if chaves:
+        transaction.on_commit(
+            lambda: cache.set_many({chave: uuid.uuid4().hex for chave in chaves}, None)
+        )
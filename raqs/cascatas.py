@@ -0,0 +1,143 @@
+"""
+Campos dependentes do formulário de solicitação de qualificação.
+
+A mesma lógica alimenta a validação do ``SolicitacaoCadastroSoldadorForm``, as views
+HTMX de campos dependentes e o pacote JSON (``pacote_regras_formulario``) que o
+navegador usa para aplicar as cascatas sem ida ao servidor.
+
+- norma do projeto → ensaios permitidos
+- processo de soldagem → consumíveis, especificações e gás de proteção
+- metal de base → espessura/diâmetro e posições de soldagem
+- posição de soldagem → progressão
+"""
+
+import hashlib
+import json
+import threading
+
+from raqs.models import SolicitacaoCadastroSoldador as Solicitacao
+from raqs.regras import obter_regras
+
+NORMAS_SO_DOBRAMENTO = ("AWS_D1-1",)
+
+METAIS_BASE_CHAPA = ("A-36", "B536", "A-309", "A-312")
+METAIS_BASE_TUBO = ("A-106", "16MO3")
+POSICOES_SO_TUBO = ("5G", "6G")
+POSICOES_SO_CHAPA = ("3G", "4G")
+
+GAS_POR_PROCESSO = {
+    "GTAW": "ARGONIO",
+    "GMAW": "ARCO2",
+    "FCAW": "CO2",
+}
+
+
+def _filtrar(choices, valores):
+    return [choice for choice in choices if choice[0] in valores]
+
+
+def ensaios_da_norma(norma):
+    if norma in NORMAS_SO_DOBRAMENTO:
+        return _filtrar(Solicitacao.ENSAIO_CHOICES, ("DOBRAMENTO",))
+    return list(Solicitacao.ENSAIO_CHOICES)
+
+
+def campos_do_metal_base(metal_base_spec):
+    """
+    Quais medidas o metal de base usa e as posições de soldagem permitidas:
+    chapas só têm espessura (sem 5G/6G), tubos só têm diâmetro (sem 3G/4G).
+    """
+    posicoes = list(Solicitacao.POSICAO_SOLDAGEM_CHOICES)
+    if metal_base_spec in METAIS_BASE_CHAPA:
+        return {
+            "espessura": True,
+            "diametro": False,
+            "posicoes": [p for p in posicoes if p[0] not in POSICOES_SO_TUBO],
+        }
+    if metal_base_spec in METAIS_BASE_TUBO:
+        return {
+            "espessura": False,
+            "diametro": True,
+            "posicoes": [p for p in posicoes if p[0] not in POSICOES_SO_CHAPA],
+        }
+    return {"espessura": True, "diametro": True, "posicoes": posicoes}
+
+
+def progressoes_da_posicao(posicao_soldagem):
+    if posicao_soldagem == "6G":
+        return _filtrar(Solicitacao.POSICAO_SOLDAGEM_PRG_CHOICES, ("ASCENDENTE",))
+    if posicao_soldagem in ("3G", "3F", "5G"):
+        return _filtrar(
+            Solicitacao.POSICAO_SOLDAGEM_PRG_CHOICES, ("ASCENDENTE", "DESCENDENTE")
+        )
+    return _filtrar(Solicitacao.POSICAO_SOLDAGEM_PRG_CHOICES, ("NA",))
+
+
+def gases_do_processo(processo_soldagem):
+    return _filtrar(
+        Solicitacao.GAS_PROTECAO_CHOICES,
+        (GAS_POR_PROCESSO.get(processo_soldagem, "NA"),),
+    )
+
+
+def consumiveis_do_processo(processo_soldagem, regras=None):
+    """Classificações e especificações do processo, na ordem dos choices do modelo."""
+    regras = regras or obter_regras()
+    return (
+        _filtrar(
+            Solicitacao.CONSUMIVEL_CLASS_CHOICES,
+            regras.consumiveis_do_processo(processo_soldagem),
+        ),
+        _filtrar(
+            Solicitacao.CONSUMIVEL_SPEC_CHOICES,
+            regras.especificacoes_do_processo(processo_soldagem),
+        ),
+    )
+
+
+def _montar_pacote(regras):
+    processos = {}
+    for processo, _ in Solicitacao.PROCESSO_SOLDAGEM_CHOICES:
+        consumiveis, especificacoes = consumiveis_do_processo(processo, regras)
+        processos[processo] = {
+            "consumiveis": consumiveis,
+            "especificacoes": especificacoes,
+            "gases": gases_do_processo(processo),
+        }
+    return {
+        "ensaios": {
+            norma: ensaios_da_norma(norma) for norma, _ in Solicitacao.NORMA_PROJETO_CHOICES
+        },
+        "processos": processos,
+        "metais_base": {
+            spec: campos_do_metal_base(spec)
+            for spec, _ in Solicitacao.METAL_BASE_SPECS_CHOICES
+        },
+        "progressoes": {
+            posicao: progressoes_da_posicao(posicao)
+            for posicao, _ in Solicitacao.POSICAO_SOLDAGEM_CHOICES
+        },
+    }
+
+
+_pacote = None
+_lock = threading.Lock()
+
+
+def pacote_regras_formulario():
+    """
+    ``(versao, conteudo)`` do pacote JSON das cascatas. A versão é o hash do
+    conteúdo, então muda sozinha quando as planilhas ou os choices mudam.
+    """
+    global _pacote
+    regras = obter_regras()
+    pacote = _pacote
+    if pacote is not None and pacote[0] == regras.versao:
+        return pacote[1:]
+    with _lock:
+        if _pacote is None or _pacote[0] != regras.versao:
+            dados = _montar_pacote(regras)
+            conteudo = json.dumps(dados, ensure_ascii=False, sort_keys=True).encode()
+            versao = hashlib.sha1(conteudo).hexdigest()[:12]
+            _pacote = (regras.versao, versao, conteudo)
+        return _pacote[1:]
@@ -0,0 +1,177 @@
+"""
+Certificados (CQS) em PDF, com cache por conteúdo e renderização em paralelo.
+
+Cada página é identificada pelo hash dos dados impressos (CQS, solicitação,
+soldador, empresa e logo, com tamanho e data do arquivo do logo) mais a versão do
+layout: só é redesenhada quando algo que aparece no certificado muda. As páginas
+ficam no storage de mídia em ``certificados/<hash>.jpg``, compartilhadas entre
+processos e servidores; as que nenhum CQS usa mais saem com ``limpar_certificados``.
+
+Os dados vêm de uma única query com ``values()``; as páginas que faltam são
+desenhadas em um ``ProcessPoolExecutor`` (raqs/pdf.py não depende do Django) e o
+PDF final é montado em streaming a partir dos JPEGs.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from raqs.exportacao import COLUNAS
+from raqs.models import CQS
+from raqs.pdf import VERSAO_LAYOUT, escrever_pdf, renderizar_certificado
+
+PASTA_CACHE = "certificados"
+# Abaixo disso o custo de subir o pool supera o ganho
+MINIMO_PARALELO = 8
+WORKERS = min(8, os.cpu_count() or 1)
+
+# Cabeçalhos de COLUNAS que vão para o topo/rodapé, fora da tabela
+FORA_DA_TABELA = {"CQS", "Emissão", "Validade"}
+
+
+def _texto(valor, rotulos):
+    if valor is None or valor == "":
+        return "-"
+    if hasattr(valor, "strftime"):
+        return valor.strftime("%d/%m/%Y")
+    return str(rotulos.get(valor, valor)) if rotulos else str(valor)
+
+
+def dados_certificados(cqs):
+    """
+    ``[(id, dados)]`` na ordem de ``cqs`` (queryset), em uma query. ``dados`` é o
+    dicionário aceito por ``raqs.pdf.renderizar_certificado``.
+    """
+    campos = [campo for _, campo, _ in COLUNAS]
+    rotulos = [dict(choices) if choices else None for _, _, choices in COLUNAS]
+    logos = {}  # um stat por logo, não por CQS
+    resultado = []
+    for linha in cqs.values_list("id", "solicitacao__empresa__logo", *campos):
+        cqs_id, logo, valores = linha[0], linha[1], linha[2:]
+        if logo not in logos:
+            logos[logo] = _arquivo_logo(logo)
+        caminho_logo, versao_logo = logos[logo]
+        textos = {
+            cabecalho: _texto(valor, rotulo)
+            for (cabecalho, _, _), valor, rotulo in zip(COLUNAS, valores, rotulos)
+        }
+        resultado.append(
+            (
+                cqs_id,
+                {
+                    "numero": textos["CQS"],
+                    "emissao": textos["Emissão"],
+                    "validade": textos["Validade"],
+                    "logo": caminho_logo,
+                    # Logo trocado com o mesmo nome muda a chave da página
+                    "versao_logo": versao_logo,
+                    "campos": [
+                        [cabecalho, texto]
+                        for cabecalho, texto in textos.items()
+                        if cabecalho not in FORA_DA_TABELA
+                    ],
+                },
+            )
+        )
+    return resultado
+
+
+def _arquivo_logo(nome):
+    """``(caminho, "tamanho:mtime")`` do logo; vazios sem logo ou em storage remoto."""
+    if not nome:
+        return "", ""
+    try:
+        caminho = default_storage.path(nome)
+    except NotImplementedError:  # storage remoto: certificado sai sem logo
+        return "", ""
+    try:
+        estado = os.stat(caminho)
+    except OSError:  # arquivo sumiu: página sem logo
+        return "", ""
+    return caminho, f"{estado.st_size}:{estado.st_mtime_ns}"
+
+
+def chave_certificado(dados):
+    conteudo = json.dumps([VERSAO_LAYOUT, dados], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+
+def _arquivo(chave):
+    return f"{PASTA_CACHE}/{chave}.jpg"
+
+
+def paginas_certificados(cqs, workers=WORKERS):
+    """
+    Chaves das páginas dos certificados de ``cqs`` (queryset, na ordem dele),
+    desenhando e gravando no cache apenas as que ainda não existem.
+    """
+    chaves = []
+    faltando = {}
+    for _, dados in dados_certificados(cqs):
+        chave = chave_certificado(dados)
+        chaves.append(chave)
+        if chave not in faltando and not default_storage.exists(_arquivo(chave)):
+            faltando[chave] = dados
+
+    if len(faltando) >= MINIMO_PARALELO and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paginas = pool.map(
+                renderizar_certificado,
+                faltando.values(),
+                chunksize=max(1, len(faltando) // (workers * 4)),
+            )
+            for chave, jpeg in zip(faltando, paginas):
+                default_storage.save(_arquivo(chave), ContentFile(jpeg))
+    else:
+        for chave, dados in faltando.items():
+            default_storage.save(_arquivo(chave), ContentFile(renderizar_certificado(dados)))
+    return chaves
+
+
+def _ler_paginas(chaves):
+    for chave in chaves:
+        with default_storage.open(_arquivo(chave), "rb") as arquivo:
+            yield arquivo.read()
+
+
+def gerar_pdf_certificados(cqs, saida, workers=WORKERS):
+    """Grava em ``saida`` o PDF com um certificado por página, na ordem de ``cqs``."""
+    escrever_pdf(_ler_paginas(paginas_certificados(cqs, workers)), saida)
+
+
+def limpar_paginas_orfas(antes_de, apagar=True):
+    """
+    Páginas em cache que nenhum CQS usa mais (dados ou layout mudaram), gravadas
+    antes de ``antes_de``: páginas novas de outro processo não entram. Apaga-as,
+    salvo ``apagar=False``, e devolve os nomes.
+    """
+    em_uso = {
+        chave_certificado(dados)
+        for _, dados in dados_certificados(CQS.objects.exclude(solicitacao__isnull=True))
+    }
+    try:
+        _, arquivos = default_storage.listdir(PASTA_CACHE)
+    except FileNotFoundError:  # nenhuma página desenhada ainda
+        return []
+    orfas = [
+        nome
+        for nome in arquivos
+        if nome.endswith(".jpg")
+        and nome[: -len(".jpg")] not in em_uso
+        and default_storage.get_modified_time(f"{PASTA_CACHE}/{nome}") < antes_de
+    ]
+    if apagar:
+        for nome in orfas:
+            default_storage.delete(f"{PASTA_CACHE}/{nome}")
+    return orfas
+
+
+def certificados_do_raqs(raqs):
+    """CQS emitidos para as solicitações do RAQS, na ordem da tela de detalhe."""
+    return CQS.objects.filter(solicitacao__raqs=raqs).order_by(
+        "solicitacao__soldador__nome", "solicitacao__soldador_id", "solicitacao_id"
+    )
@@ -0,0 +1,100 @@
+"""
+Exportação em CSV do registro de CQS (certificados e histórico da qualificação).
+
+A consulta é uma só, projetada com ``values()`` sobre CQS → solicitação → soldador
+→ empresa e lida com ``iterator(chunk_size=...)``: as linhas saem para o CSV à
+medida que chegam do banco, com memória constante qualquer que seja o tamanho da
+tabela. Usada pela view ``exportar_cqs`` (``StreamingHttpResponse``) e pelo
+comando ``exportar_cqs``.
+"""
+
+import csv
+
+from django.utils import timezone
+
+from raqs.models import CQS, SolicitacaoCadastroSoldador as Solicitacao
+
+TAMANHO_BLOCO = 2000
+
+SITUACAO_VALIDO = "valido"
+SITUACAO_VENCIDO = "vencido"
+SITUACAO_SEM_VALIDADE = "sem_validade"
+SITUACOES = (SITUACAO_VALIDO, SITUACAO_VENCIDO, SITUACAO_SEM_VALIDADE)
+
+# (cabeçalho, campo em values(), choices para exibir o rótulo)
+COLUNAS = (
+    ("CQS", "numero", None),
+    ("Soldador", "solicitacao__soldador__nome", None),
+    ("CPF", "solicitacao__soldador__cpf", None),
+    ("Empresa", "solicitacao__empresa__nome", None),
+    ("Sinete", "solicitacao__sinete", None),
+    ("EPS", "solicitacao__eps", None),
+    ("Norma", "solicitacao__norma_projeto", Solicitacao.NORMA_PROJETO_CHOICES),
+    ("Processo", "solicitacao__processo_soldagem", Solicitacao.PROCESSO_SOLDAGEM_CHOICES),
+    ("Consumível", "solicitacao__consumivel_classificacao", None),
+    ("Posição", "solicitacao__posicao_soldagem", Solicitacao.POSICAO_SOLDAGEM_CHOICES),
+    ("Ensaio", "solicitacao__ensaio", Solicitacao.ENSAIO_CHOICES),
+    ("Resultado", "solicitacao__status", Solicitacao.STATUS_CHOICES),
+    ("Data da solicitação", "solicitacao__data", None),
+    ("F-Number", "solicitacao__f_number", None),
+    ("Faixa F-Number", "fq_consumivel", CQS.FQ_CONSUMIVEL_CHOICES),
+    ("P-Number", "pn_metal_de_base", None),
+    ("Grupo (GN)", "gn_metal_de_base", None),
+    ("Faixa metal de base", "fq_metal_de_base", CQS.FQ_METAL_DE_BASE_CHOICES),
+    ("Emissão", "data_emissao", None),
+    ("Validade", "data_validade", None),
+)
+
+
+def consultar_registro_cqs(empresa_id=None, emitido_de=None, emitido_ate=None, situacao=None):
+    """Linhas projetadas do registro de CQS, filtradas e em ordem de emissão."""
+    cqs = CQS.objects.all()
+    if empresa_id:
+        cqs = cqs.filter(solicitacao__empresa_id=empresa_id)
+    if emitido_de:
+        cqs = cqs.filter(data_emissao__gte=emitido_de)
+    if emitido_ate:
+        cqs = cqs.filter(data_emissao__lte=emitido_ate)
+
+    hoje = timezone.localdate()
+    if situacao == SITUACAO_VALIDO:
+        cqs = cqs.filter(data_validade__gte=hoje)
+    elif situacao == SITUACAO_VENCIDO:
+        cqs = cqs.filter(data_validade__lt=hoje)
+    elif situacao == SITUACAO_SEM_VALIDADE:
+        cqs = cqs.filter(data_validade__isnull=True)
+
+    return cqs.order_by("data_emissao", "id").values_list(*(campo for _, campo, _ in COLUNAS))
+
+
+class _Eco:
+    """Arquivo falso para o ``csv.writer``: devolve a linha em vez de guardá-la."""
+
+    def write(self, valor):
+        return valor
+
+
+# Texto que o Excel/LibreOffice executaria como fórmula ao abrir o CSV
+INICIO_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _celula(valor, rotulo):
+    if valor is None:
+        return ""
+    if rotulo:
+        valor = rotulo.get(valor, valor)
+    if isinstance(valor, str) and valor.startswith(INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def linhas_csv(linhas, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera o CSV (cabeçalho + uma string por linha) lendo o banco em blocos. Textos
+    que começam como fórmula saem com ``'`` na frente.
+    """
+    escritor = csv.writer(_Eco())
+    rotulos = [dict(choices) if choices else None for _, _, choices in COLUNAS]
+    yield escritor.writerow([cabecalho for cabecalho, _, _ in COLUNAS])
+    for linha in linhas.iterator(chunk_size=tamanho_bloco):
+        yield escritor.writerow([_celula(valor, rotulo) for valor, rotulo in zip(linha, rotulos)])
@@ -1,6 +1,16 @@
 from django import forms
 from django.contrib.auth.admin import UserAdmin
 
+from .cascatas import (
+    METAIS_BASE_CHAPA,
+    METAIS_BASE_TUBO,
+    campos_do_metal_base,
+    ensaios_da_norma,
+    gases_do_processo,
+    progressoes_da_posicao,
+)
+
+from .exportacao import SITUACOES
 from .models import (
     Empresa,
     Soldador,
@@ -65,65 +75,34 @@ class SolicitacaoCadastroSoldadorForm(BulmaMixin, forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        if self.data.get("norma_projeto") == "AWS_D1-1":
-            self.fields["ensaio"].choices = [("DOBRAMENTO", "Dobramento Mecânico")]
+        # Mesmas regras das cascatas aplicadas no navegador (raqs/cascatas.py)
+        norma_projeto = self.data.get("norma_projeto")
+        if norma_projeto:
+            self.fields["ensaio"].choices = ensaios_da_norma(norma_projeto)
 
         metal_base_spec = self.initial.get(
             "metal_base_spec", self.data.get("metal_base_spec")
         )
-
-        if metal_base_spec in ["A-36", "SB536", "A-309", "A-312"]:  # Para chapas
-            # Permitir apenas METAL_BASE_ESPESSURA e limitar POSICAO_SOLDAGEM
-            self.fields["metal_base_espessura"].widget.attrs.update({"required": True})
-            self.fields["metal_base_espessura"].disabled = False
-            self.fields["metal_base_diametro"].widget.attrs.update({"required": False})
-            self.fields["metal_base_diametro"].disabled = True
-            self.fields["posicao_soldagem"].choices = [
-                choice
-                for choice in self.fields["posicao_soldagem"].choices
-                if choice[0] not in ["5G", "6G"]
-            ]
-
-        elif metal_base_spec in ["A-106", "16MO3"]:  # Para tubos
-            # Permitir apenas METAL_BASE_DIAMETRO e limitar POSICAO_SOLDAGEM
-            self.fields["metal_base_diametro"].widget.attrs.update({"required": True})
-            self.fields["metal_base_diametro"].disabled = False
-            self.fields["metal_base_espessura"].widget.attrs.update({"required": False})
-            self.fields["metal_base_espessura"].disabled = True
-            self.fields["posicao_soldagem"].choices = [
-                choice
-                for choice in self.fields["posicao_soldagem"].choices
-                if choice[0] not in ["3G", "4G"]
-            ]
+        campos_metal = campos_do_metal_base(metal_base_spec)
+        if campos_metal["espessura"] != campos_metal["diametro"]:
+            # Chapa: só espessura / tubo: só diâmetro; posições limitadas
+            espessura = self.fields["metal_base_espessura"]
+            espessura.widget.attrs.update({"required": campos_metal["espessura"]})
+            espessura.disabled = not campos_metal["espessura"]
+            diametro = self.fields["metal_base_diametro"]
+            diametro.widget.attrs.update({"required": campos_metal["diametro"]})
+            diametro.disabled = not campos_metal["diametro"]
+            self.fields["posicao_soldagem"].choices = campos_metal["posicoes"]
 
         posicao_soldagem = self.data.get("posicao_soldagem")
-
-        if posicao_soldagem in ["6G"]:
-            self.fields["posicao_soldagem_progressao"].readonly = True
-            self.fields["posicao_soldagem_progressao"].choices = [
-                ("ASCENDENTE", "Ascendente")
-            ]
-        elif posicao_soldagem in ["3G", "3F", "5G"]:
-            self.fields["posicao_soldagem_progressao"].choices = [
-                ("ASCENDENTE", "Ascendente"),
-                ("DESCENDENTE", "Descendente"),
-            ]
-        else:
+        progressoes = progressoes_da_posicao(posicao_soldagem)
+        self.fields["posicao_soldagem_progressao"].choices = progressoes
+        if len(progressoes) == 1:
             self.fields["posicao_soldagem_progressao"].readonly = True
-            self.fields["posicao_soldagem_progressao"].choices = [("NA", "N/A")]
-
-        processo_soldagem = self.data.get("processo_soldagem")
 
-        if processo_soldagem in ["GTAW"]:
-            self.fields["gas_protecao"].choices = [("ARGONIO", "Argônio")]
-        elif processo_soldagem in ["GMAW"]:
-            self.fields["gas_protecao"].choices = [("ARCO2", "Ar+CO²")]
-        elif processo_soldagem in ["FCAW"]:
-            self.fields["gas_protecao"].choices = [
-                ("CO2", "CO²"),
-            ]
-        else:
-            self.fields["gas_protecao"].choices = [("NA", "N/A")]
+        self.fields["gas_protecao"].choices = gases_do_processo(
+            self.data.get("processo_soldagem")
+        )
 
     def clean(self):
         cleaned_data = super().clean()
@@ -132,12 +111,9 @@ class SolicitacaoCadastroSoldadorForm(BulmaMixin, forms.ModelForm):
         metal_base_diametro = cleaned_data.get("metal_base_diametro")
 
         # Validate based on metal_base_spec
-        if (
-            metal_base_spec in ["A-36", "SB536", "A-309", "A-312"]
-            and not metal_base_espessura
-        ):
+        if metal_base_spec in METAIS_BASE_CHAPA and not metal_base_espessura:
             self.add_error("metal_base_espessura", "Este campo é obrigatório.")
-        if metal_base_spec in ["A-106", "16MO3"] and not metal_base_diametro:
+        if metal_base_spec in METAIS_BASE_TUBO and not metal_base_diametro:
             self.add_error("metal_base_diametro", "Este campo é obrigatório.")
 
         return cleaned_data
@@ -170,6 +146,17 @@ class RaqsForm(BulmaMixin, forms.ModelForm):
         fields = ["solicitacoes"]
 
 
+class FiltroExportacaoCqsForm(forms.Form):
+    """Filtros (GET) da exportação do registro de CQS."""
+
+    empresa = forms.IntegerField(required=False, min_value=1)
+    de = forms.DateField(required=False, input_formats=["%Y-%m-%d"])
+    ate = forms.DateField(required=False, input_formats=["%Y-%m-%d"])
+    situacao = forms.ChoiceField(
+        required=False, choices=[("", "")] + [(situacao, situacao) for situacao in SITUACOES]
+    )
+
+
 class AdminEmpresaAdmin(UserAdmin):
     # Campos exibidos na lista do admin
     list_display = ("username", "email", "empresa", "is_staff", "is_active")
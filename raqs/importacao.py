@@ -0,0 +1,309 @@
+"""
+Importação em lote de soldadores e solicitações de qualificação a partir de CSV.
+
+Cada linha do CSV é uma solicitação; o soldador é identificado pelo CPF e criado
+quando ainda não existe. O arquivo é lido em streaming e processado em lotes:
+
+- validação linha a linha contra os choices do modelo e as cascatas do formulário
+  (raqs/cascatas.py), sem instanciar formulários
+- CPFs existentes buscados com uma query por lote (``cpf_normalizado__in``)
+- F-number derivado em lote pelas regras de classificação
+- ``bulk_create`` de soldadores e solicitações, uma transação por lote
+
+Linhas inválidas não interrompem a importação: vão para ``ResultadoImportacao.erros``.
+Um trecho fora de UTF-8 interrompe a leitura, mas os lotes já gravados ficam e o
+resultado informa onde parou (``interrompida_na_linha``).
+"""
+
+import csv
+from dataclasses import dataclass, field
+
+from django.db import IntegrityError, models, transaction
+
+from raqs.cascatas import (
+    campos_do_metal_base,
+    consumiveis_do_processo,
+    ensaios_da_norma,
+    gases_do_processo,
+    progressoes_da_posicao,
+)
+from raqs.cache_empresa import invalidar_cache_empresas
+from raqs.models import (
+    Soldador,
+    SolicitacaoCadastroSoldador,
+    ajustar_estatisticas,
+    cpf_valido,
+    normalizar_cpf,
+)
+from raqs.regras import obter_regras
+
+TAMANHO_LOTE = 1000
+
+COLUNAS = (
+    "nome",
+    "cpf",
+    "sinete",
+    "eps",
+    "norma_projeto",
+    "processo_soldagem",
+    "consumivel_spec",
+    "consumivel_classificacao",
+    "consumivel_diametro",
+    "metal_base_spec",
+    "metal_base_espessura",
+    "metal_base_diametro",
+    "posicao_soldagem",
+    "posicao_soldagem_progressao",
+    "gas_protecao",
+    "cobre_junta",
+    "purga",
+    "ensaio",
+)
+COLUNAS_OBRIGATORIAS = ("nome", "cpf", "sinete", "eps")
+VERDADEIRO = {"1", "s", "sim", "x", "true", "verdadeiro"}
+FALSO = {"", "0", "n", "nao", "não", "false", "falso"}
+
+
+@dataclass
+class ResultadoImportacao:
+    linhas: int = 0
+    soldadores_criados: int = 0
+    solicitacoes_criadas: int = 0
+    erros: list = field(default_factory=list)  # (linha, mensagem)
+    interrompida_na_linha: int = None  # arquivo fora de UTF-8 a partir desta linha
+
+
+def _valores(choices):
+    return {str(valor): valor for valor, _ in choices}
+
+
+class _Validador:
+    """Choices e cascatas pré-calculados uma vez por importação."""
+
+    def __init__(self):
+        Solicitacao = SolicitacaoCadastroSoldador
+        self.choices = {
+            "norma_projeto": _valores(Solicitacao.NORMA_PROJETO_CHOICES),
+            "processo_soldagem": _valores(Solicitacao.PROCESSO_SOLDAGEM_CHOICES),
+            "consumivel_diametro": _valores(Solicitacao.CONSUMIVEL_DIAMETRO_CHOICES),
+            "metal_base_spec": _valores(Solicitacao.METAL_BASE_SPECS_CHOICES),
+            "posicao_soldagem": _valores(Solicitacao.POSICAO_SOLDAGEM_CHOICES),
+        }
+        # Tamanho máximo de cada coluna de texto, lido dos modelos
+        campos = {"nome": Soldador._meta.get_field("nome"), "cpf": Soldador._meta.get_field("cpf")}
+        for coluna in COLUNAS:
+            if coluna not in campos:
+                campos[coluna] = Solicitacao._meta.get_field(coluna)
+        self.tamanhos = {
+            coluna: campo.max_length
+            for coluna, campo in campos.items()
+            if isinstance(campo, models.CharField)
+        }
+        self.espessuras = {valor for valor, _ in Solicitacao.METAL_BASE_ESPESSURA_CHOICES}
+        self.diametros = {valor for valor, _ in Solicitacao.METAL_BASE_DIAMETRO_CHOICES}
+
+        def valores(choices):
+            return {valor for valor, _ in choices}
+
+        self.ensaios = {
+            norma: valores(ensaios_da_norma(norma)) for norma in self.choices["norma_projeto"]
+        }
+        self.processos = {}
+        regras = obter_regras()
+        for processo in self.choices["processo_soldagem"]:
+            consumiveis, especificacoes = consumiveis_do_processo(processo, regras)
+            self.processos[processo] = (
+                valores(consumiveis),
+                valores(especificacoes),
+                [valor for valor, _ in gases_do_processo(processo)],
+            )
+        self.metais_base = {
+            spec: campos_do_metal_base(spec) for spec in self.choices["metal_base_spec"]
+        }
+        self.progressoes = {
+            posicao: [valor for valor, _ in progressoes_da_posicao(posicao)]
+            for posicao in self.choices["posicao_soldagem"]
+        }
+
+    def _escolha(self, dados, erros, campo, permitidos):
+        valor = dados.get(campo)
+        if valor not in permitidos:
+            erros.append(f"{campo}: valor inválido {valor!r}")
+        return valor
+
+    def validar(self, linha):
+        """``(dados, erros)`` de uma linha do CSV; ``dados`` prontos para o modelo."""
+        erros = []
+        dados = {coluna: (linha.get(coluna) or "").strip() for coluna in COLUNAS}
+
+        for coluna in COLUNAS_OBRIGATORIAS:
+            if not dados[coluna]:
+                erros.append(f"{coluna}: obrigatório")
+        for coluna, maximo in self.tamanhos.items():
+            if len(dados[coluna]) > maximo:
+                erros.append(f"{coluna}: máximo de {maximo} caracteres")
+        if dados["cpf"] and not cpf_valido(dados["cpf"]):
+            erros.append("cpf: CPF inválido")
+
+        for campo, permitidos in self.choices.items():
+            dados[campo] = permitidos.get(dados[campo], dados[campo])
+            self._escolha(dados, erros, campo, permitidos.values())
+
+        norma = dados["norma_projeto"]
+        self._escolha(dados, erros, "ensaio", self.ensaios.get(norma, ()))
+
+        consumiveis, especificacoes, gases = self.processos.get(
+            dados["processo_soldagem"], ((), (), [])
+        )
+        self._escolha(dados, erros, "consumivel_classificacao", consumiveis)
+        self._escolha(dados, erros, "consumivel_spec", especificacoes)
+        if not dados["gas_protecao"] and len(gases) == 1:
+            dados["gas_protecao"] = gases[0]
+        self._escolha(dados, erros, "gas_protecao", gases)
+
+        metal = self.metais_base.get(dados["metal_base_spec"])
+        if metal:
+            for campo, medida, tipo, permitidos in (
+                ("metal_base_espessura", "espessura", float, self.espessuras),
+                ("metal_base_diametro", "diametro", int, self.diametros),
+            ):
+                texto = dados[campo].replace(",", ".").replace('"', "")
+                dados[campo] = None
+                if not metal[medida]:
+                    continue  # campo desabilitado para este metal de base
+                try:
+                    dados[campo] = tipo(float(texto)) if texto else None
+                except ValueError:
+                    pass
+                if dados[campo] is None and metal["espessura"] != metal["diametro"]:
+                    erros.append(f"{campo}: obrigatório")
+                elif dados[campo] is not None and dados[campo] not in permitidos:
+                    erros.append(f"{campo}: valor inválido {texto!r}")
+            posicoes = {valor for valor, _ in metal["posicoes"]}
+            self._escolha(dados, erros, "posicao_soldagem", posicoes)
+
+        progressoes = self.progressoes.get(dados["posicao_soldagem"], [])
+        if not dados["posicao_soldagem_progressao"] and len(progressoes) == 1:
+            dados["posicao_soldagem_progressao"] = progressoes[0]
+        self._escolha(dados, erros, "posicao_soldagem_progressao", progressoes)
+
+        for campo in ("cobre_junta", "purga"):
+            texto = dados[campo].lower()
+            if texto not in VERDADEIRO | FALSO:
+                erros.append(f"{campo}: use sim/não")
+            dados[campo] = texto in VERDADEIRO
+
+        return dados, erros
+
+
+def _gravar_lote(lote, empresa, resultado):
+    """
+    Grava um lote de linhas válidas ``(numero, dados)`` em uma transação. Um CPF
+    cadastrado ao mesmo tempo por outra gravação derruba o lote com IntegrityError;
+    a segunda tentativa já encontra o soldador. Se falhar de novo, as linhas do
+    lote vão para os erros.
+    """
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                soldadores_criados = _inserir_lote(lote, empresa)
+        except IntegrityError:
+            continue
+        resultado.soldadores_criados += soldadores_criados
+        resultado.solicitacoes_criadas += len(lote)
+        return
+    resultado.erros.extend(
+        (numero, "cpf: cadastrado ao mesmo tempo por outra gravação; importe a linha de novo")
+        for numero, _ in lote
+    )
+
+
+def _inserir_lote(lote, empresa):
+    cpfs = {normalizar_cpf(dados["cpf"]) for _, dados in lote}
+    soldadores = dict(
+        Soldador.objects.filter(cpf_normalizado__in=cpfs).values_list("cpf_normalizado", "id")
+    )
+    novos = {}
+    for _, dados in lote:
+        cpf = normalizar_cpf(dados["cpf"])
+        if cpf not in soldadores and cpf not in novos:
+            novos[cpf] = Soldador(nome=dados["nome"], cpf=dados["cpf"], cpf_normalizado=cpf)
+    for soldador in Soldador.objects.bulk_create(novos.values()):
+        soldadores[soldador.cpf_normalizado] = soldador.id
+
+    ids_do_lote = {soldadores[normalizar_cpf(dados["cpf"])] for _, dados in lote}
+    ja_na_empresa = set(
+        SolicitacaoCadastroSoldador.objects.filter(
+            empresa=empresa, soldador_id__in=ids_do_lote
+        ).values_list("soldador_id", flat=True)
+    )
+
+    f_numbers = obter_regras().derivar_f_numbers(
+        [dados["consumivel_classificacao"] for _, dados in lote]
+    )
+    SolicitacaoCadastroSoldador.objects.bulk_create(
+        SolicitacaoCadastroSoldador(
+            empresa=empresa,
+            soldador_id=soldadores[normalizar_cpf(dados["cpf"])],
+            f_number=f_number or "",
+            **{
+                campo: valor
+                for campo, valor in dados.items()
+                if campo not in ("nome", "cpf")
+            },
+        )
+        for (_, dados), f_number in zip(lote, f_numbers)
+    )
+    # bulk_create não dispara signals: ajusta os contadores do lote de uma vez
+    ajustar_estatisticas(
+        [empresa.id],
+        solicitacoes=len(lote),
+        soldadores=len(ids_do_lote - ja_na_empresa),
+    )
+    invalidar_cache_empresas([empresa.id])
+    return len(novos)
+
+
+def importar_csv(arquivo, empresa, tamanho_lote=TAMANHO_LOTE):
+    """
+    Importa as linhas de ``arquivo`` (texto, já decodificado) para ``empresa``.
+    Cabeçalho: ``COLUNAS``; a numeração das linhas nos erros conta o cabeçalho.
+    """
+    resultado = ResultadoImportacao()
+    numero = 1
+    lote = []
+    try:
+        leitor = csv.DictReader(arquivo, delimiter=_delimitador(arquivo))
+        faltando = [coluna for coluna in COLUNAS if coluna not in (leitor.fieldnames or ())]
+        if faltando:
+            resultado.erros.append((1, f"Colunas ausentes: {', '.join(faltando)}"))
+            return resultado
+
+        validador = _Validador()
+        for numero, linha in enumerate(leitor, start=2):
+            resultado.linhas += 1
+            dados, erros = validador.validar(linha)
+            if erros:
+                resultado.erros.extend((numero, erro) for erro in erros)
+                continue
+            lote.append((numero, dados))
+            if len(lote) >= tamanho_lote:
+                _gravar_lote(lote, empresa, resultado)
+                lote = []
+    except UnicodeDecodeError:
+        # O decodificador lê em blocos: o erro aparece a partir da última linha lida
+        resultado.interrompida_na_linha = numero
+        resultado.erros.append((numero, "arquivo fora de UTF-8 a partir daqui; leitura interrompida"))
+    if lote:
+        _gravar_lote(lote, empresa, resultado)
+    return resultado
+
+
+def _delimitador(arquivo):
+    """Planilhas exportadas em pt-BR costumam usar ``;``."""
+    if not hasattr(arquivo, "seek"):
+        return ","
+    inicio = arquivo.tell()
+    cabecalho = arquivo.readline()
+    arquivo.seek(inicio)
+    return ";" if cabecalho.count(";") > cabecalho.count(",") else ","
@@ -1,10 +1,48 @@
+import time
+from collections import defaultdict
+
 from django.core.management.base import BaseCommand
-from django.db import models
-from raqs.models import CQS
+from django.db import models, transaction
+from raqs.cache_empresa import invalidar_cache_empresas
+from raqs.models import CQS, preencher_data_validade, recalcular_estatisticas
+from raqs.regras import CAMPOS_SOLICITACAO_CQS, obter_regras
+
+LOTE = 2000
+CAMPOS_TECNICOS = (
+    "fq_consumivel",
+    "fq_metal_de_base",
+    "pn_metal_de_base",
+    "gn_metal_de_base",
+    "modo_transferencia",
+)
+
+
+def recalcular_campos(linhas, regras):
+    """
+    Campos a gravar para as linhas projetadas (``id``, campos técnicos atuais e
+    ``solicitacao__<campo>``), agrupados como ``{campos: [ids]}``, só com os CQS
+    que mudam. Mesma regra do signal ``set_cqs_technical_fields``, sem tocar no banco.
+    """
+    derivados = regras.derivar_campos_cqs(
+        [
+            {campo: linha[f"solicitacao__{campo}"] for campo in CAMPOS_SOLICITACAO_CQS}
+            for linha in linhas
+        ]
+    )
+    alterados = defaultdict(list)
+    for linha, campos in zip(linhas, derivados):
+        if campos["fq_consumivel"] is None:
+            campos["fq_consumivel"] = linha["fq_consumivel"]  # F-number não mapeado: mantém
+        if any(linha[campo] != valor for campo, valor in campos.items()):
+            alterados[tuple(sorted(campos.items()))].append(linha["id"])
+    return alterados
 
 
 class Command(BaseCommand):
-    help = 'Atualiza campos técnicos dos CQS existentes que estão vazios'
+    help = (
+        'Recalcula os campos técnicos dos CQS existentes pelas regras de classificação '
+        'e preenche a data de validade dos que estão sem ela'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -12,48 +50,76 @@ class Command(BaseCommand):
             action='store_true',
             help='Mostra quantos CQS seriam atualizados sem atualizar de fato',
         )
+        parser.add_argument(
+            '--todos',
+            action='store_true',
+            help='Recalcula todos os CQS (após mudança nas regras), não só os com campos vazios',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=LOTE,
+            help=f'CQS lidos e gravados por vez (padrão: {LOTE})',
+        )
 
     def handle(self, *args, **options):
-        dry_run = options['dry_run']
-        
-        # Buscar CQS com campos vazios ou None
-        cqs_para_atualizar = CQS.objects.filter(
+        cqs = CQS.objects.exclude(solicitacao__isnull=True)  # Só CQS com solicitação
+        if not options['todos']:
             # Pelo menos um campo técnico vazio
-            models.Q(fq_consumivel__isnull=True) | 
-            models.Q(fq_consumivel='') |
-            models.Q(fq_metal_de_base__isnull=True) | 
-            models.Q(fq_metal_de_base='') |
-            models.Q(pn_metal_de_base__isnull=True) | 
-            models.Q(pn_metal_de_base='')
-        ).exclude(solicitacao__isnull=True)  # Só CQS com solicitação
-        
-        self.stdout.write(f'Encontrados {cqs_para_atualizar.count()} CQS para atualizar')
-        
-        if dry_run:
+            cqs = cqs.filter(
+                models.Q(fq_consumivel__isnull=True) |
+                models.Q(fq_consumivel='') |
+                models.Q(fq_metal_de_base__isnull=True) |
+                models.Q(fq_metal_de_base='') |
+                models.Q(pn_metal_de_base__isnull=True) |
+                models.Q(pn_metal_de_base='')
+            )
+        linhas = cqs.order_by('id').values(
+            'id',
+            *CAMPOS_TECNICOS,
+            *(f'solicitacao__{campo}' for campo in CAMPOS_SOLICITACAO_CQS),
+        )
+
+        regras = obter_regras()
+        inicio = time.monotonic()
+        lidos = atualizados = 0
+        ultimo_id = 0
+        while True:
+            bloco = list(linhas.filter(id__gt=ultimo_id)[:options['lote']])
+            if not bloco:
+                break
+            ultimo_id = bloco[-1]['id']
+            lidos += len(bloco)
+            alterados = recalcular_campos(bloco, regras)
+            if alterados and not options['dry_run']:
+                # As combinações de campos são poucas: um UPDATE ... WHERE id IN (...)
+                # por combinação custa bem menos que o CASE por linha do bulk_update
+                with transaction.atomic():
+                    for campos, ids in alterados.items():
+                        CQS.objects.filter(id__in=ids).update(**dict(campos))
+            atualizados += sum(len(ids) for ids in alterados.values())
+
+        # Validade vazia: o re-save antigo a preenchia pelo signal; aqui, um UPDATE só
+        com_solicitacao = CQS.objects.exclude(solicitacao__isnull=True)
+        if options['dry_run']:
+            validades = com_solicitacao.filter(data_validade__isnull=True).count()
+        else:
+            with transaction.atomic():
+                validades = preencher_data_validade(com_solicitacao)
+                if validades:
+                    recalcular_estatisticas()  # a validade define os CQS válidos do painel
+
+        duracao = time.monotonic() - inicio
+        self.stdout.write(f'CQS analisados: {lidos} em {duracao:.1f}s')
+        if options['dry_run']:
             self.stdout.write("=== DRY RUN - Nenhum CQS será atualizado ===")
-            for cqs in cqs_para_atualizar:
-                soldador = cqs.solicitacao.soldador.nome if cqs.solicitacao else "N/A"
-                self.stdout.write(f"- Atualizaria: {cqs.numero} ({soldador})")
+            self.stdout.write(f'CQS que seriam atualizados: {atualizados}')
+            self.stdout.write(f'CQS sem data de validade: {validades}')
             return
-        
-        # Atualizar CQS
-        atualizados = 0
-        for cqs in cqs_para_atualizar:
-            try:
-                # Re-salvar para disparar o signal
-                cqs.save()
-                
-                soldador = cqs.solicitacao.soldador.nome if cqs.solicitacao else "N/A"
-                self.stdout.write(
-                    self.style.SUCCESS(f'✅ CQS atualizado: {cqs.numero} ({soldador})')
-                )
-                atualizados += 1
-                
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'❌ Erro ao atualizar {cqs.numero}: {e}')
-                )
-        
+
+        if atualizados or validades:
+            invalidar_cache_empresas()
+        self.stdout.write(f'CQS com data de validade preenchida: {validades}')
         self.stdout.write(
             self.style.SUCCESS(f'\n🎉 Total de CQS atualizados: {atualizados}')
-        )
\ No newline at end of file
+        )
@@ -1,80 +1,66 @@
 from django.core.management.base import BaseCommand
-from raqs.models import CQS, EnsaioMecanicoDobramento, EnsaioUltrassom
-from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from raqs.cache_empresa import invalidar_cache_empresas
+from raqs.models import (
+    CQS,
+    EnsaioMecanicoDobramento,
+    EnsaioUltrassom,
+    preencher_data_validade,
+    recalcular_estatisticas,
+)
+
+
+def _aprovado(model):
+    return Exists(model.objects.filter(solicitacao=OuterRef("solicitacao_id"), aprovado=True))
 
 
 class Command(BaseCommand):
     help = 'Atualiza data de validade dos CQS existentes (6 meses após aprovação dos ensaios)'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Só mostra as contagens, sem atualizar',
+        )
+
     def handle(self, *args, **options):
         cqs_sem_validade = CQS.objects.filter(data_validade__isnull=True)
-        total_cqs = cqs_sem_validade.count()
-        
-        self.stdout.write(f"Encontrados {total_cqs} CQS sem data de validade")
-        
-        if total_cqs == 0:
-            self.stdout.write("Nenhum CQS para atualizar.")
-            return
-        
-        atualizados = 0
-        nao_encontrados = 0
-        
-        for cqs in cqs_sem_validade:
-            if not cqs.solicitacao:
-                self.stdout.write(f"⚠️ CQS {cqs.numero} sem solicitação vinculada")
-                continue
-                
-            solicitacao = cqs.solicitacao
-            data_aprovacao = None
-            tipo_ensaio = ""
-            
-            # Buscar data de aprovação do ensaio mecânico
-            try:
-                ensaio_mecanico = EnsaioMecanicoDobramento.objects.get(
-                    solicitacao=solicitacao, aprovado=True
-                )
-                data_aprovacao = ensaio_mecanico.data_teste
-                tipo_ensaio = "Mecânico"
-            except EnsaioMecanicoDobramento.DoesNotExist:
-                pass
-            
-            # Se não encontrou mecânico aprovado, buscar ultrassom
-            if not data_aprovacao:
-                try:
-                    ensaio_ultrassom = EnsaioUltrassom.objects.get(
-                        solicitacao=solicitacao, aprovado=True
-                    )
-                    data_aprovacao = ensaio_ultrassom.data_teste
-                    tipo_ensaio = "Ultrassom"
-                except EnsaioUltrassom.DoesNotExist:
-                    pass
-            
-            # Se encontrou data de aprovação, calcular validade
-            if data_aprovacao:
-                data_validade = data_aprovacao + relativedelta(months=6)
-                cqs.data_validade = data_validade
-                cqs.save()
-                
-                self.stdout.write(
-                    f"✅ {cqs.numero}: {data_aprovacao} ({tipo_ensaio}) → Válido até {data_validade}"
-                )
-                atualizados += 1
+        mecanico, ultrassom = _aprovado(EnsaioMecanicoDobramento), _aprovado(EnsaioUltrassom)
+
+        with transaction.atomic():
+            # Uma query para as contagens por origem (mecânico tem precedência)
+            contagem = cqs_sem_validade.aggregate(
+                total=Count('id'),
+                mecanico=Count('id', filter=Q(mecanico)),
+                ultrassom=Count('id', filter=Q(~mecanico, ultrassom)),
+            )
+            self.stdout.write(f"Encontrados {contagem['total']} CQS sem data de validade")
+            if contagem['total'] == 0:
+                self.stdout.write("Nenhum CQS para atualizar.")
+                return
+            if options['dry_run']:
+                self.stdout.write("=== DRY RUN - Nenhum CQS será atualizado ===")
             else:
-                self.stdout.write(
-                    f"❌ {cqs.numero}: Nenhum ensaio aprovado encontrado"
-                )
-                nao_encontrados += 1
-        
+                # Um único UPDATE: validade = primeiro ensaio aprovado + 6 meses
+                preencher_data_validade(cqs_sem_validade)
+                # A validade define os CQS válidos do painel
+                recalcular_estatisticas()
+                invalidar_cache_empresas()
+
+        nao_encontrados = contagem['total'] - contagem['mecanico'] - contagem['ultrassom']
         self.stdout.write(
             self.style.SUCCESS(f'\n🎉 Resumo:')
         )
-        self.stdout.write(f"✅ {atualizados} CQS atualizados com data de validade")
+        self.stdout.write(f"✅ {contagem['mecanico']} CQS pela data do ensaio mecânico")
+        self.stdout.write(f"✅ {contagem['ultrassom']} CQS pela data do ultrassom")
         self.stdout.write(f"❌ {nao_encontrados} CQS sem ensaios aprovados")
-        
+
         if nao_encontrados > 0:
             self.stdout.write(
                 self.style.WARNING(
                     f"\nAtenção: {nao_encontrados} CQS não puderam ser atualizados "
                     "por não terem ensaios aprovados vinculados."
                 )
-            )
\ No newline at end of file
+            )
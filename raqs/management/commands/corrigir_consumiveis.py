@@ -0,0 +1,100 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.db.models import Case, Count, Value, When
+from raqs.cache_empresa import invalidar_cache_empresas
+from raqs.models import SolicitacaoCadastroSoldador
+from raqs.regras import CONSUMIVEIS_LEGADOS, obter_regras
+
+
+def _caso(mapa):
+    """``CASE consumivel_classificacao WHEN chave THEN valor ... END``"""
+    return Case(
+        *(When(consumivel_classificacao=chave, then=Value(valor)) for chave, valor in mapa.items()),
+        output_field=models.CharField(),
+    )
+
+
+def _contagem(solicitacoes):
+    return dict(
+        solicitacoes.order_by()
+        .values('consumivel_classificacao')
+        .annotate(total=Count('id'))
+        .values_list('consumivel_classificacao', 'total')
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Corrige grafias antigas de consumíveis e os F-numbers das solicitações '
+        '(regras de classificação), com um UPDATE por coluna'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostra as correções e contagens sem alterar nada',
+        )
+        parser.add_argument(
+            '--yes',
+            action='store_true',
+            help='Aplica sem pedir confirmação (deploy, cron)',
+        )
+
+    def handle(self, *args, **options):
+        regras = obter_regras()
+        solicitacoes = SolicitacaoCadastroSoldador.objects.all()
+
+        # F-number esperado para cada grafia, antiga ou atual: os dois UPDATEs
+        # podem ser calculados antes de qualquer um rodar
+        f_numbers = {
+            classificacao: f_number
+            for classificacao in (*regras.f_number_por_consumivel, *CONSUMIVEIS_LEGADOS)
+            if (f_number := regras.f_number(classificacao))
+        }
+        legados = solicitacoes.filter(consumivel_classificacao__in=CONSUMIVEIS_LEGADOS)
+        f_divergentes = solicitacoes.filter(consumivel_classificacao__in=f_numbers).exclude(
+            f_number=_caso(f_numbers)
+        )
+
+        self.stdout.write("=== CORREÇÕES PLANEJADAS ===")
+        por_consumivel = _contagem(legados)
+        for antigo, novo in CONSUMIVEIS_LEGADOS.items():
+            self.stdout.write(
+                f"{antigo} → {novo} (F#{f_numbers.get(novo, 'N/A')}) - "
+                f"{por_consumivel.get(antigo, 0)} registros"
+            )
+        por_f_number = _contagem(f_divergentes)
+        for classificacao, total in sorted(por_f_number.items()):
+            self.stdout.write(f"F-number de {classificacao} → {f_numbers[classificacao]} - {total} registros")
+        nao_mapeados = (
+            solicitacoes.exclude(consumivel_classificacao__in=f_numbers)
+            .values_list('consumivel_classificacao', flat=True)
+            .distinct()
+        )
+        for classificacao in nao_mapeados:
+            self.stdout.write(self.style.WARNING(f"❌ {classificacao} (não mapeado)"))
+
+        if not (por_consumivel or por_f_number):
+            self.stdout.write("Nada a corrigir.")
+            return
+        if options['dry_run']:
+            self.stdout.write("=== DRY RUN - Nenhuma solicitação será alterada ===")
+            return
+        if not options['yes']:
+            if not sys.stdin.isatty():
+                raise CommandError('Sem terminal para confirmar: use --yes')
+            if input("\nConfirma as correções? (s/N): ").lower() != 's':
+                self.stdout.write("Operação cancelada")
+                return
+
+        with transaction.atomic():
+            consumiveis = legados.update(consumivel_classificacao=_caso(CONSUMIVEIS_LEGADOS))
+            f_numbers_corrigidos = f_divergentes.update(f_number=_caso(f_numbers))
+            invalidar_cache_empresas()
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {consumiveis} consumíveis corrigidos'))
+        self.stdout.write(self.style.SUCCESS(f'✅ {f_numbers_corrigidos} F-numbers corrigidos'))
+        self.stdout.write(self.style.SUCCESS('\n🎉 Correções aplicadas'))
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from raqs.models import Operador
+from raqs.vencimentos import DIAS_PADRAO, agrupar_por_empresa, cqs_a_vencer
+
+
+class Command(BaseCommand):
+    help = 'Envia um e-mail por empresa com os CQS que vencem nos próximos dias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=DIAS_PADRAO,
+            help=f'Janela de vencimento em dias (padrão: {DIAS_PADRAO})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostra os e-mails que seriam enviados sem enviar',
+        )
+
+    def handle(self, *args, **options):
+        dias = options['dias']
+        # Uma consulta por faixa de validade + uma para os destinatários
+        empresas = agrupar_por_empresa(cqs_a_vencer(dias))
+        destinatarios = {}
+        for empresa_id, email in (
+            Operador.objects.filter(
+                empresa_id__in=[empresa_id for empresa_id, _, _ in empresas], is_active=True
+            )
+            .exclude(email='')
+            .values_list('empresa_id', 'email')
+        ):
+            destinatarios.setdefault(empresa_id, []).append(email)
+
+        mensagens = []
+        for empresa_id, nome, itens in empresas:
+            if empresa_id not in destinatarios:
+                self.stdout.write(
+                    self.style.WARNING(f'⚠️ {nome}: {len(itens)} CQS a vencer, sem e-mail cadastrado')
+                )
+                continue
+            mensagens.append(
+                EmailMessage(
+                    subject=f'{len(itens)} CQS vencendo nos próximos {dias} dias - {nome}',
+                    body=render_to_string(
+                        'emails/aviso_vencimentos.txt',
+                        {'empresa': nome, 'itens': itens, 'dias': dias},
+                    ),
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=destinatarios[empresa_id],
+                )
+            )
+            self.stdout.write(f'{nome}: {len(itens)} CQS → {", ".join(destinatarios[empresa_id])}')
+
+        if options['dry_run']:
+            self.stdout.write("=== DRY RUN - Nenhum e-mail enviado ===")
+            return
+        # Uma conexão com o servidor para todos os e-mails
+        enviados = get_connection().send_messages(mensagens) if mensagens else 0
+        self.stdout.write(self.style.SUCCESS(f'\n🎉 E-mails enviados: {enviados or 0}'))
@@ -0,0 +1,53 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from raqs.exportacao import SITUACOES, TAMANHO_BLOCO, consultar_registro_cqs, linhas_csv
+from raqs.models import Empresa
+
+
+def _data(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f'Data inválida: {valor} (use AAAA-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = 'Exporta o registro de CQS (com o histórico da qualificação) em CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, help='ID da empresa')
+        parser.add_argument('--de', type=_data, help='Emitidos a partir de (AAAA-MM-DD)')
+        parser.add_argument('--ate', type=_data, help='Emitidos até (AAAA-MM-DD)')
+        parser.add_argument('--situacao', choices=SITUACOES, help='Situação da validade')
+        parser.add_argument(
+            '--bloco',
+            type=int,
+            default=TAMANHO_BLOCO,
+            help=f'Linhas lidas do banco por vez (padrão: {TAMANHO_BLOCO})',
+        )
+        parser.add_argument('--saida', help='Arquivo de saída (padrão: stdout)')
+
+    def handle(self, *args, **options):
+        if options['empresa'] and not Empresa.objects.filter(id=options['empresa']).exists():
+            raise CommandError(f"Empresa {options['empresa']} não encontrada")
+
+        linhas = consultar_registro_cqs(
+            empresa_id=options['empresa'],
+            emitido_de=options['de'],
+            emitido_ate=options['ate'],
+            situacao=options['situacao'],
+        )
+        conteudo = linhas_csv(linhas, tamanho_bloco=options['bloco'])
+        if not options['saida']:
+            for linha in conteudo:
+                self.stdout.write(linha, ending='')
+            return
+
+        total = -1  # cabeçalho
+        with open(options['saida'], 'w', encoding='utf-8', newline='') as saida:
+            for linha in conteudo:
+                saida.write(linha)
+                total += 1
+        self.stderr.write(self.style.SUCCESS(f"\n🎉 {total} CQS exportados para {options['saida']}"))
@@ -1,6 +1,116 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from dateutil.relativedelta import relativedelta
 from django.core.management.base import BaseCommand
-from raqs.models import SolicitacaoCadastroSoldador, CQS, EnsaioMecanicoDobramento, EnsaioUltrassom, TesteVisual
+from django.db import connections, transaction
+from django.db.models import Count, Exists, OuterRef
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from raqs.cache_empresa import invalidar_cache_empresas
+from raqs.models import (
+    CQS,
+    Empresa,
+    EnsaioMecanicoDobramento,
+    EnsaioUltrassom,
+    SolicitacaoCadastroSoldador,
+    alocar_numeros_cqs,
+    data_aprovacao_ensaio,
+    formatar_numero_cqs,
+    recalcular_estatisticas,
+)
+from raqs.regras import CAMPOS_SOLICITACAO_CQS, obter_regras
+
+LOTE = 500
+
+
+def solicitacoes_sem_cqs(force=False):
+    """Aprovadas (status materializado + teste visual) sem CQS; com ``force``, todas."""
+    solicitacoes = SolicitacaoCadastroSoldador.objects.filter(
+        status__in=SolicitacaoCadastroSoldador.STATUS_APROVADOS,
+        testevisual__resultado="Aprovado",
+    )
+    if not force:
+        solicitacoes = solicitacoes.annotate(
+            tem_cqs=Exists(CQS.objects.filter(solicitacao=OuterRef("pk")))
+        ).filter(tem_cqs=False)
+    return solicitacoes
+
+
+def emitir_da_empresa(empresa_id, lote=LOTE, force=False, progresso=None):
+    """
+    Emite os CQS pendentes de uma empresa em blocos de ``lote``: uma leitura por
+    bloco (paginada pelo id), números reservados de uma vez no contador da empresa,
+    campos técnicos e validade calculados em memória e um ``bulk_create``.
+    Os signals do CQS não disparam; o resultado é o mesmo que eles produziriam,
+    e as estatísticas da empresa são recalculadas no final.
+    """
+    empresa = Empresa.objects.only("id", "nome").get(id=empresa_id)
+    ano = timezone.now().year
+    regras = obter_regras()
+    pendentes = (
+        solicitacoes_sem_cqs(force)
+        .filter(empresa_id=empresa_id)
+        .annotate(
+            data_aprovacao=Coalesce(
+                data_aprovacao_ensaio(EnsaioMecanicoDobramento),
+                data_aprovacao_ensaio(EnsaioUltrassom),
+            )
+        )
+        .order_by("id")
+        .values("id", "data_aprovacao", *CAMPOS_SOLICITACAO_CQS)
+    )
+
+    emitidos = 0
+    ultimo_id = 0
+    while True:
+        bloco = list(pendentes.filter(id__gt=ultimo_id)[:lote])
+        if not bloco:
+            break
+        ultimo_id = bloco[-1]["id"]
+        tecnicos = regras.derivar_campos_cqs(bloco)
+        with transaction.atomic():
+            if force:
+                CQS.objects.filter(solicitacao_id__in=[linha["id"] for linha in bloco]).delete()
+            numeros = alocar_numeros_cqs(empresa, ano, len(bloco))
+            CQS.objects.bulk_create(
+                CQS(
+                    solicitacao_id=linha["id"],
+                    numero=formatar_numero_cqs(empresa, ano, sequencial),
+                    data_validade=(
+                        linha["data_aprovacao"] + relativedelta(months=6)
+                        if linha["data_aprovacao"]
+                        else None
+                    ),
+                    **{**campos, "fq_consumivel": campos["fq_consumivel"] or ""},
+                )
+                for linha, campos, sequencial in zip(bloco, tecnicos, numeros)
+            )
+        emitidos += len(bloco)
+        if progresso:
+            progresso(len(bloco))
+    if emitidos:
+        recalcular_estatisticas([empresa_id])
+        invalidar_cache_empresas([empresa_id])
+    return emitidos
+
+
+class _Progresso:
+    def __init__(self, total, stdout):
+        self.total = total
+        self.feitos = 0
+        self.inicio = time.monotonic()
+        self.stdout = stdout
+
+    def __call__(self, quantidade):
+        self.feitos += quantidade
+        decorrido = time.monotonic() - self.inicio
+        taxa = self.feitos / decorrido if decorrido else 0
+        eta = (self.total - self.feitos) / taxa if taxa else 0
+        self.stdout.write(
+            f'{self.feitos}/{self.total} CQS ({taxa:.0f}/s, restante ~{eta:.0f}s)'
+        )
 
 
 class Command(BaseCommand):
@@ -17,93 +127,65 @@ class Command(BaseCommand):
             action='store_true',
             help='Força a criação mesmo se já existir CQS',
         )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=LOTE,
+            help=f'CQS inseridos por transação (padrão: {LOTE})',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processos em paralelo; o trabalho é dividido por empresa (padrão: 1)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         force = options['force']
-        
-        # Buscar solicitações aprovadas sem CQS
-        solicitacoes_aprovadas = []
-        
-        for solicitacao in SolicitacaoCadastroSoldador.objects.all():
-            # Verificar se já tem CQS (pular se tiver, exceto se --force)
-            if hasattr(solicitacao, 'cqs') and not force:
-                continue
-                
-            # Verificar se está aprovada
-            aprovada = self.verificar_aprovacao(solicitacao)
-            
-            if aprovada:
-                solicitacoes_aprovadas.append(solicitacao)
-        
+
+        por_empresa = dict(
+            solicitacoes_sem_cqs(force)
+            .order_by()
+            .values('empresa_id')
+            .annotate(total=Count('id'))
+            .values_list('empresa_id', 'total')
+        )
+        total = sum(por_empresa.values())
         self.stdout.write(
-            f'Encontradas {len(solicitacoes_aprovadas)} solicitações aprovadas '
-            f'{"sem CQS" if not force else "(incluindo com CQS existente)"}'
+            f'Encontradas {total} solicitações aprovadas '
+            f'{"sem CQS" if not force else "(incluindo com CQS existente)"} '
+            f'em {len(por_empresa)} empresa(s)'
         )
-        
+
         if dry_run:
             self.stdout.write("=== DRY RUN - Nenhum CQS será criado ===")
-            for solicitacao in solicitacoes_aprovadas:
-                self.stdout.write(f"- Criaria CQS para: {solicitacao.soldador.nome} ({solicitacao.empresa.nome})")
+            pendentes = solicitacoes_sem_cqs(force).values_list('soldador__nome', 'empresa__nome')
+            for soldador, empresa in pendentes.iterator():
+                self.stdout.write(f"- Criaria CQS para: {soldador} ({empresa})")
             return
-        
-        # Criar CQS para solicitações aprovadas
-        criados = 0
-        for solicitacao in solicitacoes_aprovadas:
-            try:
-                if force and hasattr(solicitacao, 'cqs'):
-                    # Deletar CQS existente se --force
-                    solicitacao.cqs.delete()
-                
-                cqs = CQS.objects.create(
-                    solicitacao=solicitacao,
-                    data_emissao=timezone.now().date(),
-                    # Campos técnicos serão preenchidos pelo signal
-                )
-                
-                self.stdout.write(
-                    self.style.SUCCESS(f'✅ CQS criado: {cqs.numero} para {solicitacao.soldador.nome}')
-                )
-                criados += 1
-                
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'❌ Erro ao criar CQS para {solicitacao.soldador.nome}: {e}')
-                )
-        
+
+        progresso = _Progresso(total, self.stdout)
+        empresas = sorted(por_empresa, key=por_empresa.get, reverse=True)
+        if options['workers'] > 1 and len(empresas) > 1:
+            # Cada processo abre a própria conexão
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options['workers'], initializer=django.setup
+            ) as pool:
+                futuros = {
+                    pool.submit(emitir_da_empresa, empresa_id, options['lote'], force): empresa_id
+                    for empresa_id in empresas
+                }
+                for futuro in as_completed(futuros):
+                    progresso(futuro.result())
+        else:
+            for empresa_id in empresas:
+                emitir_da_empresa(empresa_id, options['lote'], force, progresso)
+
+        duracao = time.monotonic() - progresso.inicio
         self.stdout.write(
-            self.style.SUCCESS(f'\n🎉 Total de CQS criados: {criados}')
+            self.style.SUCCESS(
+                f'\n🎉 Total de CQS criados: {progresso.feitos} em {duracao:.1f}s'
+            )
         )
-    
-    def verificar_aprovacao(self, solicitacao):
-        """
-        Verifica se uma solicitação está aprovada baseado nos critérios:
-        - Teste Visual aprovado E
-        - Ensaio Mecânico (Dobramento OU Ultrassom) aprovado
-        """
-        try:
-            # Verificar Teste Visual
-            teste_visual = TesteVisual.objects.get(solicitacao=solicitacao)
-            if teste_visual.resultado != "Aprovado":
-                return False
-            
-            # Verificar Ensaios Mecânicos
-            if solicitacao.ensaio == "DOBRAMENTO":
-                ensaio = EnsaioMecanicoDobramento.objects.filter(
-                    solicitacao=solicitacao, 
-                    aprovado=True, 
-                    realizado=True
-                ).exists()
-            elif solicitacao.ensaio == "ULTRASSOM":
-                ensaio = EnsaioUltrassom.objects.filter(
-                    solicitacao=solicitacao, 
-                    aprovado=True, 
-                    realizado=True
-                ).exists()
-            else:
-                return False
-            
-            return ensaio
-            
-        except TesteVisual.DoesNotExist:
-            return False
\ No newline at end of file
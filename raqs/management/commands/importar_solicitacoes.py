@@ -0,0 +1,60 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from raqs.importacao import TAMANHO_LOTE, importar_csv
+from raqs.models import Empresa
+
+
+class Command(BaseCommand):
+    help = 'Importa soldadores e solicitações de qualificação de um arquivo CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='CSV com uma solicitação por linha')
+        parser.add_argument(
+            '--empresa',
+            type=int,
+            required=True,
+            help='ID da empresa dona das solicitações',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANHO_LOTE,
+            help=f'Linhas gravadas por transação (padrão: {TAMANHO_LOTE})',
+        )
+        parser.add_argument(
+            '--relatorio',
+            help='Grava os erros por linha neste CSV',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            empresa = Empresa.objects.get(id=options['empresa'])
+        except Empresa.DoesNotExist:
+            raise CommandError(f"Empresa {options['empresa']} não encontrada")
+
+        inicio = time.monotonic()
+        with open(options['arquivo'], encoding='utf-8-sig', newline='') as arquivo:
+            resultado = importar_csv(arquivo, empresa, tamanho_lote=options['lote'])
+        duracao = time.monotonic() - inicio
+
+        self.stdout.write(f'Linhas lidas: {resultado.linhas} em {duracao:.1f}s')
+        self.stdout.write(f'Soldadores criados: {resultado.soldadores_criados}')
+        self.stdout.write(f'Solicitações criadas: {resultado.solicitacoes_criadas}')
+
+        if resultado.erros:
+            self.stdout.write(self.style.WARNING(f'Erros: {len(resultado.erros)}'))
+            if options['relatorio']:
+                with open(options['relatorio'], 'w', encoding='utf-8', newline='') as relatorio:
+                    escritor = csv.writer(relatorio)
+                    escritor.writerow(['linha', 'erro'])
+                    escritor.writerows(resultado.erros)
+                self.stdout.write(f"Relatório de erros: {options['relatorio']}")
+            else:
+                for linha, erro in resultado.erros[:50]:
+                    self.stdout.write(f'- linha {linha}: {erro}')
+                if len(resultado.erros) > 50:
+                    self.stdout.write('... use --relatorio para a lista completa')
+
+        self.stdout.write(self.style.SUCCESS('\n🎉 Importação concluída'))
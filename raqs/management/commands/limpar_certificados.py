@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from raqs.certificados import limpar_paginas_orfas
+
+
+class Command(BaseCommand):
+    help = (
+        'Apaga as páginas de certificados em cache que nenhum CQS usa mais '
+        '(dados, logo ou layout mudaram); o worker já roda semanalmente'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Só conta as páginas órfãs, sem apagar',
+        )
+
+    def handle(self, *args, **options):
+        orfas = limpar_paginas_orfas(timezone.now(), apagar=not options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write("=== DRY RUN - Nenhuma página será apagada ===")
+            self.stdout.write(f'Páginas órfãs: {len(orfas)}')
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\n🎉 Páginas apagadas: {len(orfas)}')
+        )
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from raqs.tarefas import LOTE, agendar_periodicas, processar_pendentes
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker da fila de tarefas em segundo plano (emissão de CQS etc.); '
+        'agenda também as tarefas periódicas, como a reconciliação das estatísticas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Processa as tarefas vencidas e sai (útil em cron)',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera quando a fila está vazia (padrão: 2)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=LOTE,
+            help=f'Tarefas reservadas por vez (padrão: {LOTE})',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Worker de tarefas iniciado')
+        try:
+            while True:
+                agendar_periodicas()
+                executadas, falhas = processar_pendentes(options['lote'])
+                if executadas or falhas:
+                    self.stdout.write(f'Tarefas executadas: {executadas}, com falha: {falhas}')
+                if options['uma_vez']:
+                    if not (executadas or falhas):
+                        break
+                    continue
+                if not (executadas or falhas):
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('\n🎉 Worker encerrado'))
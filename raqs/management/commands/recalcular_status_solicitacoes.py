@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from raqs.models import SolicitacaoCadastroSoldador, atualizar_status_solicitacoes
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula em lote o status materializado de todas as solicitações. Sob demanda: '
+        'a migração 0026 preenche a coluna e os signals a mantêm'
+    )
+
+    def handle(self, *args, **options):
+        # Um único UPDATE com CASE/WHEN sobre o teste visual e os ensaios
+        total = atualizar_status_solicitacoes()
+        self.stdout.write(f'Status recalculado para {total} solicitações')
+
+        rotulos = dict(SolicitacaoCadastroSoldador.STATUS_CHOICES)
+        contagens = (
+            SolicitacaoCadastroSoldador.objects.values('status')
+            .annotate(total=Count('id'))
+            .order_by('status')
+        )
+        for linha in contagens:
+            self.stdout.write(f"- {rotulos.get(linha['status'], linha['status'])}: {linha['total']}")
+
+        self.stdout.write(self.style.SUCCESS('\n🎉 Backfill de status concluído'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from raqs.models import Empresa, recalcular_estatisticas
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula as estatísticas das empresas a partir das tabelas e corrige desvios '
+        '(o worker já roda diariamente: CQS vencidos deixam de contar como válidos)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa',
+            type=int,
+            action='append',
+            help='Id da empresa (pode repetir); padrão: todas',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Só mostra os desvios, sem corrigir',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            desvios = recalcular_estatisticas(options['empresa'])
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        nomes = dict(Empresa.objects.filter(id__in=desvios).values_list('id', 'nome'))
+        for empresa_id, campos in desvios.items():
+            detalhes = ', '.join(
+                f'{campo}: {gravado} → {calculado}'
+                for campo, (gravado, calculado) in campos.items()
+            )
+            self.stdout.write(f'{nomes.get(empresa_id, empresa_id)}: {detalhes}')
+
+        if options['dry_run']:
+            self.stdout.write("=== DRY RUN - Nenhuma estatística foi corrigida ===")
+            self.stdout.write(f'Empresas com desvio: {len(desvios)}')
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\n🎉 Empresas corrigidas: {len(desvios)}')
+        )
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:49
+
+from django.db import migrations, models
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
+
+
+def preencher_status(apps, schema_editor):
+    """
+    Preenche o status das solicitações existentes uma única vez, com a mesma
+    máquina de estados de ``expressao_status_solicitacao`` nos modelos
+    históricos; daí em diante os signals mantêm a coluna.
+    """
+    Solicitacao = apps.get_model("raqs", "SolicitacaoCadastroSoldador")
+    TesteVisual = apps.get_model("raqs", "TesteVisual")
+    Dobramento = apps.get_model("raqs", "EnsaioMecanicoDobramento")
+    Ultrassom = apps.get_model("raqs", "EnsaioUltrassom")
+
+    def existe(model, **filtros):
+        return Exists(model.objects.filter(solicitacao=OuterRef("pk"), **filtros))
+
+    sem_visual = ~existe(TesteVisual)
+    visual_aprovado = existe(TesteVisual, resultado="Aprovado")
+    dobramento = Q(visual_aprovado, ensaio="DOBRAMENTO")
+    ultrassom = Q(visual_aprovado, ensaio="ULTRASSOM")
+    Solicitacao.objects.update(
+        status=Case(
+            When(existe(TesteVisual, resultado="Reprovado"), then=Value("REPROVADO_TV")),
+            When(
+                dobramento & Q(existe(Dobramento, aprovado=True, realizado=True)),
+                then=Value("APROVADO_DM"),
+            ),
+            When(
+                dobramento & Q(existe(Dobramento, aprovado=False, realizado=True)),
+                then=Value("REPROVADO_DM"),
+            ),
+            When(
+                ultrassom & Q(existe(Ultrassom, aprovado=True, realizado=True)),
+                then=Value("APROVADO_UT"),
+            ),
+            When(
+                ultrassom & Q(existe(Ultrassom, aprovado=False, realizado=True)),
+                then=Value("REPROVADO_UT"),
+            ),
+            When(Q(sem_visual, existe(Dobramento, aprovado=True)), then=Value("APROVADO_DM")),
+            When(Q(sem_visual, existe(Ultrassom, aprovado=True)), then=Value("APROVADO_UT")),
+            default=Value("AGUARDANDO"),
+            output_field=models.CharField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("raqs", "0025_aumentar_tamanho_campos_raqs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="solicitacaocadastrosoldador",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("AGUARDANDO", "Aguardando Teste"),
+                    ("REPROVADO_TV", "Reprovado Teste Visual"),
+                    ("APROVADO_DM", "Aprovado - DM"),
+                    ("REPROVADO_DM", "Reprovado - DM"),
+                    ("APROVADO_UT", "Aprovado - UT"),
+                    ("REPROVADO_UT", "Reprovado - UT"),
+                ],
+                db_index=True,
+                default="AGUARDANDO",
+                editable=False,
+                max_length=15,
+            ),
+        ),
+        migrations.RunPython(preencher_status, migrations.RunPython.noop),
+    ]
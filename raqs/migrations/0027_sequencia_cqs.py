@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raqs', '0026_solicitacao_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cqs',
+            name='numero',
+            field=models.CharField(blank=True, max_length=30, unique=True),
+        ),
+        migrations.CreateModel(
+            name='SequenciaCQS',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveIntegerField()),
+                ('ultimo_numero', models.PositiveIntegerField(default=0)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='raqs.empresa')),
+            ],
+            options={
+                'verbose_name': 'Sequência de CQS',
+                'verbose_name_plural': 'Sequências de CQS',
+                'constraints': [models.UniqueConstraint(fields=('empresa', 'ano'), name='sequencia_cqs_empresa_ano')],
+            },
+        ),
+    ]
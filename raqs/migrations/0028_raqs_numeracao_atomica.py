@@ -0,0 +1,71 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:54
+
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def unificar_raqs_abertos(apps, schema_editor):
+    """
+    A corrida antiga em criar_raqs pode ter deixado mais de um RAQS aberto por
+    empresa, o que impediria a constraint. Mantém o mais novo, move para ele as
+    solicitações dos outros e apaga os duplicados, que ficam vazios.
+    """
+    Raqs = apps.get_model('raqs', 'Raqs')
+    Vinculo = Raqs.solicitacoes.through
+    empresas = (
+        Raqs.objects.filter(aberto=True)
+        .values('empresa_id')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .values_list('empresa_id', flat=True)
+    )
+    for empresa_id in list(empresas):
+        ids = list(
+            Raqs.objects.filter(empresa_id=empresa_id, aberto=True)
+            .order_by('-id')
+            .values_list('id', flat=True)
+        )
+        mantido, duplicados = ids[0], ids[1:]
+        ja_vinculadas = Vinculo.objects.filter(raqs_id=mantido).values(
+            'solicitacaocadastrosoldador_id'
+        )
+        Vinculo.objects.bulk_create(
+            [
+                Vinculo(raqs_id=mantido, solicitacaocadastrosoldador_id=solicitacao_id)
+                for solicitacao_id in set(
+                    Vinculo.objects.filter(raqs_id__in=duplicados)
+                    .exclude(solicitacaocadastrosoldador_id__in=ja_vinculadas)
+                    .values_list('solicitacaocadastrosoldador_id', flat=True)
+                )
+            ]
+        )
+        Vinculo.objects.filter(raqs_id__in=duplicados).delete()
+        Raqs.objects.filter(id__in=duplicados).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raqs', '0027_sequencia_cqs'),
+    ]
+
+    operations = [
+        # Campo comum não pode virar GeneratedField com AlterField; os valores
+        # existentes já eram "MAST-FORM-<pk>" e são recalculados pelo banco.
+        migrations.RemoveField(
+            model_name='raqs',
+            name='n_master',
+        ),
+        migrations.AddField(
+            model_name='raqs',
+            name='n_master',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Concat(models.Value('MAST-FORM-'), django.db.models.functions.comparison.Cast('id', models.CharField())), output_field=models.CharField(max_length=20)),
+        ),
+        migrations.RunPython(unificar_raqs_abertos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='raqs',
+            constraint=models.UniqueConstraint(condition=models.Q(('aberto', True)), fields=('empresa',), name='raqs_um_aberto_por_empresa'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:01
+
+import raqs.models
+from django.db import migrations, models
+from django.db.models import Case, When
+
+LOTE = 1000
+
+
+def _normalizar(cpf):
+    return "".join(c for c in cpf or "" if c.isdigit()) or None
+
+
+def normalizar_e_deduplicar(apps, schema_editor):
+    """
+    Preenche ``cpf_normalizado`` e junta soldadores com o mesmo CPF (formatado ou
+    não): fica o de menor id, as solicitações dos duplicados passam para ele e os
+    duplicados são apagados. Tudo em lotes, sem uma query por soldador.
+    """
+    Soldador = apps.get_model("raqs", "Soldador")
+    Solicitacao = apps.get_model("raqs", "SolicitacaoCadastroSoldador")
+
+    manter = {}  # cpf normalizado → id do soldador mantido
+    duplicados = {}  # id duplicado → id mantido
+    atualizar = []
+    for soldador_id, cpf in Soldador.objects.order_by("id").values_list("id", "cpf").iterator():
+        normalizado = _normalizar(cpf)
+        if normalizado is None:
+            continue
+        if normalizado in manter:
+            duplicados[soldador_id] = manter[normalizado]
+        else:
+            manter[normalizado] = soldador_id
+            atualizar.append(Soldador(id=soldador_id, cpf_normalizado=normalizado))
+    Soldador.objects.bulk_update(atualizar, ["cpf_normalizado"], batch_size=LOTE)
+
+    ids = list(duplicados)
+    for inicio in range(0, len(ids), LOTE):
+        lote = ids[inicio : inicio + LOTE]
+        Solicitacao.objects.filter(soldador_id__in=lote).update(
+            soldador_id=Case(
+                *(When(soldador_id=dup, then=duplicados[dup]) for dup in lote),
+            )
+        )
+        Soldador.objects.filter(id__in=lote).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raqs', '0028_raqs_numeracao_atomica'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='soldador',
+            name='cpf_normalizado',
+            field=models.CharField(editable=False, max_length=11, null=True),
+        ),
+        migrations.RunPython(normalizar_e_deduplicar, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='soldador',
+            name='cpf_normalizado',
+            field=models.CharField(editable=False, max_length=11, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='soldador',
+            name='cpf',
+            field=models.CharField(max_length=14, validators=[raqs.models.validar_cpf]),
+        ),
+    ]
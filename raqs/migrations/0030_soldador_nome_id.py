@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raqs', '0029_soldador_cpf_normalizado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='soldador',
+            index=models.Index(fields=['nome', 'id'], name='soldador_nome_id'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# tabela: colunas pesquisadas pela busca global (raqs/busca.py)
+COLUNAS_BUSCA = {
+    "raqs_soldador": ("nome",),
+    "raqs_solicitacaocadastrosoldador": ("sinete", "eps"),
+    "raqs_raqs": ("n_master",),
+    "raqs_cqs": ("numero",),
+}
+
+
+def criar_indices_trigram(apps, schema_editor):
+    """
+    PostgreSQL: índices GIN trigram sobre ``UPPER(coluna::text)``, a forma gerada
+    pelo ``icontains``. No SQLite a busca usa a tabela FTS5 mantida por
+    ``raqs.busca.sincronizar_indice_sqlite`` (recriada a cada ``migrate``).
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for tabela, colunas in COLUNAS_BUSCA.items():
+        for coluna in colunas:
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {tabela}_{coluna}_trgm ON {tabela} "
+                f"USING gin (UPPER({coluna}::text) gin_trgm_ops)"
+            )
+
+
+def remover_indices_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for tabela, colunas in COLUNAS_BUSCA.items():
+        for coluna in colunas:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {tabela}_{coluna}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raqs', '0030_soldador_nome_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices_trigram, remover_indices_trigram),
+    ]
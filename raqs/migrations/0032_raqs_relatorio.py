@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raqs', '0031_busca_global'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='raqs',
+            name='relatorio',
+            field=models.FileField(blank=True, editable=False, upload_to='relatorios'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raqs', '0033_tarefa'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cqs',
+            index=models.Index(fields=['data_validade'], name='cqs_data_validade'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, F, Q
+
+# Valores de SolicitacaoCadastroSoldador.STATUS_APROVADOS/STATUS_REPROVADOS nesta migração
+STATUS_APROVADOS = ('APROVADO_DM', 'APROVADO_UT')
+STATUS_REPROVADOS = ('REPROVADO_TV', 'REPROVADO_DM', 'REPROVADO_UT')
+
+
+def preencher_estatisticas(apps, schema_editor):
+    """
+    Mesma contagem do reconciliar_estatisticas, nos modelos históricos: os painéis
+    já abrem com os números das empresas existentes.
+    """
+    Empresa = apps.get_model('raqs', 'Empresa')
+    EstatisticaEmpresa = apps.get_model('raqs', 'EstatisticaEmpresa')
+    Solicitacao = apps.get_model('raqs', 'SolicitacaoCadastroSoldador')
+    Raqs = apps.get_model('raqs', 'Raqs')
+    CQS = apps.get_model('raqs', 'CQS')
+
+    contagens = {}
+    consultas = (
+        Solicitacao.objects.values('empresa_id').annotate(
+            soldadores=Count('soldador_id', distinct=True),
+            solicitacoes=Count('id'),
+            aprovados=Count('id', filter=Q(status__in=STATUS_APROVADOS)),
+            reprovados=Count('id', filter=Q(status__in=STATUS_REPROVADOS)),
+        ),
+        Raqs.objects.values('empresa_id').annotate(
+            raqs_abertos=Count('id', filter=Q(aberto=True)),
+            raqs_fechados=Count('id', filter=Q(aberto=False)),
+        ),
+        CQS.objects.filter(data_validade__gte=django.utils.timezone.localdate())
+        .values(empresa_id=F('solicitacao__empresa_id'))
+        .annotate(cqs_validos=Count('id')),
+    )
+    for consulta in consultas:
+        for linha in consulta.order_by():
+            contagens.setdefault(linha.pop('empresa_id'), {}).update(linha)
+
+    EstatisticaEmpresa.objects.bulk_create(
+        [
+            EstatisticaEmpresa(empresa_id=empresa_id, **contagens.get(empresa_id, {}))
+            for empresa_id in Empresa.objects.values_list('id', flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raqs', '0034_cqs_data_validade'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstatisticaEmpresa',
+            fields=[
+                ('empresa', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='estatisticas', serialize=False, to='raqs.empresa')),
+                ('soldadores', models.IntegerField(default=0)),
+                ('solicitacoes', models.IntegerField(default=0)),
+                ('raqs_abertos', models.IntegerField(default=0)),
+                ('raqs_fechados', models.IntegerField(default=0)),
+                ('aprovados', models.IntegerField(default=0)),
+                ('reprovados', models.IntegerField(default=0)),
+                ('cqs_validos', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Estatística da empresa',
+                'verbose_name_plural': 'Estatísticas das empresas',
+            },
+        ),
+        migrations.RunPython(preencher_estatisticas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+def criar_indice_nome_prefixo(apps, schema_editor):
+    """
+    PostgreSQL: o ``nome__istartswith`` da lista de soldadores vira
+    ``UPPER(nome::text) LIKE 'X%'``; só um índice btree sobre a mesma expressão,
+    com ``text_pattern_ops``, atende o LIKE por prefixo em qualquer collation.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS soldador_nome_prefixo ON raqs_soldador "
+        "(UPPER(nome::text) text_pattern_ops)"
+    )
+
+
+def remover_indice_nome_prefixo(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS soldador_nome_prefixo")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raqs', '0035_estatisticaempresa'),
+    ]
+
+    operations = [
+        # varchar_pattern_ops: o índice único padrão não atende o LIKE do startswith
+        migrations.AddIndex(
+            model_name='soldador',
+            index=models.Index(fields=['cpf_normalizado'], name='soldador_cpf_prefixo', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(criar_indice_nome_prefixo, remover_indice_nome_prefixo),
+    ]
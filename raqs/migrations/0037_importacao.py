@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raqs', '0036_indices_prefixo_soldador'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Importacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arquivo', models.FileField(blank=True, upload_to='importacoes')),
+                ('status', models.CharField(choices=[('pendente', 'Na fila'), ('processando', 'Importando'), ('concluida', 'Concluída'), ('falhou', 'Falhou')], default='pendente', max_length=11)),
+                ('linhas', models.PositiveIntegerField(default=0)),
+                ('soldadores_criados', models.PositiveIntegerField(default=0)),
+                ('solicitacoes_criadas', models.PositiveIntegerField(default=0)),
+                ('erros', models.JSONField(blank=True, default=list)),
+                ('interrompida_na_linha', models.PositiveIntegerField(blank=True, null=True)),
+                ('erro', models.TextField(blank=True)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('concluida_em', models.DateTimeField(blank=True, null=True)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='importacoes', to='raqs.empresa')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Importação',
+                'verbose_name_plural': 'Importações',
+            },
+        ),
+    ]
@@ -1,25 +1,76 @@
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import User, AbstractUser
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models.signals import pre_save, post_save
+from django.db import IntegrityError, NotSupportedError, connection, models, transaction
+from django.db.models import Case, Exists, F, Func, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Concat
+from django.db.models.signals import post_migrate, pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
 
+from raqs.cache_empresa import invalidar_cache_empresas
+from raqs.regras import CAMPOS_SOLICITACAO_CQS, obter_regras
+
+
+def normalizar_cpf(cpf):
+    """Só os dígitos do CPF ("123.456.789-09" → "12345678909"); ``None`` se vazio."""
+    return "".join(c for c in cpf or "" if c.isdigit()) or None
+
+
+def cpf_valido(cpf):
+    digitos = normalizar_cpf(cpf) or ""
+    if len(digitos) != 11 or digitos == digitos[0] * 11:
+        return False
+    for tamanho in (9, 10):
+        soma = sum(int(d) * peso for d, peso in zip(digitos, range(tamanho + 1, 1, -1)))
+        if (soma * 10) % 11 % 10 != int(digitos[tamanho]):
+            return False
+    return True
+
+
+def validar_cpf(cpf):
+    if not cpf_valido(cpf):
+        raise ValidationError("CPF inválido.")
+
 
 class Soldador(models.Model):
     nome = models.CharField(max_length=100)
-    cpf = models.CharField(max_length=14)
+    cpf = models.CharField(max_length=14, validators=[validar_cpf])
+    # Somente dígitos, com índice único: é por ele que o CPF é buscado
+    cpf_normalizado = models.CharField(
+        max_length=11, unique=True, null=True, editable=False
+    )
 
     def clean(self):
         super().clean()
-        if Soldador.objects.filter(cpf=self.cpf).exclude(pk=self.pk).exists():
+        self.cpf_normalizado = normalizar_cpf(self.cpf)
+        if (
+            self.cpf_normalizado
+            and Soldador.objects.filter(cpf_normalizado=self.cpf_normalizado)
+            .exclude(pk=self.pk)
+            .exists()
+        ):
             raise ValidationError({"cpf": "CPF já cadastrado."})
 
+    def save(self, *args, **kwargs):
+        self.cpf_normalizado = normalizar_cpf(self.cpf)
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Soldador"
         verbose_name_plural = "Soldadores"
+        # Paginação por cursor da lista de soldadores e filtros por prefixo. O filtro
+        # por nome (istartswith = UPPER(nome) LIKE ...) usa o índice de expressão
+        # "soldador_nome_prefixo", criado só no PostgreSQL pela migração 0036.
+        indexes = [
+            models.Index(fields=["nome", "id"], name="soldador_nome_id"),
+            models.Index(
+                fields=["cpf_normalizado"],
+                name="soldador_cpf_prefixo",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nome}"
@@ -184,6 +235,31 @@ class SolicitacaoCadastroSoldador(models.Model):
     ensaio = models.CharField(max_length=10, choices=ENSAIO_CHOICES)
     f_number = models.CharField(max_length=3, blank=True)
 
+    # Status materializado - mantido pelos signals do teste visual e dos ensaios
+    STATUS_AGUARDANDO = "AGUARDANDO"
+    STATUS_REPROVADO_TV = "REPROVADO_TV"
+    STATUS_APROVADO_DM = "APROVADO_DM"
+    STATUS_REPROVADO_DM = "REPROVADO_DM"
+    STATUS_APROVADO_UT = "APROVADO_UT"
+    STATUS_REPROVADO_UT = "REPROVADO_UT"
+    STATUS_CHOICES = (
+        (STATUS_AGUARDANDO, "Aguardando Teste"),
+        (STATUS_REPROVADO_TV, "Reprovado Teste Visual"),
+        (STATUS_APROVADO_DM, "Aprovado - DM"),
+        (STATUS_REPROVADO_DM, "Reprovado - DM"),
+        (STATUS_APROVADO_UT, "Aprovado - UT"),
+        (STATUS_REPROVADO_UT, "Reprovado - UT"),
+    )
+    STATUS_APROVADOS = (STATUS_APROVADO_DM, STATUS_APROVADO_UT)
+    STATUS_REPROVADOS = (STATUS_REPROVADO_TV, STATUS_REPROVADO_DM, STATUS_REPROVADO_UT)
+    status = models.CharField(
+        max_length=15,
+        choices=STATUS_CHOICES,
+        default=STATUS_AGUARDANDO,
+        db_index=True,
+        editable=False,
+    )
+
     class Meta:
         verbose_name = "Solicitação de Cadastro de Soldadores"
         verbose_name_plural = "Solicitações de Cadastro de Soldadores"
@@ -272,7 +348,12 @@ class TesteVisual(models.Model):
 
 
 class Raqs(models.Model):
-    n_master = models.CharField(max_length=20, editable=False)
+    # Calculado pelo banco a partir do pk no próprio INSERT (antes era um segundo UPDATE)
+    n_master = models.GeneratedField(
+        expression=Concat(Value("MAST-FORM-"), Cast("id", models.CharField())),
+        output_field=models.CharField(max_length=20),
+        db_persist=True,
+    )
     n_sequencia = models.CharField(max_length=15, editable=False)
     empresa = models.ForeignKey(Empresa, on_delete=models.PROTECT)
     solicitacoes = models.ManyToManyField(
@@ -281,38 +362,103 @@ class Raqs(models.Model):
     data = models.DateField(auto_now=True)
     aberto = models.BooleanField(default=True)
     cp_number = models.CharField(max_length=15, editable=False, blank=True)
+    # Relatório consolidado gerado uma vez no fechamento (raqs/relatorios.py)
+    relatorio = models.FileField(upload_to="relatorios", blank=True, editable=False)
 
     def save(self, *args, **kwargs):
         if not self.pk:
-            from django.db.models import F
-
-            # Atualizar contador da empresa
-            self.empresa.n_raqs = F("n_raqs") + 1
-            self.empresa.save()
-            self.empresa.refresh_from_db()
-            
-            # Definir n_sequencia
-            self.n_sequencia = str(self.empresa.n_raqs)
-            
-            # Primeiro save para obter o pk
-            super().save(*args, **kwargs)
-            
-            # Definir n_master e fazer segundo save apenas com o campo n_master
+            # Dois statements: UPDATE ... RETURNING no contador da empresa e o INSERT
+            with transaction.atomic():
+                n_raqs = alocar_n_raqs([self.empresa_id])[self.empresa_id]
+                self.n_sequencia = str(n_raqs)
+                super().save(*args, **kwargs)
+            if Raqs.empresa.is_cached(self):
+                self.empresa.n_raqs = n_raqs
             self.n_master = f"MAST-FORM-{self.pk}"
-            super().save(update_fields=["n_master"])
         else:
             super().save(*args, **kwargs)
 
+    @classmethod
+    def criar_em_lote(cls, empresas, aberto=True):
+        """
+        Cria um RAQS para cada empresa com dois statements no total, qualquer que
+        seja a quantidade: um UPDATE ... RETURNING nos contadores e um INSERT em lote.
+        """
+        empresa_ids = [empresa.pk for empresa in empresas]
+        with transaction.atomic():
+            n_raqs = alocar_n_raqs(empresa_ids)
+            novos = cls.objects.bulk_create(
+                [
+                    cls(empresa=empresa, aberto=aberto, n_sequencia=str(n_raqs[empresa.pk]))
+                    for empresa in empresas
+                ]
+            )
+            campo = "raqs_abertos" if aberto else "raqs_fechados"
+            ajustar_estatisticas(empresa_ids, **{campo: 1})
+            invalidar_cache_empresas(empresa_ids)
+        for raqs in novos:
+            raqs.empresa.n_raqs = n_raqs[raqs.empresa_id]
+            raqs.n_master = f"MAST-FORM-{raqs.pk}"
+        return novos
+
     class Meta:
         verbose_name = "RAQS"
         verbose_name_plural = "RAQS"
+        constraints = [
+            # Regra "um RAQS aberto por empresa" garantida pelo banco
+            models.UniqueConstraint(
+                fields=["empresa"],
+                condition=Q(aberto=True),
+                name="raqs_um_aberto_por_empresa",
+            )
+        ]
+
+    def fechar(self):
+        """
+        Fecha o RAQS com um UPDATE condicional (só se ainda estiver aberto) e
+        move a contagem de aberto para fechado. Retorna se o RAQS foi fechado agora.
+
+        Os CQS ainda na fila do worker são emitidos aqui mesmo: o relatório gravado
+        no fechamento precisa dos números.
+        """
+        self.aberto = False
+        self.data = timezone.localdate()
+        with transaction.atomic():
+            fechou = Raqs.objects.filter(pk=self.pk, aberto=True).update(
+                aberto=False, data=self.data
+            )
+            if fechou:
+                ajustar_estatisticas([self.empresa_id], raqs_abertos=-1, raqs_fechados=1)
+                invalidar_cache_empresas([self.empresa_id])
+            emitir_cqs_aprovados(list(self.solicitacoes.values_list("id", flat=True)))
+        return bool(fechou)
 
     def __str__(self):
         return f"RAQS - {self.empresa.nome}"
 
 
+def alocar_n_raqs(empresa_ids):
+    """
+    Incrementa o contador de RAQS das empresas em um único ``UPDATE ... RETURNING``
+    e devolve ``{empresa_id: n_raqs}``. Cada empresa pode aparecer uma vez.
+    """
+    if len(set(empresa_ids)) != len(empresa_ids):
+        raise ValueError("Cada empresa só pode receber um RAQS por lote.")
+    if not empresa_ids:
+        return {}
+    tabela = connection.ops.quote_name(Empresa._meta.db_table)
+    placeholders = ", ".join(["%s"] * len(empresa_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {tabela} SET n_raqs = n_raqs + 1 "
+            f"WHERE id IN ({placeholders}) RETURNING id, n_raqs",
+            empresa_ids,
+        )
+        return dict(cursor.fetchall())
+
+
 class CQS(models.Model):
-    numero = models.CharField(max_length=20, unique=True, blank=True)
+    numero = models.CharField(max_length=30, unique=True, blank=True)
     solicitacao = models.OneToOneField(
         SolicitacaoCadastroSoldador,
         on_delete=models.CASCADE,
@@ -356,18 +502,15 @@ class CQS(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.numero and self.solicitacao:
-            # Gerar número CQS baseado na empresa e sequência
-            empresa = self.solicitacao.empresa
-            ano = self.data_emissao.year if self.data_emissao else timezone.now().year
-            
-            # Contar CQS existentes da empresa no ano
-            count = CQS.objects.filter(
-                solicitacao__empresa=empresa,
-                data_emissao__year=ano
-            ).count() + 1
-            
-            self.numero = f"CQS-{empresa.nome[:3].upper()}-{ano}-{count:03d}"
-        
+            # Número alocado na mesma transação do INSERT: sem buracos na sequência
+            with transaction.atomic():
+                empresa = self.solicitacao.empresa
+                ano = self.data_emissao.year if self.data_emissao else timezone.now().year
+                (sequencial,) = alocar_numeros_cqs(empresa, ano)
+                self.numero = formatar_numero_cqs(empresa, ano, sequencial)
+                super().save(*args, **kwargs)
+            return
+
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -376,29 +519,313 @@ class CQS(models.Model):
     class Meta:
         verbose_name = "CQS - Certificado de Qualificação de Soldador"
         verbose_name_plural = "CQS - Certificados de Qualificação de Soldadores"
+        indexes = [
+            # Consultas de vencimento (raqs/vencimentos.py) por faixa de datas
+            models.Index(fields=["data_validade"], name="cqs_data_validade"),
+        ]
+
+
+class SequenciaCQS(models.Model):
+    """
+    Contador da numeração de CQS por empresa e ano.
+    A linha é travada pelo próprio UPDATE de incremento, então alocações
+    concorrentes são serializadas e nunca recebem o mesmo número.
+    """
+
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE)
+    ano = models.PositiveIntegerField()
+    ultimo_numero = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Sequência de CQS"
+        verbose_name_plural = "Sequências de CQS"
+        constraints = [
+            models.UniqueConstraint(fields=["empresa", "ano"], name="sequencia_cqs_empresa_ano")
+        ]
+
+    def __str__(self):
+        return f"{self.empresa.nome} - {self.ano}: {self.ultimo_numero}"
+
+
+def alocar_numeros_cqs(empresa, ano, quantidade=1):
+    """
+    Reserva ``quantidade`` números sequenciais de CQS para a empresa no ano e
+    devolve o ``range`` alocado. Custo constante: um UPDATE com incremento (que
+    trava a linha do contador até o fim da transação) e uma leitura.
+    """
+    contador = SequenciaCQS.objects.filter(empresa=empresa, ano=ano)
+    with transaction.atomic():
+        if not contador.update(ultimo_numero=F("ultimo_numero") + quantidade):
+            # Primeira alocação do ano: começa após os CQS já emitidos
+            existentes = CQS.objects.filter(
+                solicitacao__empresa=empresa, data_emissao__year=ano
+            ).count()
+            try:
+                with transaction.atomic():
+                    SequenciaCQS.objects.create(
+                        empresa=empresa, ano=ano, ultimo_numero=existentes + quantidade
+                    )
+            except IntegrityError:
+                # Outra transação criou o contador ao mesmo tempo
+                contador.update(ultimo_numero=F("ultimo_numero") + quantidade)
+        ultimo = contador.values_list("ultimo_numero", flat=True).get()
+    return range(ultimo - quantidade + 1, ultimo + 1)
+
+
+def formatar_numero_cqs(empresa, ano, sequencial):
+    # O id da empresa evita colisão entre empresas com as mesmas três primeiras letras
+    return f"CQS-{empresa.nome[:3].upper()}{empresa.pk}-{ano}-{sequencial:03d}"
+
+
+class Tarefa(models.Model):
+    """
+    Fila de tarefas em segundo plano gravada no próprio banco (raqs/tarefas.py),
+    consumida pelo comando ``processar_tarefas``. Efeitos colaterais como a
+    emissão de CQS saem do caminho da requisição.
+    """
+
+    STATUS_PENDENTE = "pendente"
+    STATUS_EXECUTANDO = "executando"
+    STATUS_CONCLUIDA = "concluida"
+    STATUS_FALHOU = "falhou"
+    STATUS_CHOICES = (
+        (STATUS_PENDENTE, "Pendente"),
+        (STATUS_EXECUTANDO, "Executando"),
+        (STATUS_CONCLUIDA, "Concluída"),
+        (STATUS_FALHOU, "Falhou"),
+    )
+
+    nome = models.CharField(max_length=50)
+    argumentos = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDENTE)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    max_tentativas = models.PositiveSmallIntegerField(default=5)
+    executar_em = models.DateTimeField(default=timezone.now)
+    iniciada_em = models.DateTimeField(null=True, blank=True)
+    concluida_em = models.DateTimeField(null=True, blank=True)
+    erro = models.TextField(blank=True)
+    criada_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Tarefa"
+        verbose_name_plural = "Tarefas"
+        indexes = [
+            models.Index(fields=["status", "executar_em"], name="tarefa_status_executar_em")
+        ]
+
+    def __str__(self):
+        return f"{self.nome} #{self.pk} ({self.get_status_display()})"
+
+
+def enfileirar(nome, **argumentos):
+    """
+    Agenda a tarefa ``nome`` para depois do commit da transação atual (na hora,
+    fora de transação). Se a transação for desfeita, nada é enfileirado.
+    """
+    transaction.on_commit(lambda: Tarefa.objects.create(nome=nome, argumentos=argumentos))
+
+
+class Importacao(models.Model):
+    """
+    Upload de CSV de soldadores e solicitações. O worker importa o arquivo
+    (tarefa ``importar_solicitacoes``) fora da requisição e grava aqui o resultado
+    que a tela mostra.
+    """
+
+    STATUS_PENDENTE = "pendente"
+    STATUS_PROCESSANDO = "processando"
+    STATUS_CONCLUIDA = "concluida"
+    STATUS_FALHOU = "falhou"
+    STATUS_CHOICES = (
+        (STATUS_PENDENTE, "Na fila"),
+        (STATUS_PROCESSANDO, "Importando"),
+        (STATUS_CONCLUIDA, "Concluída"),
+        (STATUS_FALHOU, "Falhou"),
+    )
+
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name="importacoes")
+    usuario = models.ForeignKey(Operador, on_delete=models.SET_NULL, null=True, blank=True)
+    arquivo = models.FileField(upload_to="importacoes", blank=True)
+    status = models.CharField(max_length=11, choices=STATUS_CHOICES, default=STATUS_PENDENTE)
+    linhas = models.PositiveIntegerField(default=0)
+    soldadores_criados = models.PositiveIntegerField(default=0)
+    solicitacoes_criadas = models.PositiveIntegerField(default=0)
+    erros = models.JSONField(default=list, blank=True)  # [linha, mensagem]
+    interrompida_na_linha = models.PositiveIntegerField(null=True, blank=True)
+    erro = models.TextField(blank=True)
+    criada_em = models.DateTimeField(auto_now_add=True)
+    concluida_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Importação"
+        verbose_name_plural = "Importações"
+
+    def __str__(self):
+        return f"Importação #{self.pk} - {self.empresa} ({self.get_status_display()})"
+
+    @property
+    def em_andamento(self):
+        return self.status in (self.STATUS_PENDENTE, self.STATUS_PROCESSANDO)
+
+
+class EstatisticaEmpresa(models.Model):
+    """
+    Contadores do painel de cada empresa. As gravações ajustam a linha na mesma
+    transação (``ajustar_estatisticas``); a tarefa diária ``reconciliar_estatisticas``
+    (raqs/tarefas.py) recalcula a partir das tabelas e corrige desvios, inclusive CQS
+    que venceram desde o último ajuste.
+    """
+
+    empresa = models.OneToOneField(
+        Empresa, on_delete=models.CASCADE, primary_key=True, related_name="estatisticas"
+    )
+    soldadores = models.IntegerField(default=0)
+    solicitacoes = models.IntegerField(default=0)
+    raqs_abertos = models.IntegerField(default=0)
+    raqs_fechados = models.IntegerField(default=0)
+    aprovados = models.IntegerField(default=0)
+    reprovados = models.IntegerField(default=0)
+    cqs_validos = models.IntegerField(default=0)
+
+    CAMPOS = (
+        "soldadores",
+        "solicitacoes",
+        "raqs_abertos",
+        "raqs_fechados",
+        "aprovados",
+        "reprovados",
+        "cqs_validos",
+    )
+
+    class Meta:
+        verbose_name = "Estatística da empresa"
+        verbose_name_plural = "Estatísticas das empresas"
+
+    def __str__(self):
+        return f"Estatísticas - {self.empresa_id}"
+
+
+def contar_estatisticas(empresa_ids=None):
+    """
+    Contadores calculados das tabelas em três queries agrupadas por empresa:
+    ``{empresa_id: {campo: valor}}``. Empresas sem nada ficam de fora.
+    A migração 0035 repete estas queries nos modelos históricos.
+    """
+    S = SolicitacaoCadastroSoldador
+    solicitacoes = S.objects.all()
+    raqs = Raqs.objects.all()
+    cqs = CQS.objects.filter(data_validade__gte=timezone.localdate())
+    if empresa_ids is not None:
+        solicitacoes = solicitacoes.filter(empresa_id__in=empresa_ids)
+        raqs = raqs.filter(empresa_id__in=empresa_ids)
+        cqs = cqs.filter(solicitacao__empresa_id__in=empresa_ids)
+
+    contagens = {}
+    consultas = (
+        solicitacoes.values("empresa_id").annotate(
+            soldadores=models.Count("soldador_id", distinct=True),
+            solicitacoes=models.Count("id"),
+            aprovados=models.Count("id", filter=Q(status__in=S.STATUS_APROVADOS)),
+            reprovados=models.Count("id", filter=Q(status__in=S.STATUS_REPROVADOS)),
+        ),
+        raqs.values("empresa_id").annotate(
+            raqs_abertos=models.Count("id", filter=Q(aberto=True)),
+            raqs_fechados=models.Count("id", filter=Q(aberto=False)),
+        ),
+        cqs.values(empresa_id=F("solicitacao__empresa_id")).annotate(
+            cqs_validos=models.Count("id")
+        ),
+    )
+    for consulta in consultas:
+        for linha in consulta.order_by():
+            contagens.setdefault(linha.pop("empresa_id"), {}).update(linha)
+    return contagens
+
+
+def recalcular_estatisticas(empresa_ids=None):
+    """
+    Recalcula e grava as estatísticas (todas as empresas sem ``empresa_ids``).
+    As linhas ficam travadas durante a contagem, então ajustes concorrentes
+    esperam e entram por cima do valor recalculado.
+
+    Retorna os desvios corrigidos: ``{empresa_id: {campo: (gravado, calculado)}}``.
+    """
+    if empresa_ids is None:
+        empresa_ids = list(Empresa.objects.values_list("id", flat=True))
+    with transaction.atomic():
+        EstatisticaEmpresa.objects.bulk_create(
+            [EstatisticaEmpresa(empresa_id=empresa_id) for empresa_id in empresa_ids],
+            ignore_conflicts=True,
+        )
+        linhas = list(
+            EstatisticaEmpresa.objects.select_for_update().filter(empresa_id__in=empresa_ids)
+        )
+        contagens = contar_estatisticas(empresa_ids)
+        desvios = {}
+        alteradas = []
+        for linha in linhas:
+            calculado = contagens.get(linha.empresa_id, {})
+            diferencas = {
+                campo: (getattr(linha, campo), calculado.get(campo, 0))
+                for campo in EstatisticaEmpresa.CAMPOS
+                if getattr(linha, campo) != calculado.get(campo, 0)
+            }
+            if diferencas:
+                desvios[linha.empresa_id] = diferencas
+                for campo, (_, valor) in diferencas.items():
+                    setattr(linha, campo, valor)
+                alteradas.append(linha)
+        if alteradas:
+            EstatisticaEmpresa.objects.bulk_update(alteradas, EstatisticaEmpresa.CAMPOS)
+    return desvios
+
+
+def ajustar_estatisticas(empresa_ids, **deltas):
+    """
+    Soma ``deltas`` aos contadores das empresas com um UPDATE (``campo = campo + n``).
+    Chamada depois da gravação, na mesma transação; empresas ainda sem linha são
+    recalculadas, o que já inclui a gravação.
+    """
+    deltas = {campo: delta for campo, delta in deltas.items() if delta}
+    empresa_ids = set(empresa_ids)
+    if not deltas or not empresa_ids:
+        return
+    atualizadas = EstatisticaEmpresa.objects.filter(empresa_id__in=empresa_ids).update(
+        **{campo: F(campo) + delta for campo, delta in deltas.items()}
+    )
+    if atualizadas < len(empresa_ids):
+        existentes = EstatisticaEmpresa.objects.filter(
+            empresa_id__in=empresa_ids
+        ).values_list("empresa_id", flat=True)
+        recalcular_estatisticas(list(empresa_ids - set(existentes)))
+
+
+def obter_estatisticas(empresa_id):
+    """Linha de estatísticas da empresa, criada (recalculada) no primeiro acesso."""
+    estatisticas = EstatisticaEmpresa.objects.filter(empresa_id=empresa_id).first()
+    if estatisticas is None:
+        recalcular_estatisticas([empresa_id])
+        estatisticas = EstatisticaEmpresa.objects.get(empresa_id=empresa_id)
+    return estatisticas
+
+
+@receiver(post_save, sender=Empresa)
+def criar_estatisticas_empresa(sender, instance, created, **kwargs):
+    # Empresa nova começa com todos os contadores zerados
+    if created:
+        EstatisticaEmpresa.objects.get_or_create(empresa=instance)
+
+
+def _cqs_valido(cqs):
+    return bool(cqs.data_validade) and cqs.data_validade >= timezone.localdate()
 
 
 @receiver(pre_save, sender=SolicitacaoCadastroSoldador)
 def set_f_number(sender, instance, **kwargs):
-    # Mapeamento de consumível para f_number (baseado no CSV regras_classificacao.csv)
-    f_number_mapping = {
-        "E-6010": "3",
-        "E-7018": "4", 
-        "ER-70S3": "6",
-        "ER-70S6": "6",
-        "E-71T1": "6",
-        "ER-309L": "6",
-        "ER-308L": "6",
-        "ER-NiCrFe3": "43",
-        "E-NiCrFe3": "43",
-        "E-309L": "5",
-        "ER-NiCrMo3": "43",
-    }
-
-    # Define o f_number com base no consumível escolhido
-    classificacao = instance.consumivel_classificacao
-    if classificacao in f_number_mapping:
-        instance.f_number = f_number_mapping[classificacao]
+    # Define o f_number com base no consumível escolhido (regras_classificacao.csv)
+    f_number = obter_regras().f_number(instance.consumivel_classificacao)
+    if f_number:
+        instance.f_number = f_number
 
 
 @receiver(pre_save, sender=CQS)
@@ -411,51 +838,17 @@ def set_cqs_technical_fields(sender, instance, **kwargs):
         return
     
     solicitacao = instance.solicitacao
+
+    # 1. fq_consumivel, faixa/PN#/GN# do metal de base e modo de transferência (regras)
+    (campos,) = obter_regras().derivar_campos_cqs(
+        [{campo: getattr(solicitacao, campo) for campo in CAMPOS_SOLICITACAO_CQS}]
+    )
+    if campos["fq_consumivel"] is None:
+        del campos["fq_consumivel"]  # F-number não mapeado: mantém o valor atual
+    for campo, valor in campos.items():
+        setattr(instance, campo, valor)
     
-    # 1. Mapeamento de f_number para fq_consumivel
-    f_number_to_fq = {
-        "3": "1-3",
-        "4": "1-4", 
-        "6": "6",
-        "43": "34-41-46",
-        "5": "1-5",
-    }
-    
-    if hasattr(solicitacao, 'f_number') and solicitacao.f_number in f_number_to_fq:
-        instance.fq_consumivel = f_number_to_fq[solicitacao.f_number]
-    
-    # 2. Lógica baseada na norma do projeto
-    if hasattr(solicitacao, 'norma_projeto') and solicitacao.norma_projeto:
-        norma = solicitacao.norma_projeto
-        
-        if norma == "AWS_D1-1":
-            # AWS D1.1: GN# = 1, Faixa = "TODOS"
-            instance.gn_metal_de_base = "1"
-            instance.pn_metal_de_base = None  # Limpar PN# se existir
-            instance.fq_metal_de_base = "todos"
-        else:
-            # Qualquer outra norma (ASME): PN# baseado no material, Faixa = "1 a 15 f, 34, 41 a 49"
-            instance.gn_metal_de_base = None  # Limpar GN# se existir
-            instance.fq_metal_de_base = "1-15f-34-41-49"
-            
-            # Mapear metal_base_spec para PN# (baseado no CSV2)
-            pn_mapping = {
-                "A-36": "1",
-                "A240 TP 310": "8", 
-                "B-536": "46",
-                "A-106": "1",
-                "16MO3": "3",
-            }
-            
-            metal_spec = getattr(solicitacao, 'metal_base_spec', '')
-            instance.pn_metal_de_base = pn_mapping.get(metal_spec, "1")  # Default 1
-    else:
-        # Sem norma definida - usar padrão AWS  
-        instance.gn_metal_de_base = "1"
-        instance.pn_metal_de_base = None
-        instance.fq_metal_de_base = "todos"
-    
-    # 3. Calcular data de validade (6 meses após aprovação dos ensaios)
+    # 2. Calcular data de validade (6 meses após aprovação dos ensaios)
     if not instance.data_validade:
         data_aprovacao = None
         
@@ -481,29 +874,315 @@ def set_cqs_technical_fields(sender, instance, **kwargs):
         # Se encontrou data de aprovação, calcular validade (6 meses)
         if data_aprovacao:
             instance.data_validade = data_aprovacao + relativedelta(months=6)
-    
-    # 4. Auto-preencher modo_transferencia baseado no processo
-    if hasattr(solicitacao, 'processo'):
-        if solicitacao.processo in ["GMAW", "FCAW"]:
-            instance.modo_transferencia = "CURTO_CIRCUITO"  # padrão mais comum para MIG/MAG
-        else:
-            instance.modo_transferencia = "N/A"
-    else:
-        instance.modo_transferencia = "N/A"
 
 
 @receiver(post_save, sender=EnsaioMecanicoDobramento)
 @receiver(post_save, sender=EnsaioUltrassom)
 def criar_cqs_quando_aprovado(sender, instance, created, **kwargs):
     """
-    Cria automaticamente o CQS quando um ensaio é aprovado
+    Agenda a emissão do CQS quando um ensaio é aprovado. A emissão (numeração,
+    campos técnicos e validade) roda no worker; a tarefa ignora solicitações que
+    já têm CQS.
+    """
+    if instance.aprovado and instance.solicitacao_id:
+        enfileirar("emitir_cqs", solicitacao_ids=[instance.solicitacao_id])
+
+
+class SomarMeses(Func):
+    """
+    ``data + N meses`` no banco, com a mesma regra do ``relativedelta``: o dia é
+    limitado ao último dia do mês (31/08 + 6 meses = 28/02).
+    """
+
+    output_field = models.DateField()
+
+    def __init__(self, expressao, meses, **extra):
+        self.meses = int(meses)
+        super().__init__(expressao, **extra)
+
+    def as_sql(self, compiler, connection, **extra):
+        raise NotSupportedError(f"SomarMeses não implementado para {connection.vendor}")
+
+    def as_postgresql(self, compiler, connection, **extra):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f"CAST(({sql}) + INTERVAL '{self.meses} months' AS date)", params
+
+    def as_sqlite(self, compiler, connection, **extra):
+        sql, params = compiler.compile(self.source_expressions[0])
+        mesmo_dia = (
+            f"DATE({sql}, 'start of month', '+{self.meses} months', "
+            f"'+' || (CAST(STRFTIME('%%d', {sql}) AS INTEGER) - 1) || ' days')"
+        )
+        fim_do_mes = f"DATE({sql}, 'start of month', '+{self.meses + 1} months', '-1 day')"
+        return f"MIN({mesmo_dia}, {fim_do_mes})", (*params, *params, *params)
+
+
+def data_aprovacao_ensaio(model, solicitacao="pk"):
+    """Subquery com a data do primeiro ensaio aprovado de ``model`` da solicitação."""
+    return Subquery(
+        model.objects.filter(solicitacao=OuterRef(solicitacao), aprovado=True)
+        .order_by("id")
+        .values("data_teste")[:1]
+    )
+
+
+MESES_VALIDADE_CQS = 6
+
+
+def preencher_data_validade(cqs):
+    """
+    Preenche com um único UPDATE a validade dos CQS de ``cqs`` que estão sem ela:
+    primeiro ensaio aprovado (mecânico, senão ultrassom) + 6 meses, como o signal
+    ``set_cqs_technical_fields``. CQS sem ensaio aprovado ficam como estão.
+    Retorna quantos CQS foram preenchidos.
+    """
+    def aprovado(model):
+        return Exists(model.objects.filter(solicitacao=OuterRef("solicitacao_id"), aprovado=True))
+
+    return (
+        cqs.filter(data_validade__isnull=True)
+        .filter(Q(aprovado(EnsaioMecanicoDobramento)) | Q(aprovado(EnsaioUltrassom)))
+        .update(
+            data_validade=SomarMeses(
+                Coalesce(
+                    data_aprovacao_ensaio(EnsaioMecanicoDobramento, "solicitacao_id"),
+                    data_aprovacao_ensaio(EnsaioUltrassom, "solicitacao_id"),
+                ),
+                MESES_VALIDADE_CQS,
+            )
+        )
+    )
+
+
+def expressao_status_solicitacao():
+    """
+    Expressão SQL (CASE/WHEN) com a máquina de estados do status da solicitação.
+
+    - Teste visual reprovado → Reprovado Teste Visual
+    - Teste visual aprovado → resultado do ensaio realizado (DM ou UT, conforme o ensaio)
+    - Sem teste visual → apenas ensaios aprovados (lógica antiga)
+    - Demais casos → Aguardando Teste
+    """
+    S = SolicitacaoCadastroSoldador
+
+    def existe(model, **filtros):
+        return Exists(model.objects.filter(solicitacao=OuterRef("pk"), **filtros))
+
+    sem_visual = ~existe(TesteVisual)
+    visual_aprovado = existe(TesteVisual, resultado="Aprovado")
+    dobramento = Q(visual_aprovado, ensaio="DOBRAMENTO")
+    ultrassom = Q(visual_aprovado, ensaio="ULTRASSOM")
+    return Case(
+        When(existe(TesteVisual, resultado="Reprovado"), then=Value(S.STATUS_REPROVADO_TV)),
+        When(
+            dobramento & Q(existe(EnsaioMecanicoDobramento, aprovado=True, realizado=True)),
+            then=Value(S.STATUS_APROVADO_DM),
+        ),
+        When(
+            dobramento & Q(existe(EnsaioMecanicoDobramento, aprovado=False, realizado=True)),
+            then=Value(S.STATUS_REPROVADO_DM),
+        ),
+        When(
+            ultrassom & Q(existe(EnsaioUltrassom, aprovado=True, realizado=True)),
+            then=Value(S.STATUS_APROVADO_UT),
+        ),
+        When(
+            ultrassom & Q(existe(EnsaioUltrassom, aprovado=False, realizado=True)),
+            then=Value(S.STATUS_REPROVADO_UT),
+        ),
+        When(
+            Q(sem_visual, existe(EnsaioMecanicoDobramento, aprovado=True)),
+            then=Value(S.STATUS_APROVADO_DM),
+        ),
+        When(
+            Q(sem_visual, existe(EnsaioUltrassom, aprovado=True)),
+            then=Value(S.STATUS_APROVADO_UT),
+        ),
+        default=Value(S.STATUS_AGUARDANDO),
+        output_field=models.CharField(),
+    )
+
+
+def atualizar_status_solicitacoes(solicitacao_ids=None):
+    """
+    Recalcula o status materializado em um único UPDATE.
+    Sem ``solicitacao_ids`` recalcula todas as solicitações.
+
+    Antes do UPDATE, uma query agrupada por empresa mede quantas solicitações
+    entram e saem de aprovado/reprovado, e as estatísticas recebem só a diferença.
+    """
+    S = SolicitacaoCadastroSoldador
+    solicitacoes = S.objects.all()
+    if solicitacao_ids is None:
+        atualizadas = solicitacoes.update(status=expressao_status_solicitacao())
+        recalcular_estatisticas()
+        invalidar_cache_empresas()
+        return atualizadas
+
+    solicitacoes = solicitacoes.filter(pk__in=solicitacao_ids)
+
+    def saldo(status):
+        return models.Count("id", filter=Q(novo_status__in=status)) - models.Count(
+            "id", filter=Q(status__in=status)
+        )
+
+    deltas = list(
+        solicitacoes.annotate(novo_status=expressao_status_solicitacao())
+        .values("empresa_id")
+        .annotate(aprovados=saldo(S.STATUS_APROVADOS), reprovados=saldo(S.STATUS_REPROVADOS))
+        .order_by()
+    )
+    atualizadas = solicitacoes.update(status=expressao_status_solicitacao())
+    for linha in deltas:
+        ajustar_estatisticas(
+            [linha["empresa_id"]], aprovados=linha["aprovados"], reprovados=linha["reprovados"]
+        )
+    return atualizadas
+
+
+@receiver(post_save, sender=TesteVisual)
+@receiver(post_save, sender=EnsaioMecanicoDobramento)
+@receiver(post_save, sender=EnsaioUltrassom)
+@receiver(post_delete, sender=TesteVisual)
+@receiver(post_delete, sender=EnsaioMecanicoDobramento)
+@receiver(post_delete, sender=EnsaioUltrassom)
+def atualizar_status_solicitacao(sender, instance, **kwargs):
+    """
+    Mantém o status da solicitação atualizado quando um teste é gravado ou apagado
+    """
+    atualizar_status_solicitacoes([instance.solicitacao_id])
+
+
+@receiver(post_save, sender=SolicitacaoCadastroSoldador)
+def atualizar_status_ao_editar(sender, instance, created, **kwargs):
+    # O status depende do tipo de ensaio; solicitações novas já nascem "Aguardando"
+    if not created:
+        atualizar_status_solicitacoes([instance.pk])
+
+
+@receiver(post_save, sender=SolicitacaoCadastroSoldador)
+def contar_solicitacao_nova(sender, instance, created, **kwargs):
+    if not created:
+        return
+    primeira_do_soldador = not (
+        SolicitacaoCadastroSoldador.objects.filter(
+            empresa_id=instance.empresa_id, soldador_id=instance.soldador_id
+        )
+        .exclude(pk=instance.pk)
+        .exists()
+    )
+    ajustar_estatisticas(
+        [instance.empresa_id], solicitacoes=1, soldadores=int(primeira_do_soldador)
+    )
+
+
+@receiver(post_delete, sender=SolicitacaoCadastroSoldador)
+def recontar_solicitacao_apagada(sender, instance, **kwargs):
+    # A exclusão em cascata (testes, CQS) também mexe nos contadores: recalcula a empresa
+    recalcular_estatisticas([instance.empresa_id])
+
+
+@receiver(post_save, sender=Raqs)
+def contar_raqs_novo(sender, instance, created, **kwargs):
+    if created:
+        campo = "raqs_abertos" if instance.aberto else "raqs_fechados"
+        ajustar_estatisticas([instance.empresa_id], **{campo: 1})
+
+
+@receiver(post_delete, sender=Raqs)
+def descontar_raqs_apagado(sender, instance, **kwargs):
+    campo = "raqs_abertos" if instance.aberto else "raqs_fechados"
+    ajustar_estatisticas([instance.empresa_id], **{campo: -1})
+
+
+@receiver(post_save, sender=CQS)
+def contar_cqs_novo(sender, instance, created, **kwargs):
+    if created and instance.solicitacao_id and _cqs_valido(instance):
+        ajustar_estatisticas([instance.solicitacao.empresa_id], cqs_validos=1)
+
+
+@receiver(post_delete, sender=CQS)
+def descontar_cqs_apagado(sender, instance, **kwargs):
+    if instance.solicitacao_id and _cqs_valido(instance):
+        empresa_id = _empresa_da_solicitacao(instance)
+        if empresa_id:
+            ajustar_estatisticas([empresa_id], cqs_validos=-1)
+
+
+def _empresa_da_solicitacao(instance):
+    """Empresa de um teste, ensaio ou CQS; sem query quando a solicitação já está em memória."""
+    if type(instance).solicitacao.is_cached(instance):
+        return instance.solicitacao.empresa_id
+    return (
+        SolicitacaoCadastroSoldador.objects.filter(pk=instance.solicitacao_id)
+        .values_list("empresa_id", flat=True)
+        .first()
+    )
+
+
+# Cache por empresa (raqs/cache_empresa.py): toda gravação troca a versão da empresa.
+# Gravações em lote (bulk_create/update) não disparam signals e invalidam explicitamente.
+
+
+@receiver(post_save, sender=SolicitacaoCadastroSoldador)
+@receiver(post_delete, sender=SolicitacaoCadastroSoldador)
+@receiver(post_save, sender=Raqs)
+@receiver(post_delete, sender=Raqs)
+def invalidar_cache_da_empresa(sender, instance, **kwargs):
+    invalidar_cache_empresas([instance.empresa_id])
+
+
+@receiver(post_save, sender=TesteVisual)
+@receiver(post_save, sender=EnsaioMecanicoDobramento)
+@receiver(post_save, sender=EnsaioUltrassom)
+@receiver(post_save, sender=CQS)
+@receiver(post_delete, sender=TesteVisual)
+@receiver(post_delete, sender=EnsaioMecanicoDobramento)
+@receiver(post_delete, sender=EnsaioUltrassom)
+@receiver(post_delete, sender=CQS)
+def invalidar_cache_pela_solicitacao(sender, instance, **kwargs):
+    if instance.solicitacao_id:
+        invalidar_cache_empresas([_empresa_da_solicitacao(instance)])
+
+
+def emitir_cqs_aprovados(solicitacao_ids):
+    """
+    Emite o CQS das solicitações com ensaio aprovado que ainda não têm certificado.
+    Executada pela tarefa ``emitir_cqs`` (raqs/tarefas.py); idempotente, então
+    pode ser repetida em caso de falha.
     """
-    if instance.aprovado and instance.solicitacao:
-        # Verificar se já existe CQS para esta solicitação
-        if not hasattr(instance.solicitacao, 'cqs') or not instance.solicitacao.cqs:
-            # Criar novo CQS - todos os campos técnicos serão preenchidos pelo signal do CQS
-            cqs = CQS.objects.create(
-                solicitacao=instance.solicitacao,
-                data_validade=instance.data_teste + relativedelta(months=6)
+    emitidos = []
+    for model in (EnsaioMecanicoDobramento, EnsaioUltrassom):
+        ensaios = (
+            model.objects.filter(
+                solicitacao_id__in=solicitacao_ids,
+                aprovado=True,
+                solicitacao__cqs__isnull=True,
             )
-            print(f"CQS {cqs.numero} criado automaticamente para {instance.solicitacao.soldador.nome}")
+            .exclude(solicitacao_id__in=[cqs.solicitacao_id for cqs in emitidos])
+            .select_related("solicitacao__empresa")
+            .order_by("solicitacao_id", "id")
+        )
+        vistos = set()
+        for ensaio in ensaios:
+            if ensaio.solicitacao_id in vistos:
+                continue
+            vistos.add(ensaio.solicitacao_id)
+            emitidos.append(
+                CQS.objects.create(
+                    solicitacao=ensaio.solicitacao,
+                    data_validade=ensaio.data_teste + relativedelta(months=6),
+                )
+            )
+    return emitidos
+
+
+@receiver(post_migrate)
+def sincronizar_busca_sqlite(sender, using="default", **kwargs):
+    """No SQLite, recria a tabela FTS5 da busca global e seus triggers (raqs/busca.py)."""
+    from django.db import connections
+
+    from raqs.busca import sincronizar_indice_sqlite
+
+    if sender.name == "raqs" and connections[using].vendor == "sqlite":
+        sincronizar_indice_sqlite(connections[using])
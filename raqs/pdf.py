@@ -0,0 +1,163 @@
+"""
+Desenho do certificado (CQS) e montagem do PDF, só com Pillow.
+
+Módulo sem dependência do Django: ``renderizar_certificado`` recebe um dicionário
+simples e devolve a página em JPEG, então pode rodar em processos de um pool sem
+configurar o projeto. ``escrever_pdf`` junta as páginas em um PDF embutindo os
+JPEGs como estão (DCTDecode), sem decodificar de novo — a memória fica em uma
+página por vez, qualquer que seja o número de certificados.
+"""
+
+import io
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Mudou o desenho? Incremente: invalida todo o cache de certificados.
+VERSAO_LAYOUT = 1
+
+DPI = 150
+LARGURA, ALTURA = 1240, 1754  # A4 em 150 dpi
+MARGEM = 90
+QUALIDADE_JPEG = 85
+TAMANHO_LOGO = (320, 160)
+VERDE = (77, 111, 84)
+CINZA = (90, 90, 90)
+
+
+@lru_cache(maxsize=4)
+def _fonte(tamanho):
+    return ImageFont.load_default(size=tamanho)
+
+
+@lru_cache(maxsize=32)
+def _logo(caminho):
+    """Logo já reduzido; em cache por processo (os certificados de um RAQS repetem a empresa)."""
+    try:
+        with Image.open(caminho) as imagem:
+            logo = imagem.convert("RGBA")
+    except (OSError, ValueError):
+        return None
+    logo.thumbnail(TAMANHO_LOGO)
+    return logo
+
+
+def renderizar_certificado(dados):
+    """
+    Página do certificado em JPEG. ``dados``: ``numero``, ``emissao``, ``validade``,
+    ``logo`` (caminho do arquivo ou vazio) e ``campos`` (pares rótulo, valor).
+    """
+    pagina = Image.new("RGB", (LARGURA, ALTURA), "white")
+    desenho = ImageDraw.Draw(pagina)
+
+    logo = _logo(dados["logo"]) if dados["logo"] else None
+    if logo:
+        pagina.paste(logo, (MARGEM, MARGEM), logo)
+    desenho.text(
+        (LARGURA - MARGEM, MARGEM + 40),
+        f"CQS Nº {dados['numero']}",
+        font=_fonte(34),
+        fill=VERDE,
+        anchor="ra",
+    )
+
+    y = MARGEM + TAMANHO_LOGO[1] + 50
+    desenho.text(
+        (LARGURA // 2, y),
+        "CERTIFICADO DE QUALIFICAÇÃO DE SOLDADOR",
+        font=_fonte(40),
+        fill=VERDE,
+        anchor="ma",
+    )
+    y += 80
+    desenho.line((MARGEM, y, LARGURA - MARGEM, y), fill=VERDE, width=3)
+    y += 30
+
+    coluna_valor = MARGEM + 380
+    for rotulo, valor in dados["campos"]:
+        desenho.text((MARGEM, y), rotulo, font=_fonte(26), fill=CINZA)
+        desenho.text((coluna_valor, y), valor, font=_fonte(28), fill="black")
+        y += 52
+        desenho.line((MARGEM, y - 12, LARGURA - MARGEM, y - 12), fill=(220, 220, 220))
+
+    y = ALTURA - MARGEM - 120
+    desenho.line((MARGEM, y, LARGURA - MARGEM, y), fill=VERDE, width=3)
+    desenho.text((MARGEM, y + 30), f"Emissão: {dados['emissao']}", font=_fonte(28), fill="black")
+    desenho.text(
+        (LARGURA - MARGEM, y + 30),
+        f"Validade: {dados['validade']}",
+        font=_fonte(28),
+        fill="black",
+        anchor="ra",
+    )
+
+    saida = io.BytesIO()
+    pagina.save(saida, "JPEG", quality=QUALIDADE_JPEG, dpi=(DPI, DPI))
+    return saida.getvalue()
+
+
+class _Escritor:
+    """Grava objetos PDF em ``saida`` guardando a posição de cada um para o xref."""
+
+    def __init__(self, saida):
+        self.saida = saida
+        self.posicao = 0
+        self.objetos = {}
+
+    def escrever(self, conteudo):
+        self.saida.write(conteudo)
+        self.posicao += len(conteudo)
+
+    def objeto(self, numero, corpo, fluxo=None):
+        self.objetos[numero] = self.posicao
+        self.escrever(f"{numero} 0 obj\n".encode() + corpo)
+        if fluxo is not None:
+            self.escrever(b"\nstream\n" + fluxo + b"\nendstream")
+        self.escrever(b"\nendobj\n")
+
+
+def escrever_pdf(paginas, saida):
+    """
+    Grava em ``saida`` (arquivo binário ou ``HttpResponse``) um PDF com uma página A4
+    por JPEG de ``paginas`` (qualquer iterável, consumido uma vez).
+    Objetos: 1 catálogo, 2 árvore de páginas, e três por página (página, conteúdo, imagem).
+    """
+    escritor = _Escritor(saida)
+    escritor.escrever(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    largura_pt, altura_pt = LARGURA * 72 / DPI, ALTURA * 72 / DPI
+
+    filhos = []
+    for indice, jpeg in enumerate(paginas):
+        numero = 3 + 3 * indice
+        with Image.open(io.BytesIO(jpeg)) as imagem:  # só lê o cabeçalho
+            (largura, altura), modo = imagem.size, imagem.mode
+        cores = "/DeviceGray" if modo == "L" else "/DeviceRGB"
+        conteudo = f"q {largura_pt:.2f} 0 0 {altura_pt:.2f} 0 0 cm /Im0 Do Q".encode()
+
+        escritor.objeto(
+            numero,
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {largura_pt:.2f} {altura_pt:.2f}] "
+            f"/Resources << /XObject << /Im0 {numero + 2} 0 R >> >> "
+            f"/Contents {numero + 1} 0 R >>".encode(),
+        )
+        escritor.objeto(numero + 1, f"<< /Length {len(conteudo)} >>".encode(), conteudo)
+        escritor.objeto(
+            numero + 2,
+            f"<< /Type /XObject /Subtype /Image /Width {largura} /Height {altura} "
+            f"/ColorSpace {cores} /BitsPerComponent 8 /Filter /DCTDecode "
+            f"/Length {len(jpeg)} >>".encode(),
+            jpeg,
+        )
+        filhos.append(f"{numero} 0 R")
+
+    escritor.objeto(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    escritor.objeto(
+        2, f"<< /Type /Pages /Kids [{' '.join(filhos)}] /Count {len(filhos)} >>".encode()
+    )
+
+    inicio_xref = escritor.posicao
+    total = len(escritor.objetos) + 1
+    xref = [f"xref\n0 {total}\n", "0000000000 65535 f \n"]
+    xref += [f"{escritor.objetos[numero]:010d} 00000 n \n" for numero in range(1, total)]
+    xref.append(f"trailer\n<< /Size {total} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n")
+    escritor.escrever("".join(xref).encode())
@@ -0,0 +1,201 @@
+"""
+Regras de classificação compiladas a partir das planilhas em ``static/``.
+
+- ``regras_classificacao.csv``: consumível → processo, especificação SFA, F-number
+  e faixa qualificada do F-number (fq_consumivel do CQS)
+- ``regras_classificacao2.csv``: especificação do metal de base → P-number
+
+As planilhas são lidas uma única vez e viram tabelas imutáveis. ``obter_regras()``
+só relê os arquivos quando a data de modificação de algum deles muda.
+"""
+
+import csv
+import hashlib
+import io
+import os
+import re
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from django.conf import settings
+
+ARQUIVO_CONSUMIVEIS = settings.BASE_DIR / "static" / "regras_classificacao.csv"
+ARQUIVO_METAL_BASE = settings.BASE_DIR / "static" / "regras_classificacao2.csv"
+
+# Grafias antigas gravadas no banco → classificação usada na planilha e nos choices
+CONSUMIVEIS_LEGADOS = MappingProxyType(
+    {
+        "E6010": "E-6010",
+        "E7018": "E-7018",
+        "E-71T-1": "E-71T1",
+        "ER-70S-3": "ER-70S3",
+        "ER-70S-6": "ER-70S6",
+        "ER-309": "ER-309L",
+        "E-309": "E-309L",
+    }
+)
+
+# Erros de digitação conhecidos da planilha de metal de base
+_GRAFIAS_METAL_BASE = {"16M03": "16MO3"}
+
+# Campos da solicitação usados em ``Regras.derivar_campos_cqs`` (prontos para ``values()``)
+CAMPOS_SOLICITACAO_CQS = ("norma_projeto", "f_number", "metal_base_spec", "processo_soldagem")
+
+FQ_METAL_DE_BASE_AWS = "todos"
+FQ_METAL_DE_BASE_ASME = "1-15f-34-41-49"
+PN_PADRAO = "1"
+
+
+def _normalizar_faixa(texto):
+    return re.sub(r"\s+", "", texto)
+
+
+def chave_metal_base(especificacao):
+    """
+    Chave comum entre os choices do modelo ("A-106", "B536") e a planilha
+    ("ASTM A-106 Gr B", "ASTM B-536").
+    """
+    texto = (especificacao or "").upper().replace("ASTM", "")
+    texto = re.split(r"\bGR\b", texto)[0]
+    chave = re.sub(r"[^A-Z0-9]", "", texto)
+    return _GRAFIAS_METAL_BASE.get(chave, chave)
+
+
+@dataclass(frozen=True)
+class Regras:
+    versao: str
+    assinatura: tuple
+    f_number_por_consumivel: MappingProxyType
+    especificacao_por_consumivel: MappingProxyType
+    processo_por_consumivel: MappingProxyType
+    fq_consumivel_por_f_number: MappingProxyType
+    pn_por_metal_base: MappingProxyType
+
+    def consumivel_canonico(self, classificacao):
+        return CONSUMIVEIS_LEGADOS.get(classificacao, classificacao)
+
+    def f_number(self, classificacao):
+        return self.f_number_por_consumivel.get(self.consumivel_canonico(classificacao))
+
+    def fq_consumivel(self, f_number):
+        return self.fq_consumivel_por_f_number.get(f_number)
+
+    def pn_metal_base(self, especificacao):
+        return self.pn_por_metal_base.get(chave_metal_base(especificacao), PN_PADRAO)
+
+    def consumiveis_do_processo(self, processo):
+        return tuple(
+            classificacao
+            for classificacao, processo_consumivel in self.processo_por_consumivel.items()
+            if processo_consumivel == processo
+        )
+
+    def especificacoes_do_processo(self, processo):
+        return tuple(
+            dict.fromkeys(
+                self.especificacao_por_consumivel[classificacao]
+                for classificacao in self.consumiveis_do_processo(processo)
+            )
+        )
+
+    def derivar_f_numbers(self, classificacoes):
+        """F-number de cada consumível (``None`` quando não mapeado)."""
+        return [self.f_number(classificacao) for classificacao in classificacoes]
+
+    def derivar_campos_cqs(self, linhas):
+        """
+        Campos técnicos do CQS para cada linha projetada da solicitação (dicts com
+        ``norma_projeto``, ``f_number``, ``metal_base_spec`` e ``processo_soldagem``).
+        ``fq_consumivel`` vem ``None`` quando o F-number não está mapeado.
+        """
+        resultado = []
+        for linha in linhas:
+            campos = {"fq_consumivel": self.fq_consumivel(linha.get("f_number"))}
+            norma = linha.get("norma_projeto")
+            if norma and norma != "AWS_D1-1":
+                # ASME: PN# baseado no material, faixa "1 a 15 f, 34, 41 a 49"
+                campos["gn_metal_de_base"] = None
+                campos["pn_metal_de_base"] = self.pn_metal_base(linha.get("metal_base_spec"))
+                campos["fq_metal_de_base"] = FQ_METAL_DE_BASE_ASME
+            else:
+                # AWS D1.1 (ou sem norma definida): GN# = 1, faixa "TODOS"
+                campos["gn_metal_de_base"] = "1"
+                campos["pn_metal_de_base"] = None
+                campos["fq_metal_de_base"] = FQ_METAL_DE_BASE_AWS
+            if linha.get("processo_soldagem") in ("GMAW", "FCAW"):
+                campos["modo_transferencia"] = "CURTO_CIRCUITO"  # padrão mais comum para MIG/MAG
+            else:
+                campos["modo_transferencia"] = "N/A"
+            resultado.append(campos)
+        return resultado
+
+
+def _ler_csv(conteudo):
+    return csv.DictReader(io.StringIO(conteudo.decode("utf-8-sig")))
+
+
+def _compilar(conteudo_consumiveis, conteudo_metal_base, assinatura):
+    from raqs.models import CQS
+
+    fq_por_faixa = {
+        _normalizar_faixa(rotulo): codigo for codigo, rotulo in CQS.FQ_CONSUMIVEL_CHOICES
+    }
+
+    f_numbers, especificacoes, processos, fq_consumivel = {}, {}, {}, {}
+    for linha in _ler_csv(conteudo_consumiveis):
+        classificacao = linha["Classificação"].strip()
+        if not classificacao:
+            continue
+        f_number = linha["F N°"].strip()
+        f_numbers[classificacao] = f_number
+        especificacoes[classificacao] = f"SFA_{linha['Especificação'].strip().replace('.', '-')}"
+        processo = re.search(r"\(\s*(\w+)\s*\)", linha["Processo de soldagem"])
+        processos[classificacao] = processo.group(1) if processo else ""
+        faixa = fq_por_faixa.get(_normalizar_faixa(linha["FAIXA DE QUALIFICADA PARA FN°"]))
+        if faixa:
+            fq_consumivel[f_number] = faixa
+
+    pn_por_metal_base = {}
+    for linha in _ler_csv(conteudo_metal_base):
+        especificacao = (linha.get("ESPECIFICAÇÃO") or "").strip()
+        if especificacao:
+            pn_por_metal_base[chave_metal_base(especificacao)] = linha["PN°"].strip()
+
+    versao = hashlib.sha1(conteudo_consumiveis + b"\0" + conteudo_metal_base).hexdigest()[:12]
+    return Regras(
+        versao=versao,
+        assinatura=assinatura,
+        f_number_por_consumivel=MappingProxyType(f_numbers),
+        especificacao_por_consumivel=MappingProxyType(especificacoes),
+        processo_por_consumivel=MappingProxyType(processos),
+        fq_consumivel_por_f_number=MappingProxyType(fq_consumivel),
+        pn_por_metal_base=MappingProxyType(pn_por_metal_base),
+    )
+
+
+_regras = None
+_lock = threading.Lock()
+
+
+def _assinatura():
+    return tuple(
+        os.stat(arquivo).st_mtime_ns for arquivo in (ARQUIVO_CONSUMIVEIS, ARQUIVO_METAL_BASE)
+    )
+
+
+def obter_regras():
+    """Regras compiladas; relê as planilhas apenas se tiverem sido modificadas."""
+    global _regras
+    assinatura = _assinatura()
+    regras = _regras
+    if regras is not None and regras.assinatura == assinatura:
+        return regras
+    with _lock:
+        if _regras is None or _regras.assinatura != assinatura:
+            with open(ARQUIVO_CONSUMIVEIS, "rb") as f:
+                consumiveis = f.read()
+            with open(ARQUIVO_METAL_BASE, "rb") as f:
+                metal_base = f.read()
+            _regras = _compilar(consumiveis, metal_base, assinatura)
+        return _regras
@@ -0,0 +1,107 @@
+"""
+Relatório consolidado do RAQS, gerado uma única vez quando o RAQS é fechado.
+
+O relatório (cabeçalho da empresa, solicitações por soldador, teste visual com os
+motivos de reprovação por extenso, resultado do ensaio e números de CQS) é
+renderizado para um HTML autocontido — logo embutido, estilos inline, pronto para
+imprimir — e gravado em ``Raqs.relatorio``. Downloads seguintes servem o arquivo,
+sem consultar o banco nem renderizar de novo.
+"""
+
+import base64
+import mimetypes
+
+from django.core.files.base import ContentFile
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from raqs.models import EnsaioMecanicoDobramento, EnsaioUltrassom, Raqs, TesteVisual
+
+
+def _logo_embutido(empresa):
+    """Logo como data URI, para o arquivo não depender de /media/."""
+    if not empresa.logo:
+        return ""
+    try:
+        with empresa.logo.open("rb") as arquivo:
+            conteudo = arquivo.read()
+    except OSError:
+        return ""
+    tipo = mimetypes.guess_type(empresa.logo.name)[0] or "image/png"
+    return f"data:{tipo};base64,{base64.b64encode(conteudo).decode()}"
+
+
+def _resultado_ensaio(solicitacao):
+    if solicitacao.ensaio == "DOBRAMENTO":
+        ensaios = solicitacao.dobramentos
+    elif solicitacao.ensaio == "ULTRASSOM":
+        ensaios = solicitacao.ultrassons
+    else:
+        return "N/A"
+    if not ensaios:
+        return "Não registrado"
+    ensaio = ensaios[0]
+    if not ensaio.realizado:
+        return "Não realizado"
+    return "Aprovado" if ensaio.aprovado else "Reprovado"
+
+
+def contexto_relatorio(raqs):
+    """Dados do relatório em número fixo de queries (solicitações + dois Prefetch)."""
+    motivos = dict(TesteVisual.LISTA_VERIFICA_CHOICES)
+    solicitacoes = (
+        raqs.solicitacoes.select_related("soldador", "testevisual", "cqs")
+        .prefetch_related(
+            Prefetch(
+                "ensaiomecanicodobramento_set",
+                queryset=EnsaioMecanicoDobramento.objects.order_by("id"),
+                to_attr="dobramentos",
+            ),
+            Prefetch(
+                "ensaioultrassom_set",
+                queryset=EnsaioUltrassom.objects.order_by("id"),
+                to_attr="ultrassons",
+            ),
+        )
+        .order_by("soldador__nome", "soldador_id", "id")
+    )
+
+    soldadores = {}
+    for solicitacao in solicitacoes:
+        teste_visual = getattr(solicitacao, "testevisual", None)
+        codigos = teste_visual.motivos_reprovacao.split(",") if teste_visual else []
+        cqs = getattr(solicitacao, "cqs", None)
+        soldadores.setdefault(solicitacao.soldador, []).append(
+            {
+                "solicitacao": solicitacao,
+                "teste_visual": teste_visual.resultado if teste_visual else "",
+                "motivos": [
+                    motivos.get(codigo.strip(), codigo.strip())
+                    for codigo in codigos
+                    if codigo.strip()
+                ],
+                "ensaio": _resultado_ensaio(solicitacao),
+                "cqs": cqs.numero if cqs else "",
+            }
+        )
+
+    return {
+        "raqs": raqs,
+        "empresa": raqs.empresa,
+        "logo": _logo_embutido(raqs.empresa),
+        "soldadores": list(soldadores.items()),
+        "total_solicitacoes": sum(len(itens) for itens in soldadores.values()),
+        "gerado_em": timezone.localtime(),
+    }
+
+
+def gerar_relatorio_raqs(raqs):
+    """Renderiza e grava o relatório do RAQS, substituindo o anterior se houver."""
+    html = render_to_string("raqs/relatorio_raqs.html", contexto_relatorio(raqs))
+    if raqs.relatorio:
+        raqs.relatorio.delete(save=False)
+    raqs.relatorio.save(f"{raqs.n_master}.html", ContentFile(html.encode()), save=False)
+    # UPDATE só da coluna: ``save()`` tocaria o ``data`` (auto_now) do fechamento
+    Raqs.objects.filter(pk=raqs.pk).update(relatorio=raqs.relatorio.name)
+    return raqs.relatorio
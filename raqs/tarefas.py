@@ -0,0 +1,236 @@
+"""
+Fila de tarefas em segundo plano sobre o model ``Tarefa``.
+
+- ``enfileirar(nome, **argumentos)`` (raqs/models.py) grava a tarefa no
+  ``transaction.on_commit`` de quem a agenda
+- ``processar_pendentes`` reserva as tarefas vencidas com um UPDATE condicional
+  (seguro com vários workers), executa cada uma em sua própria transação e
+  reagenda as que falham com espera exponencial até ``max_tentativas``
+- tarefas presas em "executando" por um worker que morreu voltam para a fila
+  depois de ``TEMPO_LIMITE``
+- ``agendar_periodicas`` (chamada pelo worker a cada ciclo) mantém uma execução
+  pendente de cada tarefa de ``PERIODICAS``
+
+As funções executadas são registradas com ``@tarefa("nome")`` e recebem os
+argumentos gravados (JSON); devem ser idempotentes. Rodam em uma transação, salvo
+``@tarefa("nome", atomica=False)``: trabalho demorado que não grava no banco (no
+SQLite, ``transaction_mode`` IMMEDIATE trava a escrita desde o início da transação).
+"""
+
+import io
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from raqs.certificados import limpar_paginas_orfas, paginas_certificados
+from raqs.importacao import importar_csv
+from raqs.models import (
+    CQS,
+    Importacao,
+    Tarefa,
+    emitir_cqs_aprovados,
+    enfileirar,
+    recalcular_estatisticas,
+)
+
+logger = logging.getLogger(__name__)
+
+TAREFAS = {}
+TEMPO_LIMITE = timedelta(minutes=10)
+ESPERA_BASE = timedelta(seconds=30)
+LOTE = 50
+# Nome da tarefa → intervalo entre o fim de uma execução e o início da próxima
+PERIODICAS = {
+    "reconciliar_estatisticas": timedelta(days=1),
+    "limpar_certificados": timedelta(days=7),
+}
+
+
+def tarefa(nome, atomica=True):
+    def registrar(funcao):
+        funcao.atomica = atomica
+        TAREFAS[nome] = funcao
+        return funcao
+
+    return registrar
+
+
+@tarefa("emitir_cqs")
+def emitir_cqs(solicitacao_ids):
+    for cqs in emitir_cqs_aprovados(solicitacao_ids):
+        logger.info("CQS %s emitido para a solicitação %s", cqs.numero, cqs.solicitacao_id)
+    # As páginas ficam para outra tarefa, depois do commit: a sequência de números
+    # não fica travada durante o desenho e uma falha nele repete só o desenho
+    enfileirar("renderizar_certificados", solicitacao_ids=solicitacao_ids)
+
+
+@tarefa("renderizar_certificados", atomica=False)
+def renderizar_certificados(solicitacao_ids):
+    # Páginas desenhadas aqui (em paralelo, fora do gunicorn e de transação):
+    # a impressão na tela só lê o cache
+    paginas_certificados(CQS.objects.filter(solicitacao_id__in=solicitacao_ids).order_by("id"))
+
+
+@tarefa("importar_solicitacoes", atomica=False)
+def importar_solicitacoes(importacao_id):
+    """
+    Importa o CSV enviado pela tela. Cada lote é gravado em sua transação e não
+    volta atrás, então a importação nunca roda duas vezes: se o worker parou no
+    meio, a nova execução só registra a falha.
+    """
+    iniciada = Importacao.objects.filter(
+        id=importacao_id, status=Importacao.STATUS_PENDENTE
+    ).update(status=Importacao.STATUS_PROCESSANDO)
+    importacao = Importacao.objects.select_related("empresa").get(id=importacao_id)
+    if not iniciada:
+        if importacao.status == Importacao.STATUS_PROCESSANDO:
+            _falhar(
+                importacao,
+                "Importação interrompida; confira as solicitações antes de enviar o arquivo de novo.",
+            )
+        return
+
+    try:
+        with importacao.arquivo.open("rb"):
+            arquivo = io.TextIOWrapper(importacao.arquivo.file, encoding="utf-8-sig", newline="")
+            resultado = importar_csv(arquivo, importacao.empresa)
+    except Exception:
+        logger.exception("Importação %s falhou", importacao_id)
+        _falhar(
+            importacao, "Erro inesperado na importação; parte das linhas pode já ter sido gravada."
+        )
+        return
+
+    importacao.linhas = resultado.linhas
+    importacao.soldadores_criados = resultado.soldadores_criados
+    importacao.solicitacoes_criadas = resultado.solicitacoes_criadas
+    importacao.erros = resultado.erros
+    importacao.interrompida_na_linha = resultado.interrompida_na_linha
+    importacao.status = Importacao.STATUS_CONCLUIDA
+    importacao.concluida_em = timezone.now()
+    importacao.arquivo.delete(save=False)  # o resultado fica; o upload não é mais necessário
+    importacao.save()
+
+
+def _falhar(importacao, erro):
+    importacao.status = Importacao.STATUS_FALHOU
+    importacao.erro = erro
+    importacao.concluida_em = timezone.now()
+    importacao.save(update_fields=["status", "erro", "concluida_em"])
+
+
+@tarefa("reconciliar_estatisticas")
+def reconciliar_estatisticas():
+    # Corrige o desvio dos ajustes por delta (ex.: primeiras solicitações simultâneas
+    # do mesmo soldador) e os CQS que venceram desde o último ajuste
+    desvios = recalcular_estatisticas()
+    if desvios:
+        logger.warning("Estatísticas corrigidas em %s empresas: %s", len(desvios), desvios)
+
+
+@tarefa("limpar_certificados", atomica=False)
+def limpar_certificados():
+    orfas = limpar_paginas_orfas(timezone.now())
+    logger.info("Páginas de certificados sem uso apagadas: %s", len(orfas))
+
+
+def agendar_periodicas():
+    """
+    Agenda a próxima execução das tarefas de ``PERIODICAS`` que não estão na fila:
+    ``intervalo`` depois da última concluída, ou já, se nunca rodaram.
+    """
+    agora = timezone.now()
+    for nome, intervalo in PERIODICAS.items():
+        na_fila = Tarefa.objects.filter(
+            nome=nome, status__in=(Tarefa.STATUS_PENDENTE, Tarefa.STATUS_EXECUTANDO)
+        )
+        if na_fila.exists():
+            continue
+        ultima = (
+            Tarefa.objects.filter(nome=nome, concluida_em__isnull=False)
+            .order_by("-concluida_em")
+            .values_list("concluida_em", flat=True)
+            .first()
+        )
+        Tarefa.objects.create(
+            nome=nome, executar_em=max(agora, ultima + intervalo) if ultima else agora
+        )
+
+
+def recuperar_travadas():
+    """Devolve à fila as tarefas cujo worker parou no meio da execução."""
+    return Tarefa.objects.filter(
+        status=Tarefa.STATUS_EXECUTANDO,
+        iniciada_em__lt=timezone.now() - TEMPO_LIMITE,
+    ).update(status=Tarefa.STATUS_PENDENTE)
+
+
+def _reservar(limite):
+    agora = timezone.now()
+    candidatas = list(
+        Tarefa.objects.filter(status=Tarefa.STATUS_PENDENTE, executar_em__lte=agora)
+        .order_by("executar_em", "id")
+        .values_list("id", flat=True)[:limite]
+    )
+    # UPDATE condicional: se outro worker pegou a tarefa antes, afeta 0 linhas
+    reservadas = [
+        tarefa_id
+        for tarefa_id in candidatas
+        if Tarefa.objects.filter(id=tarefa_id, status=Tarefa.STATUS_PENDENTE).update(
+            status=Tarefa.STATUS_EXECUTANDO,
+            iniciada_em=agora,
+            tentativas=F("tentativas") + 1,
+        )
+    ]
+    return Tarefa.objects.filter(id__in=reservadas).order_by("executar_em", "id")
+
+
+def executar(tarefa):
+    """Executa uma tarefa já reservada e grava o resultado (ou o reagendamento)."""
+    try:
+        funcao = TAREFAS[tarefa.nome]
+    except KeyError:
+        tarefa.status = Tarefa.STATUS_FALHOU
+        tarefa.erro = f"Tarefa desconhecida: {tarefa.nome}"
+        tarefa.save(update_fields=["status", "erro"])
+        logger.error(tarefa.erro)
+        return False
+
+    try:
+        if funcao.atomica:
+            with transaction.atomic():
+                funcao(**tarefa.argumentos)
+        else:
+            funcao(**tarefa.argumentos)
+    except Exception:
+        tarefa.erro = traceback.format_exc()
+        if tarefa.tentativas < tarefa.max_tentativas:
+            tarefa.status = Tarefa.STATUS_PENDENTE
+            tarefa.executar_em = timezone.now() + ESPERA_BASE * 2 ** (tarefa.tentativas - 1)
+        else:
+            tarefa.status = Tarefa.STATUS_FALHOU
+        tarefa.save(update_fields=["status", "erro", "executar_em"])
+        logger.exception("Tarefa %s falhou (tentativa %s)", tarefa, tarefa.tentativas)
+        return False
+
+    tarefa.status = Tarefa.STATUS_CONCLUIDA
+    tarefa.concluida_em = timezone.now()
+    tarefa.erro = ""
+    tarefa.save(update_fields=["status", "concluida_em", "erro"])
+    return True
+
+
+def processar_pendentes(limite=LOTE):
+    """Executa até ``limite`` tarefas vencidas; devolve ``(executadas, falhas)``."""
+    recuperar_travadas()
+    executadas = falhas = 0
+    for tarefa in _reservar(limite):
+        if executar(tarefa):
+            executadas += 1
+        else:
+            falhas += 1
+    return executadas, falhas
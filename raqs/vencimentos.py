@@ -0,0 +1,52 @@
+"""
+CQS perto do vencimento (validade de 6 meses após o ensaio aprovado).
+
+Uma única consulta por faixa de ``data_validade`` (índice ``cqs_data_validade``),
+projetada com ``values()`` e agrupada por empresa em memória. Usada pela tela
+``cqs_a_vencer`` e pelo resumo por e-mail ``enviar_aviso_vencimentos``.
+"""
+
+from datetime import timedelta
+from itertools import groupby
+
+from django.utils import timezone
+
+from raqs.models import CQS
+
+DIAS_PADRAO = 30
+DIAS_MAXIMO = 365
+
+
+def cqs_a_vencer(dias=DIAS_PADRAO, empresa_id=None, hoje=None):
+    """Linhas dos CQS que vencem entre hoje e ``hoje + dias``, por empresa e data."""
+    hoje = hoje or timezone.localdate()
+    cqs = CQS.objects.filter(data_validade__range=(hoje, hoje + timedelta(days=dias)))
+    if empresa_id:
+        cqs = cqs.filter(solicitacao__empresa_id=empresa_id)
+    return cqs.order_by(
+        "solicitacao__empresa__nome", "solicitacao__empresa_id", "data_validade", "id"
+    ).values(
+        "numero",
+        "data_validade",
+        "solicitacao__empresa_id",
+        "solicitacao__empresa__nome",
+        "solicitacao__soldador__nome",
+        "solicitacao__soldador__cpf",
+        "solicitacao__processo_soldagem",
+        "solicitacao__norma_projeto",
+    )
+
+
+def agrupar_por_empresa(linhas, hoje=None):
+    """``[(empresa_id, nome, [linhas])]``; cada linha ganha ``dias_restantes``."""
+    hoje = hoje or timezone.localdate()
+    grupos = []
+    def empresa(linha):
+        return linha["solicitacao__empresa_id"], linha["solicitacao__empresa__nome"]
+
+    for (empresa_id, nome), itens in groupby(linhas, key=empresa):
+        itens = list(itens)
+        for linha in itens:
+            linha["dias_restantes"] = (linha["data_validade"] - hoje).days
+        grupos.append((empresa_id, nome, itens))
+    return grupos
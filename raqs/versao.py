@@ -0,0 +1,34 @@
+"""
+Versão do código em execução, usada nas chaves de cache que guardam HTML ou
+objetos do app: um deploy com templates ou modelos novos não lê entradas
+gravadas pela versão anterior.
+
+Vem de ``settings.VERSAO_APP`` (variável de ambiente no deploy); sem ela, é o
+hash dos arquivos .py e dos templates do app, calculado uma vez por processo.
+"""
+
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+PASTA_APP = Path(__file__).resolve().parent
+
+
+def versao_app():
+    return settings.VERSAO_APP or _hash_arquivos()
+
+
+@lru_cache(maxsize=None)
+def _hash_arquivos():
+    arquivos = sorted(
+        [*PASTA_APP.glob("*.py"), *PASTA_APP.glob("templatetags/*.py"), *PASTA_APP.glob("templates/**/*")]
+    )
+    conteudo = hashlib.sha1()
+    for arquivo in arquivos:
+        if not arquivo.is_file():
+            continue
+        conteudo.update(arquivo.relative_to(PASTA_APP).as_posix().encode() + b"\0")
+        conteudo.update(arquivo.read_bytes())
+    return conteudo.hexdigest()[:12]
@@ -3,11 +3,45 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth import login, authenticate
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
-from django.db import models
-from raqs.forms import SoldadorForm, SolicitacaoCadastroSoldadorForm
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Prefetch, Q
+from raqs.busca import buscar
+from raqs.cache_empresa import TIMEOUT as CACHE_EMPRESA_TIMEOUT, chave_empresa, invalidar_cache_empresas
+from raqs.cascatas import (
+    campos_do_metal_base,
+    consumiveis_do_processo,
+    ensaios_da_norma,
+    gases_do_processo,
+    pacote_regras_formulario,
+    progressoes_da_posicao,
+)
+from raqs.certificados import certificados_do_raqs, gerar_pdf_certificados
+from raqs.exportacao import consultar_registro_cqs, linhas_csv
+from raqs.forms import FiltroExportacaoCqsForm, SoldadorForm, SolicitacaoCadastroSoldadorForm
+from raqs.importacao import COLUNAS as COLUNAS_IMPORTACAO
 from raqs.models import *
+from raqs.regras import obter_regras
+from raqs.relatorios import gerar_relatorio_raqs
+from raqs.vencimentos import DIAS_MAXIMO, DIAS_PADRAO, agrupar_por_empresa, cqs_a_vencer
+from raqs.versao import versao_app
 from django.contrib.auth.decorators import user_passes_test
+from django.core.cache import cache
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from collections import defaultdict
+from functools import wraps
+import csv
+import io
+import tempfile
+from urllib.parse import urlencode
+import hashlib
 
 
 @login_required
@@ -65,6 +99,7 @@ def solicitacao_qualificacao_soldador(request, soldador_id=None):
             "soldador": soldador,
             "empresa": empresa,
             "error_messages": form.errors,
+            "versao_regras_formulario": pacote_regras_formulario()[0],
         },
     )
 
@@ -90,77 +125,217 @@ def cadastro_soldador(request):
     return render(request, "cadastro_soldador.html", {"form": form})
 
 
+ERROS_EXIBIDOS_IMPORTACAO = 500
+
+
+@login_required
+def importar_solicitacoes(request):
+    """
+    Upload de CSV com soldadores e solicitações (uma solicitação por linha). O
+    arquivo fica salvo e o worker importa (tarefa ``importar_solicitacoes``): um
+    arquivo grande não esbarra no timeout do gunicorn no meio dos lotes.
+    """
+    empresa = get_object_or_404(Empresa, usuarios__id=request.user.id)
+
+    if request.method == "POST" and request.FILES.get("arquivo"):
+        importacao = Importacao.objects.create(
+            empresa=empresa, usuario=request.user, arquivo=request.FILES["arquivo"]
+        )
+        enfileirar("importar_solicitacoes", importacao_id=importacao.id)
+        return redirect("importacao-solicitacoes", importacao_id=importacao.id)
+
+    return render(
+        request,
+        "importar_solicitacoes.html",
+        {
+            "empresa": empresa,
+            "colunas": COLUNAS_IMPORTACAO,
+            "importacoes": empresa.importacoes.defer("erros").order_by("-id")[:10],
+        },
+    )
+
+
+@login_required
+def importacao_solicitacoes(request, importacao_id):
+    """Andamento e resultado de uma importação; ``?formato=csv`` baixa os erros."""
+    empresa = get_object_or_404(Empresa, usuarios__id=request.user.id)
+    importacao = get_object_or_404(Importacao, id=importacao_id, empresa=empresa)
+
+    if request.GET.get("formato") == "csv":
+        resposta = HttpResponse(content_type="text/csv")
+        resposta["Content-Disposition"] = 'attachment; filename="erros_importacao.csv"'
+        escritor = csv.writer(resposta)
+        escritor.writerow(["linha", "erro"])
+        escritor.writerows(importacao.erros)
+        return resposta
+
+    return render(
+        request,
+        "importar_solicitacoes.html",
+        {
+            "empresa": empresa,
+            "colunas": COLUNAS_IMPORTACAO,
+            "importacao": importacao,
+            "erros": importacao.erros[:ERROS_EXIBIDOS_IMPORTACAO],
+        },
+    )
+
+
+# Campos dependentes do formulário de solicitação (HTMX)
+
+FRAGMENTO_MAX_AGE = 60 * 60  # 1 hora no navegador
+FRAGMENTO_TIMEOUT = 60 * 60 * 24  # 1 dia no cache do servidor
+
+
+def fragmento_em_cache(parametro):
+    """
+    Cacheia o fragmento de uma view cujo HTML depende apenas de ``parametro`` (GET)
+    e das regras de classificação. A chave é (view, versão do código, versão das
+    regras, parâmetro): um deploy com template novo não serve o HTML antigo;
+    a resposta sai com ETag do conteúdo e o navegador recebe 304 quando já tem o
+    fragmento.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request):
+            if request.method not in ("GET", "HEAD"):
+                return view(request)
+
+            valor = request.GET.get(parametro, "").strip()
+            chave = "fragmento:{}:{}:{}:{}".format(
+                view.__name__,
+                versao_app(),
+                obter_regras().versao,
+                hashlib.md5(valor.encode()).hexdigest(),
+            )
+            fragmento = cache.get(chave)
+            if fragmento is None:
+                resposta = view(request)
+                if resposta.status_code != 200:
+                    return resposta
+                etag = '"{}"'.format(hashlib.md5(resposta.content).hexdigest())
+                fragmento = (etag, resposta.content, resposta["Content-Type"])
+                cache.set(chave, fragmento, FRAGMENTO_TIMEOUT)
+            etag, conteudo, content_type = fragmento
+
+            if etag in request.headers.get("If-None-Match", ""):
+                resposta = HttpResponseNotModified()
+            else:
+                resposta = HttpResponse(conteudo, content_type=content_type)
+            resposta["ETag"] = etag
+            patch_cache_control(resposta, private=True, max_age=FRAGMENTO_MAX_AGE)
+            patch_vary_headers(resposta, ["HX-Request"])
+            return resposta
+
+        return wrapper
+
+    return decorator
+
+
+REGRAS_FORMULARIO_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def regras_formulario(request, versao):
+    """
+    Pacote JSON com as cascatas do formulário de solicitação. A URL leva o hash do
+    conteúdo, então pode ficar em cache no navegador indefinidamente; versões
+    antigas são redirecionadas para a atual.
+    """
+    versao_atual, conteudo = pacote_regras_formulario()
+    if versao != versao_atual:
+        return redirect("regras-formulario", versao=versao_atual)
+
+    resposta = HttpResponse(conteudo, content_type="application/json")
+    resposta["ETag"] = f'"{versao_atual}"'
+    patch_cache_control(
+        resposta, public=True, max_age=REGRAS_FORMULARIO_MAX_AGE, immutable=True
+    )
+    return resposta
+
+
+@fragmento_em_cache("norma_projeto")
 def update_ensaio_choices(request):
     norma_projeto = request.GET.get("norma_projeto", "").strip()
     form = SolicitacaoCadastroSoldadorForm()
-    print("Norma de projeto:", norma_projeto)
-
-    # Dynamically adjust the `ensaio` field based on `norma_projeto`
-    if norma_projeto in ["AWS_D1-1", "AWS D1.1 - 2020"]:
-        form.fields["ensaio"].choices = [("DOBRAMENTO", "Dobramento Mecânico")]
-    else:
-        form.fields["ensaio"].choices = [
-            ("DOBRAMENTO", "Dobramento Mecânico"),
-            ("ULTRASSOM", "Ultrassom"),
-        ]
+    form.fields["ensaio"].choices = ensaios_da_norma(norma_projeto)
 
     # Render the updated `ensaio` field
 
     return render(request, "partials/ensaio_field.html", {"field": form["ensaio"]})
 
 
+SOLDADORES_POR_PAGINA = 50
+
+
 def list_soldadores(request):
-    soldadores = Soldador.objects.all()
-    return render(request, "list_soldadores.html", {"soldadores": soldadores})
+    """
+    Lista de soldadores paginada por cursor em (nome, id): cada página é uma única
+    query sobre o índice ``soldador_nome_id``, qualquer que seja a profundidade.
+    Os filtros por prefixo usam ``soldador_nome_prefixo`` e ``soldador_cpf_prefixo``.
+    Requisições HTMX recebem só as linhas da página (filtro e "carregar mais").
+    """
+    nome = request.GET.get("nome", "").strip()
+    cpf = normalizar_cpf(request.GET.get("cpf", ""))
+
+    soldadores = Soldador.objects.only("id", "nome", "cpf").order_by("nome", "id")
+    if nome:
+        soldadores = soldadores.filter(nome__istartswith=nome)
+    if cpf:
+        soldadores = soldadores.filter(cpf_normalizado__startswith=cpf)
+
+    apos_nome = request.GET.get("apos_nome")
+    apos_id = request.GET.get("apos_id", "")
+    if apos_nome is not None and apos_id.isdigit():
+        soldadores = soldadores.filter(
+            Q(nome__gt=apos_nome) | Q(nome=apos_nome, id__gt=int(apos_id))
+        )
 
+    pagina = list(soldadores[: SOLDADORES_POR_PAGINA + 1])
+    proxima_pagina = None
+    if len(pagina) > SOLDADORES_POR_PAGINA:
+        pagina = pagina[:SOLDADORES_POR_PAGINA]
+        ultimo = pagina[-1]
+        proxima_pagina = urlencode(
+            {"nome": nome, "cpf": cpf or "", "apos_nome": ultimo.nome, "apos_id": ultimo.id}
+        )
+
+    contexto = {
+        "soldadores": pagina,
+        "proxima_pagina": proxima_pagina,
+        "nome": nome,
+        "cpf": request.GET.get("cpf", ""),
+    }
+    if request.htmx:
+        return render(request, "partials/soldadores_pagina.html", contexto)
+    return render(request, "list_soldadores.html", contexto)
 
+
+@fragmento_em_cache("metal_base_spec")
 def update_metal_fields(request):
     # Obtenha o valor enviado pelo HTMX
     metal_base_spec = request.GET.get("metal_base_spec", "").strip()
     form = SolicitacaoCadastroSoldadorForm()
-    # print("A escolha foi:", metal_base_spec)  # Para depuração
 
     # Ajuste os campos com base na escolha
-    if metal_base_spec in ["A-36", "SB536", "A-309", "A-312"]:
-        form.fields["metal_base_espessura"].disabled = False
-        form.fields["metal_base_diametro"].disabled = True
-        form.fields["posicao_soldagem"].choices = [
-            choice
-            for choice in form.fields["posicao_soldagem"].choices
-            if choice[0] not in ["5G", "6G"]
-        ]
-    elif metal_base_spec in ["A-106", "16MO3"]:
-        form.fields["metal_base_espessura"].disabled = True
-        form.fields["metal_base_diametro"].disabled = False
-        form.fields["posicao_soldagem"].choices = [
-            choice
-            for choice in form.fields["posicao_soldagem"].choices
-            if choice[0] not in ["3G", "4G"]
-        ]
+    campos_metal = campos_do_metal_base(metal_base_spec)
+    form.fields["metal_base_espessura"].disabled = not campos_metal["espessura"]
+    form.fields["metal_base_diametro"].disabled = not campos_metal["diametro"]
+    form.fields["posicao_soldagem"].choices = campos_metal["posicoes"]
 
     # Renderize os campos dinâmicos
     return render(request, "partials/metal_fields.html", {"form": form})
 
 
+@fragmento_em_cache("posicao_soldagem")
 def update_progressao_choices(request):
     posicao_soldagem = request.GET.get("posicao_soldagem", "").strip()
     form = SolicitacaoCadastroSoldadorForm()
-    # print("Posição de Soldagem:", posicao_soldagem) # Depuração
-
-    # Ajustar dinâmicamente a posição com base na progressão
-    if posicao_soldagem in ["6G"]:
-        form.fields["posicao_soldagem_progressao"].disabled = False
-        form.fields["posicao_soldagem_progressao"].choices = [
-            ("ASCENDENTE", "Ascendente")
-        ]
-    elif posicao_soldagem in ["3G", "3F", "5G"]:
-        form.fields["posicao_soldagem_progressao"].disabled = False
-        form.fields["posicao_soldagem_progressao"].choices = [
-            ("ASCENDENTE", "Ascendente"),
-            ("DESCENDENTE", "Descendente"),
-        ]
-    else:
-        form.fields["posicao_soldagem_progressao"].readonly = True
+
+    # Ajustar dinâmicamente a progressão com base na posição
+    form.fields["posicao_soldagem_progressao"].choices = progressoes_da_posicao(
+        posicao_soldagem
+    )
 
     # Renderiza o campo de progressão
 
@@ -179,56 +354,13 @@ def solicitacoes_soldador(request, soldador_id):
         soldador=soldador, empresa=empresa
     )
 
-    soldador_status = {}
-    solicitacoes_abertas = []
-    solicitacoes_finalizadas = []
-    
-    for solicitacao in solicitacoes:
-        status = "Aguardando Teste"
-        
-        # Verificar se há teste visual
-        try:
-            teste_visual = TesteVisual.objects.get(solicitacao=solicitacao)
-            if teste_visual.resultado == "Reprovado":
-                status = "Reprovado Teste Visual"
-            elif teste_visual.resultado == "Aprovado":
-                # Se aprovado no teste visual, verificar ensaios
-                if solicitacao.ensaio == "DOBRAMENTO":
-                    if EnsaioMecanicoDobramento.objects.filter(
-                        solicitacao=solicitacao, aprovado=True, realizado=True
-                    ).exists():
-                        status = "Aprovado - DM"
-                    elif EnsaioMecanicoDobramento.objects.filter(
-                        solicitacao=solicitacao, aprovado=False, realizado=True
-                    ).exists():
-                        status = "Reprovado - DM"
-                elif solicitacao.ensaio == "ULTRASSOM":
-                    if EnsaioUltrassom.objects.filter(
-                        solicitacao=solicitacao, aprovado=True, realizado=True
-                    ).exists():
-                        status = "Aprovado - UT"
-                    elif EnsaioUltrassom.objects.filter(
-                        solicitacao=solicitacao, aprovado=False, realizado=True
-                    ).exists():
-                        status = "Reprovado - UT"
-        except TesteVisual.DoesNotExist:
-            # Se não há teste visual, verificar apenas ensaios (lógica antiga)
-            if EnsaioMecanicoDobramento.objects.filter(
-                solicitacao=solicitacao, aprovado=True
-            ).exists():
-                status = "Aprovado - DM"
-            elif EnsaioUltrassom.objects.filter(
-                solicitacao=solicitacao, aprovado=True
-            ).exists():
-                status = "Aprovado - UT"
-
-        soldador_status[solicitacao.id] = status
-        
-        # Separar solicitações por status
-        if "Aguardando" in status:
-            solicitacoes_abertas.append(solicitacao)
-        elif "Aprovado" in status or "Reprovado" in status:
-            solicitacoes_finalizadas.append(solicitacao)
+    # Status materializado: a separação é feita direto no banco
+    solicitacoes_abertas = solicitacoes.filter(
+        status=SolicitacaoCadastroSoldador.STATUS_AGUARDANDO
+    )
+    solicitacoes_finalizadas = solicitacoes.exclude(
+        status=SolicitacaoCadastroSoldador.STATUS_AGUARDANDO
+    )
 
     return render(
         request,
@@ -238,12 +370,59 @@ def solicitacoes_soldador(request, soldador_id):
             "solicitacoes": solicitacoes,
             "solicitacoes_abertas": solicitacoes_abertas,
             "solicitacoes_finalizadas": solicitacoes_finalizadas,
-            "soldador_status": soldador_status,
             "empresa": empresa,
         },
     )
 
 
+@login_required
+def solicitacoes_empresa(request):
+    """
+    Versão em lote de ``solicitacoes_soldador``: devolve em uma única resposta o
+    painel de solicitações de todos os soldadores da empresa, como swaps
+    out-of-band do HTMX (``#solicitacoes-<id>``), com uma única query de solicitações.
+
+    Os painéis ficam no cache compartilhado sob a versão da empresa; o HTML é
+    renderizado a cada pedido porque leva o token CSRF do usuário.
+    """
+    empresa = get_object_or_404(Empresa, usuarios__id=request.user.id)
+    chave = chave_empresa(empresa.id, "paineis-solicitacoes")
+    paineis = cache.get(chave)
+    if paineis is None:
+        paineis = _paineis_solicitacoes(empresa)
+        cache.set(chave, paineis, CACHE_EMPRESA_TIMEOUT)
+
+    return render(
+        request,
+        "partials/solicitacoes_empresa.html",
+        {"paineis": paineis, "empresa": empresa},
+    )
+
+
+def _paineis_solicitacoes(empresa):
+    solicitacoes = SolicitacaoCadastroSoldador.objects.filter(empresa=empresa).order_by(
+        "soldador_id", "id"
+    )
+
+    paineis = {}
+    for solicitacao in solicitacoes:
+        painel = paineis.setdefault(
+            solicitacao.soldador_id,
+            {
+                "soldador_id": solicitacao.soldador_id,
+                "solicitacoes": [],
+                "solicitacoes_abertas": [],
+                "solicitacoes_finalizadas": [],
+            },
+        )
+        painel["solicitacoes"].append(solicitacao)
+        if solicitacao.status == SolicitacaoCadastroSoldador.STATUS_AGUARDANDO:
+            painel["solicitacoes_abertas"].append(solicitacao)
+        else:
+            painel["solicitacoes_finalizadas"].append(solicitacao)
+    return list(paineis.values())
+
+
 def is_grupo_master(user):
     return (
         user.is_authenticated
@@ -254,52 +433,216 @@ def is_grupo_master(user):
     )
 
 
+@login_required
+def busca_global(request):
+    """Typeahead da busca global: Grupo Master busca em tudo, as demais empresas nos próprios dados."""
+    termo = request.GET.get("q", "").strip()
+    if is_grupo_master(request.user):
+        resultados = buscar(termo)
+    elif request.user.empresa_id:
+        resultados = buscar(termo, empresa=request.user.empresa)
+    else:
+        resultados = []
+    return render(
+        request,
+        "partials/busca_resultados.html",
+        {"resultados": resultados, "termo": termo},
+    )
+
+
+@login_required
+def exportar_cqs(request):
+    """
+    Registro de CQS em CSV, gerado em streaming. Filtros (GET): ``empresa``
+    (só para o Grupo Master; as demais empresas exportam apenas os próprios),
+    ``de``/``ate`` (data de emissão) e ``situacao`` (valido, vencido, sem_validade).
+    Filtros inválidos respondem 400 com os erros.
+    """
+    filtros = FiltroExportacaoCqsForm(request.GET)
+    if not filtros.is_valid():
+        erros = "; ".join(
+            f"{campo}: {' '.join(mensagens)}" for campo, mensagens in filtros.errors.items()
+        )
+        return HttpResponseBadRequest(
+            f"Filtros inválidos - {erros}", content_type="text/plain; charset=utf-8"
+        )
+    if is_grupo_master(request.user):
+        empresa_id = filtros.cleaned_data["empresa"]
+    else:
+        empresa_id = request.user.empresa_id
+        if not empresa_id:
+            return HttpResponse(status=403)
+
+    linhas = consultar_registro_cqs(
+        empresa_id=empresa_id,
+        emitido_de=filtros.cleaned_data["de"],
+        emitido_ate=filtros.cleaned_data["ate"],
+        situacao=filtros.cleaned_data["situacao"] or None,
+    )
+    resposta = StreamingHttpResponse(linhas_csv(linhas), content_type="text/csv")
+    nome = f"registro_cqs_{timezone.localdate():%Y%m%d}.csv"
+    resposta["Content-Disposition"] = f'attachment; filename="{nome}"'
+    return resposta
+
+
+def _pode_ver_empresa(user, empresa_id):
+    return is_grupo_master(user) or (user.empresa_id and user.empresa_id == empresa_id)
+
+
+def _resposta_pdf(certificados, nome):
+    """
+    Monta o PDF em arquivo temporário e o envia em blocos (``FileResponse``).
+    As páginas costumam vir prontas do worker (tarefa ``emitir_cqs``); as que
+    faltarem são desenhadas aqui em sequência, sem abrir processos no gunicorn.
+    """
+    arquivo = tempfile.TemporaryFile()
+    gerar_pdf_certificados(certificados, arquivo, workers=1)
+    arquivo.seek(0)
+    return FileResponse(arquivo, content_type="application/pdf", filename=nome)
+
+
+@login_required
+def certificado_cqs(request, cqs_id):
+    cqs = get_object_or_404(
+        CQS.objects.select_related("solicitacao"), id=cqs_id, solicitacao__isnull=False
+    )
+    if not _pode_ver_empresa(request.user, cqs.solicitacao.empresa_id):
+        return HttpResponse(status=403)
+    return _resposta_pdf(CQS.objects.filter(id=cqs.id), f"CQS_{cqs.numero}.pdf")
+
+
+@login_required
+def certificados_raqs(request, raqs_id):
+    """Todos os certificados do RAQS em um único PDF."""
+    raqs = get_object_or_404(Raqs, id=raqs_id)
+    if not _pode_ver_empresa(request.user, raqs.empresa_id):
+        return HttpResponse(status=403)
+    certificados = certificados_do_raqs(raqs)
+    if not certificados.exists():
+        messages.warning(request, "Nenhum CQS emitido para este RAQS.")
+        return redirect("raqs_detail", raqs_id=raqs.id)
+    return _resposta_pdf(certificados, f"CQS_RAQS_{raqs.n_master}.pdf")
+
+
+@login_required
+def cqs_a_vencer_view(request):
+    """CQS que vencem nos próximos ``dias`` (GET): todas as empresas para o Grupo Master."""
+    try:
+        dias = min(max(int(request.GET.get("dias", DIAS_PADRAO)), 0), DIAS_MAXIMO)
+    except ValueError:
+        dias = DIAS_PADRAO
+    if is_grupo_master(request.user):
+        empresa_id = None
+    elif request.user.empresa_id:
+        empresa_id = request.user.empresa_id
+    else:
+        return HttpResponse(status=403)
+
+    empresas = agrupar_por_empresa(cqs_a_vencer(dias, empresa_id))
+    return render(
+        request,
+        "cqs_a_vencer.html",
+        {
+            "dias": dias,
+            "opcoes_dias": sorted({7, 15, 30, 60, 90, dias}),
+            "empresas": empresas,
+            "total": sum(len(itens) for _, _, itens in empresas),
+        },
+    )
+
+
 @user_passes_test(is_grupo_master)
 def master_dashboard(request):
     """
     Cria o Dashboard baseado em solicitações, agrupando os dados por empresa e por soldador.
     Mostra apenas solicitações que não estão em RAQS fechados.
+
+    O número de queries é fixo, independente da quantidade de empresas: uma para as
+    empresas (com a linha de estatísticas via JOIN), uma para cada Prefetch de RAQS
+    (com contagem anotada) e uma para as solicitações disponíveis, lidas como linhas
+    projetadas via ``values()``.
     """
-    # Inicializamos uma estrutura de dados para juntar as informações
-    empresas_data = defaultdict(
-        lambda: defaultdict(list)
-    )  # {empresa: {soldador: [solicitacoes]}}
+    empresas = (
+        Empresa.objects.select_related("estatisticas")
+        .only("id", "nome", *(f"estatisticas__{campo}" for campo in EstatisticaEmpresa.CAMPOS))
+        .order_by("id")
+        .prefetch_related(
+            Prefetch(
+                "raqs_set",
+                queryset=Raqs.objects.filter(aberto=True)
+                .annotate(total_solicitacoes=Count("solicitacoes"))
+                .only("id", "empresa_id")
+                .order_by("id"),
+                to_attr="raqs_abertos",
+            ),
+            Prefetch(
+                "raqs_set",
+                queryset=Raqs.objects.filter(aberto=False)
+                .annotate(total_solicitacoes=Count("solicitacoes"))
+                .only("id", "empresa_id", "n_master", "data")
+                .order_by("-data"),
+                to_attr="raqs_fechados",
+            ),
+        )
+    )
+
+    # Solicitações que não estão em nenhum RAQS (disponíveis para criação de RAQS),
+    # organizadas por empresa e por soldador: {empresa_id: {soldador_id: {...}}}
+    normas = dict(SolicitacaoCadastroSoldador.NORMA_PROJETO_CHOICES)
+    soldadores_por_empresa = defaultdict(dict)
+    solicitacoes_disponiveis = (
+        SolicitacaoCadastroSoldador.objects.filter(raqs__isnull=True)
+        .order_by("empresa_id", "soldador__nome", "soldador_id", "id")
+        .values(
+            "id",
+            "empresa_id",
+            "soldador_id",
+            "soldador__nome",
+            "soldador__cpf",
+            "data",
+            "norma_projeto",
+        )
+    )
+    for row in solicitacoes_disponiveis:
+        soldadores_dict = soldadores_por_empresa[row["empresa_id"]]
+        soldador_data = soldadores_dict.setdefault(
+            row["soldador_id"],
+            {
+                "soldador": {"nome": row["soldador__nome"], "cpf": row["soldador__cpf"]},
+                "solicitacoes": [],
+            },
+        )
+        soldador_data["solicitacoes"].append(
+            {
+                "id": row["id"],
+                "data": row["data"],
+                "norma_projeto_display": normas.get(
+                    row["norma_projeto"], row["norma_projeto"]
+                ),
+            }
+        )
 
-    # Obter todas as empresas
-    empresas = Empresa.objects.all()
-    
     empresas_data_list = []
     for empresa in empresas:
-        # Verificar se há RAQS aberto para esta empresa
-        raqs_aberto = Raqs.objects.filter(empresa=empresa, aberto=True).first()
-        
-        # Verificar se há RAQS fechados para esta empresa
-        raqs_fechados = Raqs.objects.filter(empresa=empresa, aberto=False).order_by('-data')
-        
-        # Filtrar solicitações que não estão em nenhum RAQS (disponíveis para criação de RAQS)
-        solicitacoes_disponiveis = SolicitacaoCadastroSoldador.objects.filter(
-            empresa=empresa,
-            raqs__isnull=True
-        ).select_related("soldador")
-        
-        # Organizar por soldador
-        soldadores_dict = defaultdict(list)
-        for solicitacao in solicitacoes_disponiveis:
-            soldadores_dict[solicitacao.soldador].append(solicitacao)
-        
+        raqs_aberto = empresa.raqs_abertos[0] if empresa.raqs_abertos else None
+        soldadores = list(soldadores_por_empresa.get(empresa.id, {}).values())
+
         # Verificar se há soldadores com solicitações disponíveis para RAQS
-        tem_soldadores_para_raqs = bool(soldadores_dict)
-        
+        tem_soldadores_para_raqs = bool(soldadores)
+        # Linha preenchida na migração 0035 e criada junto com cada empresa nova
+        estatisticas = getattr(empresa, "estatisticas", None)
+
         # Se há RAQS fechado, mostrar os RAQS em vez das solicitações individuais
-        if raqs_fechados.exists() and not raqs_aberto:
+        if empresa.raqs_fechados and not raqs_aberto:
             empresas_data_list.append({
                 "empresa": empresa,
                 "raqs_aberto": False,
                 "raqs": None,
-                "raqs_fechados": raqs_fechados,
+                "raqs_fechados": empresa.raqs_fechados,
                 "soldadores": [],  # Não mostrar soldadores individuais se há RAQS fechado
                 "tem_raqs_fechados": True,
                 "tem_soldadores_para_raqs": tem_soldadores_para_raqs,
+                "estatisticas": estatisticas,
             })
         else:
             # Mostrar solicitações individuais apenas se não há RAQS fechados ou há RAQS aberto
@@ -308,12 +651,10 @@ def master_dashboard(request):
                 "raqs_aberto": bool(raqs_aberto),
                 "raqs": raqs_aberto,
                 "raqs_fechados": [],
-                "soldadores": [
-                    {"soldador": soldador, "solicitacoes": solicitacoes}
-                    for soldador, solicitacoes in soldadores_dict.items()
-                ] if soldadores_dict else [],
+                "soldadores": soldadores,
                 "tem_raqs_fechados": False,
                 "tem_soldadores_para_raqs": tem_soldadores_para_raqs,
+                "estatisticas": estatisticas,
             })
 
     # Enviamos os dados processados para o template
@@ -328,10 +669,15 @@ def empresa_dashboard(request):
     soldadores = Soldador.objects.filter(
         solicitacaocadastrosoldador__empresa=empresa
     ).distinct()
-    solicitacoes = SolicitacaoCadastroSoldador.objects.filter(empresa=empresa)
-    
+    # Contadores do cabeçalho: uma linha mantida a cada gravação
+    estatisticas = obter_estatisticas(empresa.id)
+
     # Buscar RAQS fechados da empresa
-    raqs_fechados = Raqs.objects.filter(empresa=empresa, aberto=False).order_by('-data')
+    raqs_fechados = (
+        Raqs.objects.filter(empresa=empresa, aberto=False)
+        .annotate(total_solicitacoes=Count("solicitacoes"))
+        .order_by('-data')
+    )
 
     return render(
         request,
@@ -339,7 +685,7 @@ def empresa_dashboard(request):
         {
             "empresa": empresa,
             "soldadores": soldadores,
-            "solicitacoes": solicitacoes,
+            "estatisticas": estatisticas,
             "raqs_fechados": raqs_fechados,
         },
     )
@@ -347,7 +693,15 @@ def empresa_dashboard(request):
 
 def verificar_cpf_htmx(request):
     cpf = request.GET.get("cpf", "").strip()
-    soldador = Soldador.objects.filter(cpf=cpf).first()
+    if not cpf_valido(cpf):
+        return render(request, "partials/cpf_invalido.html")
+
+    # Busca pelo índice único do CPF normalizado
+    soldador = (
+        Soldador.objects.filter(cpf_normalizado=normalizar_cpf(cpf))
+        .only("id", "nome")
+        .first()
+    )
 
     if soldador:
         return render(
@@ -388,65 +742,17 @@ def apagar_solicitacao(request, solicitacao_id):
     return redirect("empresa-dashboard")
 
 
+@fragmento_em_cache("processo_soldagem")
 def update_consumivel_classificacao(request):
     processo_soldagem = request.GET.get("processo_soldagem", "").strip()
     form = SolicitacaoCadastroSoldadorForm()
-    print("Processo de Soldagem:", processo_soldagem)
-
-    if processo_soldagem == "SMAW":
-        form.fields["consumivel_classificacao"].choices = [
-            ("E-6010", "E-6010"),
-            ("E-7018", "E-7018"),
-            ("E-NiCrFe3", "E-NiCrFe3"),
-            ("E-309L", "E-309L"),
-        ]
-        form.fields["consumivel_spec"].choices = [
-            ("SFA_5-1", "SFA 5.1"),
-            ("SFA_5-4", "SFA 5.4"),
-            ("SFA_5-11", "SFA 5.11"),
-        ]
-    elif processo_soldagem == "GTAW":
-        form.fields["consumivel_classificacao"].choices = [
-            ("ER-70S3", "ER-70S3"),
-            ("ER-309L", "ER-309L"),
-            ("ER-308L", "ER-308L"),
-            ("ER-NiCrFe3", "ER-NiCrFe3"),
-            ("ER-NiCrMo3", "ER-NiCrMo3"),
-        ]
-        form.fields["consumivel_spec"].choices = [
-            ("SFA_5-9", "SFA 5.9"),
-            ("SFA_5-14", "SFA 5.14"),
-            ("SFA_5-18", "SFA 5.18"),
-        ]
-        form.fields["gas_protecao"].disabled = False
-        form.fields["gas_protecao"].choices = [("ARGONIO", "Argônio")]
-    elif processo_soldagem == "GMAW":
-        form.fields["consumivel_classificacao"].choices = [
-            ("ER-70S6", "ER-70S6"),
-        ]
-        form.fields["consumivel_spec"].choices = [
-            ("SFA_5-18", "SFA 5.18"),
-        ]
-        form.fields["gas_protecao"].disabled = False
-        form.fields["gas_protecao"].choices = [
-            ("ARCO2", "Ar+CO²"),
-        ]
-    elif processo_soldagem == "FCAW":
-        form.fields["consumivel_classificacao"].choices = [("E-71T1", "E-71T1")]
-        form.fields["consumivel_spec"].choices = [
-            ("SFA_5-20", "SFA 5.20"),
-        ]
-        form.fields["gas_protecao"].disabled = False
-        form.fields["gas_protecao"].choices = [
-            ("CO2", "CO²"),
-        ]
-    else:
-        form.fields["consumivel_classificacao"].choices = []
-        form.fields["consumivel_spec"].choices = []
-        form.fields["gas_protecao"].readonly = True
-        form.fields["gas_protecao"].choices = [
-            ("NA", "N/A"),
-        ]
+
+    # Consumíveis e especificações do processo vêm das regras (regras_classificacao.csv),
+    # na ordem dos choices do modelo
+    consumiveis, especificacoes = consumiveis_do_processo(processo_soldagem)
+    form.fields["consumivel_classificacao"].choices = consumiveis
+    form.fields["consumivel_spec"].choices = especificacoes
+    form.fields["gas_protecao"].choices = gases_do_processo(processo_soldagem)
 
     return render(
         request,
@@ -464,30 +770,27 @@ def update_consumivel_classificacao(request):
 
 def criar_raqs(request, empresa_id):
     empresa = get_object_or_404(Empresa, id=empresa_id)
-    existente_aberto = Raqs.objects.filter(empresa=empresa, aberto=True).exists()
-
-    if existente_aberto:
-        messages.error(request, "Já existe um RAQS aberto para esta empresa.")
-        return redirect("master_dashboard")
 
     # Buscar solicitações disponíveis (que não estão em nenhum RAQS)
-    solicitacoes_disponiveis = SolicitacaoCadastroSoldador.objects.filter(
-        empresa=empresa,
-        raqs__isnull=True
+    solicitacoes_disponiveis = list(
+        SolicitacaoCadastroSoldador.objects.filter(empresa=empresa, raqs__isnull=True)
     )
     
-    if not solicitacoes_disponiveis.exists():
+    if not solicitacoes_disponiveis:
         messages.error(request, "Não há solicitações disponíveis para criar um RAQS para esta empresa.")
         return redirect("master_dashboard")
 
-    # Criar o novo RAQS
-    novo_raqs = Raqs.objects.create(empresa=empresa, aberto=True)
-    
-    # Adicionar automaticamente todas as solicitações disponíveis
-    novo_raqs.solicitacoes.add(*solicitacoes_disponiveis)
-    novo_raqs.save()
+    # A regra "um RAQS aberto por empresa" é garantida pela constraint do banco
+    try:
+        with transaction.atomic():
+            novo_raqs = Raqs.objects.create(empresa=empresa, aberto=True)
+            # Adicionar automaticamente todas as solicitações disponíveis
+            novo_raqs.solicitacoes.add(*solicitacoes_disponiveis)
+    except IntegrityError:
+        messages.error(request, "Já existe um RAQS aberto para esta empresa.")
+        return redirect("master_dashboard")
     
-    messages.success(request, f"RAQS criado com sucesso! {solicitacoes_disponiveis.count()} solicitações adicionadas automaticamente.")
+    messages.success(request, f"RAQS criado com sucesso! {len(solicitacoes_disponiveis)} solicitações adicionadas automaticamente.")
     return redirect("raqs_detail", raqs_id=novo_raqs.id)
 
 
@@ -513,120 +816,188 @@ def adicionar_solicitacao_raqs(request, raqs_id, solicitacao_id=None):
 
 
 def fechar_raqs(request, raqs_id):
-    raqs = get_object_or_404(Raqs, id=raqs_id)
-    raqs.aberto = False
-    raqs.save()
+    raqs = get_object_or_404(Raqs.objects.select_related("empresa"), id=raqs_id)
+    raqs.fechar()
+    gerar_relatorio_raqs(raqs)
     messages.success(request, "RAQS fechado com sucesso!")
     return redirect("master_dashboard")
 
 
+@login_required
+def relatorio_raqs(request, raqs_id):
+    """Serve o relatório gravado no fechamento; RAQS fechados antes dele geram na primeira visita."""
+    raqs = get_object_or_404(Raqs.objects.select_related("empresa"), id=raqs_id)
+    if not _pode_ver_empresa(request.user, raqs.empresa_id):
+        return HttpResponse(status=403)
+    if raqs.aberto:
+        return redirect("raqs_detail", raqs_id=raqs.id)
+    if not raqs.relatorio or not raqs.relatorio.storage.exists(raqs.relatorio.name):
+        gerar_relatorio_raqs(raqs)
+    return FileResponse(
+        raqs.relatorio.open("rb"),
+        content_type="text/html; charset=utf-8",
+        filename=f"{raqs.n_master}.html",
+    )
+
+
+def _salvar_resultados_raqs(raqs, dados):
+    """
+    Aplica os resultados enviados no formulário do RAQS em lote: carrega de uma vez
+    os testes visuais e ensaios existentes, ajusta os objetos em memória e grava com
+    ``bulk_create``/``bulk_update``. Deve rodar dentro de uma transação.
+
+    Retorna os ids das solicitações que tiveram algum teste criado ou alterado.
+    """
+    solicitacoes = list(raqs.solicitacoes.all())
+    ids = [solicitacao.id for solicitacao in solicitacoes]
+
+    # {modelo: {solicitacao_id: registro}} - o registro de menor id vence, como no .first()
+    registros = {}
+    for model in (TesteVisual, EnsaioMecanicoDobramento, EnsaioUltrassom):
+        registros[model] = {
+            registro.solicitacao_id: registro
+            for registro in model.objects.filter(solicitacao_id__in=ids).order_by("-id")
+        }
+
+    alterados = {}
+
+    def obter(model, solicitacao):
+        if solicitacao.id not in registros[model]:
+            registros[model][solicitacao.id] = model(solicitacao=solicitacao)
+        return registros[model][solicitacao.id]
+
+    def atualizar(registro, **campos):
+        if registro.pk is None or any(
+            getattr(registro, campo) != valor for campo, valor in campos.items()
+        ):
+            for campo, valor in campos.items():
+                setattr(registro, campo, valor)
+            alterados[(type(registro), registro.solicitacao_id)] = registro
+
+    def atualizar_ensaio(model, solicitacao, resultado):
+        ensaio = obter(model, solicitacao)
+        if resultado == "Nao_Realizado":
+            atualizar(ensaio, realizado=False, aprovado=False)
+        else:
+            atualizar(ensaio, realizado=True, aprovado=resultado == "Aprovado")
+
+    for solicitacao in solicitacoes:
+        # Teste Visual (agora individual por solicitação)
+        teste_visual_key = f"teste_visual_{solicitacao.id}"
+        if teste_visual_key in dados:
+            resultado = dados[teste_visual_key]
+            campos = {"resultado": resultado}
+
+            # Processar motivos de reprovação se o teste visual foi reprovado
+            motivos_key = f"motivos_reprovacao_{solicitacao.id}"
+            if resultado == "Reprovado" and motivos_key in dados:
+                campos["motivos_reprovacao"] = dados[motivos_key]
+            elif resultado == "Aprovado":
+                campos["motivos_reprovacao"] = ""  # Limpar motivos se aprovado
+
+            atualizar(obter(TesteVisual, solicitacao), **campos)
+
+            # Se teste visual reprovado, marcar ensaio como "Não Realizado" automaticamente
+            if resultado == "Reprovado":
+                if solicitacao.ensaio == "DOBRAMENTO":
+                    atualizar_ensaio(EnsaioMecanicoDobramento, solicitacao, "Nao_Realizado")
+                elif solicitacao.ensaio == "ULTRASSOM":
+                    atualizar_ensaio(EnsaioUltrassom, solicitacao, "Nao_Realizado")
+
+        # Ensaio Mecânico Dobramento (apenas se teste visual não for reprovado)
+        if solicitacao.ensaio == "DOBRAMENTO":
+            aprovado_key = f"dobramento_aprovado_{solicitacao.id}"
+            if dados.get(aprovado_key):
+                atualizar_ensaio(EnsaioMecanicoDobramento, solicitacao, dados[aprovado_key])
+
+        # Ensaio Ultrassom (apenas se teste visual não for reprovado)
+        if solicitacao.ensaio == "ULTRASSOM":
+            aprovado_key = f"ultrassom_aprovado_{solicitacao.id}"
+            if dados.get(aprovado_key):
+                atualizar_ensaio(EnsaioUltrassom, solicitacao, dados[aprovado_key])
+
+    # Gravação em lote; bulk_update não aplica o auto_now, então a data vai explícita
+    hoje = timezone.localdate()
+    campos_por_modelo = {
+        TesteVisual: ["resultado", "motivos_reprovacao", "data_teste"],
+        EnsaioMecanicoDobramento: ["aprovado", "realizado", "data_teste"],
+        EnsaioUltrassom: ["aprovado", "realizado", "data_teste"],
+    }
+    for model, campos in campos_por_modelo.items():
+        registros_modelo = [r for (m, _), r in alterados.items() if m is model]
+        novos = [r for r in registros_modelo if r.pk is None]
+        existentes = [r for r in registros_modelo if r.pk is not None]
+        if novos:
+            model.objects.bulk_create(novos)
+        if existentes:
+            for registro in existentes:
+                registro.data_teste = hoje
+            model.objects.bulk_update(existentes, campos)
+
+    return sorted({solicitacao_id for _, solicitacao_id in alterados})
+
+
 def raqs_detail(request, raqs_id):
-    raqs = get_object_or_404(Raqs, id=raqs_id)
+    raqs = get_object_or_404(Raqs.objects.select_related("empresa"), id=raqs_id)
     if request.method == "POST":
         if not raqs.aberto:
             messages.error(request, "Este RAQS está fechado e não pode ser modificado.")
             return redirect("raqs_detail", raqs_id=raqs.id)
         
-        for solicitacao in raqs.solicitacoes.all():
-            # Teste Visual (agora individual por solicitação)
-            teste_visual_key = f"teste_visual_{solicitacao.id}"
-            if teste_visual_key in request.POST:
-                teste_visual, _ = TesteVisual.objects.get_or_create(solicitacao=solicitacao)
-                teste_visual.resultado = request.POST[teste_visual_key]
-                
-                # Processar motivos de reprovação se o teste visual foi reprovado
-                motivos_key = f"motivos_reprovacao_{solicitacao.id}"
-                if request.POST[teste_visual_key] == "Reprovado" and motivos_key in request.POST:
-                    teste_visual.motivos_reprovacao = request.POST[motivos_key]
-                elif request.POST[teste_visual_key] == "Aprovado":
-                    teste_visual.motivos_reprovacao = ""  # Limpar motivos se aprovado
-                
-                teste_visual.save()
-                
-                # Se teste visual reprovado, marcar ensaio como "Não Realizado" automaticamente
-                if request.POST[teste_visual_key] == "Reprovado":
-                    if solicitacao.ensaio == "DOBRAMENTO":
-                        ensaio, _ = EnsaioMecanicoDobramento.objects.get_or_create(solicitacao=solicitacao)
-                        ensaio.realizado = False
-                        ensaio.aprovado = False
-                        ensaio.save()
-                    elif solicitacao.ensaio == "ULTRASSOM":
-                        ensaio, _ = EnsaioUltrassom.objects.get_or_create(solicitacao=solicitacao)
-                        ensaio.realizado = False
-                        ensaio.aprovado = False
-                        ensaio.save()
-
-            # Ensaio Mecânico Dobramento (apenas se teste visual não for reprovado)
-            if solicitacao.ensaio == "DOBRAMENTO":
-                aprovado_key = f"dobramento_aprovado_{solicitacao.id}"
-                if aprovado_key in request.POST and request.POST[aprovado_key]:
-                    ensaio, _ = EnsaioMecanicoDobramento.objects.get_or_create(solicitacao=solicitacao)
-                    resultado = request.POST[aprovado_key]
-                    if resultado == "Nao_Realizado":
-                        ensaio.realizado = False
-                        ensaio.aprovado = False
-                    else:
-                        ensaio.realizado = True
-                        ensaio.aprovado = resultado == "Aprovado"
-                    ensaio.save()
-
-            # Ensaio Ultrassom (apenas se teste visual não for reprovado)
-            if solicitacao.ensaio == "ULTRASSOM":
-                aprovado_key = f"ultrassom_aprovado_{solicitacao.id}"
-                if aprovado_key in request.POST and request.POST[aprovado_key]:
-                    ensaio, _ = EnsaioUltrassom.objects.get_or_create(solicitacao=solicitacao)
-                    resultado = request.POST[aprovado_key]
-                    if resultado == "Nao_Realizado":
-                        ensaio.realizado = False
-                        ensaio.aprovado = False
-                    else:
-                        ensaio.realizado = True
-                        ensaio.aprovado = resultado == "Aprovado"
-                    ensaio.save()
+        with transaction.atomic():
+            alteradas = _salvar_resultados_raqs(raqs, request.POST)
+            if alteradas:
+                # Só o que mudou: status na hora, emissão de CQS no worker
+                atualizar_status_solicitacoes(alteradas)
+                invalidar_cache_empresas([raqs.empresa_id])  # bulk: sem signals
+                enfileirar("emitir_cqs", solicitacao_ids=alteradas)
         messages.success(request, "Alterações salvas com sucesso!")
         return redirect("raqs_detail", raqs_id=raqs.id)
 
-    # Group solicitações by soldador
-    soldadores_dict = {}
-    for solicitacao in raqs.solicitacoes.all().select_related('soldador').order_by('soldador__nome'):
-        if solicitacao.soldador not in soldadores_dict:
-            soldadores_dict[solicitacao.soldador] = []
-        soldadores_dict[solicitacao.soldador].append(solicitacao)
-
-    # Convert to list of tuples (soldador, solicitações) and sort by soldador name
-    soldadores_list = sorted(soldadores_dict.items(), key=lambda x: x[0].nome)
+    # Plano único de carga: soldador e teste visual via JOIN, ensaios via Prefetch.
+    # Cada solicitação recebe ``teste_visual`` e ``ensaio_registrado`` prontos para o template.
+    solicitacoes = list(
+        raqs.solicitacoes.select_related("soldador", "testevisual")
+        .prefetch_related(
+            Prefetch(
+                "ensaiomecanicodobramento_set",
+                queryset=EnsaioMecanicoDobramento.objects.order_by("id"),
+                to_attr="dobramentos",
+            ),
+            Prefetch(
+                "ensaioultrassom_set",
+                queryset=EnsaioUltrassom.objects.order_by("id"),
+                to_attr="ultrassons",
+            ),
+        )
+        .order_by("soldador__nome", "soldador_id", "id")
+    )
 
-    # Get all teste visual for solicitações in this RAQS
+    # Group solicitações by soldador (já ordenadas pelo nome do soldador)
+    soldadores_dict = {}
     testes_visuais = {}
-    for solicitacao in raqs.solicitacoes.all():
-        try:
-            teste_visual = TesteVisual.objects.get(solicitacao=solicitacao)
-            testes_visuais[solicitacao.id] = teste_visual
-        except TesteVisual.DoesNotExist:
-            testes_visuais[solicitacao.id] = None
-
-    # Verificar se todos os testes foram preenchidos
     todos_testes_completos = True
-    for solicitacao in raqs.solicitacoes.all():
-        # Verificar teste visual
-        teste_visual = testes_visuais.get(solicitacao.id)
-        if not teste_visual or not teste_visual.resultado:
+    for solicitacao in solicitacoes:
+        soldadores_dict.setdefault(solicitacao.soldador, []).append(solicitacao)
+
+        solicitacao.teste_visual = getattr(solicitacao, "testevisual", None)
+        if solicitacao.ensaio == "DOBRAMENTO":
+            ensaios = solicitacao.dobramentos
+        elif solicitacao.ensaio == "ULTRASSOM":
+            ensaios = solicitacao.ultrassons
+        else:
+            ensaios = []
+        solicitacao.ensaio_registrado = ensaios[0] if ensaios else None
+        testes_visuais[solicitacao.id] = solicitacao.teste_visual
+
+        # Verificar se todos os testes foram preenchidos: teste visual com resultado
+        # e ensaio existente (indicando que foi processado no template)
+        if not solicitacao.teste_visual or not solicitacao.teste_visual.resultado:
             todos_testes_completos = False
-            break
-        
-        # Verificar ensaio específico
-        if solicitacao.ensaio == 'DOBRAMENTO':
-            ensaio_dobramento = EnsaioMecanicoDobramento.objects.filter(solicitacao=solicitacao).first()
-            # Ensaio deve existir (indicando que foi processado no template)
-            if not ensaio_dobramento:
-                todos_testes_completos = False
-                break
-        elif solicitacao.ensaio == 'ULTRASSOM':
-            ensaio_ultrassom = EnsaioUltrassom.objects.filter(solicitacao=solicitacao).first()
-            # Ensaio deve existir (indicando que foi processado no template)
-            if not ensaio_ultrassom:
-                todos_testes_completos = False
-                break
+        elif solicitacao.ensaio in ("DOBRAMENTO", "ULTRASSOM") and not ensaios:
+            todos_testes_completos = False
+
+    soldadores_list = list(soldadores_dict.items())
 
     context = {
         "raqs": raqs,
@@ -634,5 +1005,6 @@ def raqs_detail(request, raqs_id):
         "lista_verificacoes_choices": TesteVisual.LISTA_VERIFICA_CHOICES,
         "testes_visuais": testes_visuais,
         "todos_testes_completos": todos_testes_completos,
+        "total_solicitacoes": len(solicitacoes),
     }
     return render(request, "raqs/raqs_detail.html", context)